@@ -0,0 +1,40 @@
+"""
+Benchmarks for file type detection and the LiveOptics/RVTools transforms.
+"""
+from parser.transform.data_validation import filetype_validation
+from parser.transform.transform_lova import lova_conversion
+from parser.transform.transform_rvtools import rvtools_conversion
+
+
+def test_detect_rvtools(benchmark, workbook, rounds, vms, units):
+    """Sheet sniffing of an RVTools export"""
+    path = workbook('rv-tools', vms, units)
+    benchmark.group = f'detect {vms} VMs'
+    result = benchmark.pedantic(filetype_validation, args=(str(path.parent), path.name), rounds=rounds)
+    assert result == 'rv-tools'
+
+
+def test_detect_liveoptics(benchmark, workbook, rounds, vms, units):
+    """Sheet sniffing of a LiveOptics export"""
+    path = workbook('live-optics', vms, units)
+    benchmark.group = f'detect {vms} VMs'
+    result = benchmark.pedantic(filetype_validation, args=(str(path.parent), path.name), rounds=rounds)
+    assert result == 'live-optics'
+
+
+def test_transform_rvtools(benchmark, workbook, rounds, vms, units):
+    """Full RVTools transform: read vInfo/vDisk/vPartition, aggregate, merge, validate"""
+    path = workbook('rv-tools', vms, units)
+    benchmark.group = f'transform {vms} VMs'
+    result = benchmark.pedantic(rvtools_conversion, kwargs={'input_path': str(path.parent), 'file_name': path.name},
+                                rounds=rounds)
+    assert len(result) == vms
+
+
+def test_transform_liveoptics(benchmark, workbook, rounds, vms, units):
+    """Full LiveOptics transform: read VMs/VM Performance, merge, validate"""
+    path = workbook('live-optics', vms, units)
+    benchmark.group = f'transform {vms} VMs'
+    result = benchmark.pedantic(lova_conversion, kwargs={'input_path': str(path.parent), 'file_name': path.name},
+                                rounds=rounds)
+    assert len(result) == vms
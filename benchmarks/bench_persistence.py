@@ -0,0 +1,47 @@
+"""
+Benchmarks for saving a processed upload and exporting a project.
+"""
+import pytest
+from sqlalchemy import delete, insert
+from parser.app import db
+from parser.dimensions import assign_dimension_ids
+from parser.models import Workload
+from parser.staging import stage_frame
+from parser.transform.schema import to_workload_records
+from parser.transform.transform_rvtools import rvtools_conversion
+
+
+@pytest.fixture
+def processed(workbook, vms):
+    """Transform output for an RVTools workbook of the requested size"""
+    path = workbook('rv-tools', vms)
+    return rvtools_conversion(input_path=str(path.parent), file_name=path.name)
+
+
+def test_save_workloads(benchmark, app, client, project, processed, rounds, vms):
+    """POST /save_workloads for a staged upload (append mode)"""
+    def stage_upload():
+        # each round starts from an empty project with the upload staged in the session
+        db.session.execute(delete(Workload).where(Workload.pid == project.pid))
+        db.session.commit()
+        with client.session_transaction() as sess:
+            sess['staged_upload'] = stage_frame(processed)
+            sess['project_id'] = project.pid
+            sess['file_name'] = 'benchmark.xlsx'
+            sess['file_type'] = 'rv-tools'
+
+    benchmark.group = f'save {vms} VMs'
+    response = benchmark.pedantic(client.post, args=('/save_workloads',), setup=stage_upload, rounds=rounds)
+    assert response.status_code == 302
+    assert db.session.query(Workload).filter_by(pid=project.pid).count() == vms
+
+
+def test_export_project(benchmark, client, project, processed, rounds, vms):
+    """GET /export_project as CSV"""
+    db.session.execute(insert(Workload), assign_dimension_ids(to_workload_records(processed, project.pid)))
+    db.session.commit()
+
+    benchmark.group = f'export {vms} VMs'
+    response = benchmark.pedantic(client.get, args=(f'/export_project/{project.pid}',), rounds=rounds)
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count('\n') == vms + 1
@@ -0,0 +1,116 @@
+"""
+Fixtures for the benchmark suite.
+
+Workbook sizes and header variants are chosen on the command line (or through
+BENCHMARK_VMS / BENCHMARK_UNITS) and generated once into a cache directory.
+Save and export benchmarks need a database: BENCHMARK_DATABASE_URI if set,
+otherwise a throwaway Postgres container like the test suite uses.
+"""
+import os
+import uuid
+import pytest
+from pathlib import Path
+from parser.app import create_app, db, bcrypt
+from parser.models import User, Project, Workload
+from sqlalchemy import delete
+from benchmarks.workbooks import UNITS, generate
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / '.workbooks'
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('workbooks', 'synthetic workbook benchmarks')
+    group.addoption('--vms', default=os.getenv('BENCHMARK_VMS', '1000'),
+                    help='comma separated VM counts to benchmark, e.g. 1000,10000,200000')
+    group.addoption('--units', default=os.getenv('BENCHMARK_UNITS', ','.join(UNITS)),
+                    help='comma separated header variants to benchmark (MiB, MB)')
+    group.addoption('--rounds', type=int, default=int(os.getenv('BENCHMARK_ROUNDS', '3')),
+                    help='timed rounds per benchmark')
+    group.addoption('--workbook-dir', default=os.getenv('BENCHMARK_WORKBOOK_DIR', str(DEFAULT_CACHE_DIR)),
+                    help='where generated workbooks are cached between runs')
+
+
+def pytest_generate_tests(metafunc):
+    config = metafunc.config
+    if 'vms' in metafunc.fixturenames:
+        sizes = [int(v) for v in config.getoption('vms').split(',') if v.strip()]
+        metafunc.parametrize('vms', sizes, ids=[f'{v}vms' for v in sizes])
+    if 'units' in metafunc.fixturenames:
+        units = [u.strip() for u in config.getoption('units').split(',') if u.strip()]
+        metafunc.parametrize('units', units)
+
+
+@pytest.fixture(scope='session')
+def rounds(pytestconfig):
+    return pytestconfig.getoption('rounds')
+
+
+@pytest.fixture(scope='session')
+def workbook(pytestconfig):
+    """Return a factory that generates (or reuses) a workbook and returns its path"""
+    directory = Path(pytestconfig.getoption('workbook_dir'))
+
+    def make(file_type, vms, units='MiB'):
+        return generate(file_type, directory, vms, units=units)
+
+    return make
+
+
+@pytest.fixture(scope='session')
+def database_uri():
+    """Database for save/export benchmarks"""
+    uri = os.getenv('BENCHMARK_DATABASE_URI')
+    if uri:
+        yield uri
+        return
+    from testcontainers.postgres import PostgresContainer
+    postgres = PostgresContainer('postgres:16.4-alpine3.20')
+    postgres = postgres.with_env("POSTGRES_DB", "inventorydb")
+    script = Path(__file__).parent.parent / 'tests' / 'sql' / 'init-user-db.sh'
+    postgres.with_volume_mapping(host=str(script), container=f"/docker-entrypoint-initdb.d/{script.name}")
+    with postgres:
+        yield postgres.get_connection_url()
+
+
+@pytest.fixture
+def app(database_uri):
+    """Flask app bound to the benchmark database"""
+    app = create_app(config={
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'WTF_CSRF_ENABLED': False,
+        'SECRET_KEY': 'benchmark-secret-key',
+        'TRANSFORM_PROFILING': False,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def project(app):
+    """A user and project that are removed again after the benchmark"""
+    user = User(username=f"bench_{uuid.uuid4().hex[:8]}",
+                password=bcrypt.generate_password_hash("benchpassword123").decode('utf-8'))
+    db.session.add(user)
+    db.session.commit()
+    project = Project(userid=user.id, projectname=f"Bench_{uuid.uuid4().hex[:8]}")
+    db.session.add(project)
+    db.session.commit()
+
+    yield project
+
+    db.session.rollback()
+    db.session.execute(delete(Workload).where(Workload.pid == project.pid))
+    db.session.delete(project)
+    db.session.delete(user)
+    db.session.commit()
+
+
+@pytest.fixture
+def client(app, project):
+    """Test client logged in as the project owner"""
+    client = app.test_client()
+    client.post('/login', data={'username': project.user.username, 'password': 'benchpassword123'})
+    return client
@@ -0,0 +1,177 @@
+"""Load test: interactive latency while imports run.
+
+Measures the latency of interactive pages (``/dashboard``, ``/health`` by
+default) against a running deployment, first on its own and then while
+several clients upload and process workbooks at the same time. With the
+split pools (``compose.pools.yml``) the interactive p99 should stay close to
+the baseline; with one pool it climbs once every worker is busy importing.
+
+Run against a deployment with an existing user and project::
+
+    python -m benchmarks.load_pools --url http://localhost --username bench --password benchpassword123 \\
+        --project-id 1 --vms 50000 --imports 3 --duration 60 --max-p99-ms 500
+
+The workbook is generated (and cached) with ``benchmarks.workbooks`` unless
+``--workbook`` points at an existing export. Exits with status 1 when the
+interactive p99 under import load exceeds ``--max-p99-ms``.
+"""
+import argparse
+import http.cookiejar
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.workbooks import generate
+
+CSRF_TOKEN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+CHUNK_SIZE = 1024 * 1024
+
+
+class Client(object):
+    """A logged-in browser session (cookies and CSRF token) against the deployment."""
+
+    def __init__(self, url, username, password, timeout):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        token = self._csrf('/login')
+        self.request('/login', data=urllib.parse.urlencode(
+            {'username': username, 'password': password, 'csrf_token': token or ''}).encode())
+
+    def _csrf(self, path):
+        match = CSRF_TOKEN.search(self.request(path).decode('utf-8', errors='replace'))
+        return match.group(1) if match else None
+
+    def request(self, path, data=None, headers=None):
+        request = urllib.request.Request(self.url + path, data=data, headers=headers or {})
+        with self.opener.open(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def upload(self, project_id, workbook):
+        """Upload a workbook and follow the redirect through /process_upload.
+
+        Returns:
+            bool: Whether the upload preview came back
+        """
+        path = f'/upload/{project_id}'
+        token = self._csrf(path)
+        boundary = uuid.uuid4().hex
+        fields = ''.join(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+                         for name, value in (('csrf_token', token or ''), ('project_id', project_id)))
+        # a unique name per upload, so concurrent uploads don't overwrite each other's file
+        file_name = f'{uuid.uuid4().hex[:8]}-{workbook.name}'
+        head = (fields + f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{file_name}"'
+                f'\r\nContent-Type: application/octet-stream\r\n\r\n').encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+
+        def body():
+            yield head
+            with open(workbook, 'rb') as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    yield chunk
+            yield tail
+
+        page = self.request(path, data=body(), headers={
+            'Content-Type': f'multipart/form-data; boundary={boundary}',
+            'Content-Length': str(len(head) + workbook.stat().st_size + len(tail)),
+        })
+        return b'workload-preview-table' in page
+
+
+def probe(client, paths, stop, latencies, errors):
+    """Request the interactive pages in turn until stop is set, recording milliseconds."""
+    while not stop.is_set():
+        for path in paths:
+            started = time.perf_counter()
+            try:
+                client.request(path)
+                latencies.append((time.perf_counter() - started) * 1000)
+            except (urllib.error.URLError, OSError):
+                errors.append(path)
+
+
+def importer(client, project_id, workbook, stop, durations, errors):
+    """Upload the workbook repeatedly until stop is set, recording seconds per import."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            if client.upload(project_id, workbook):
+                durations.append(time.perf_counter() - started)
+            else:
+                errors.append('upload')
+        except (urllib.error.URLError, OSError):
+            errors.append('upload')
+
+
+def measure(args, workbook, imports):
+    """Run the interactive probes for args.duration seconds with imports running alongside.
+
+    Returns:
+        dict: Latency percentiles, request and error counts
+    """
+    stop = threading.Event()
+    latencies, import_durations, errors = [], [], []
+    login = (args.url, args.username, args.password, args.timeout)
+    threads = [threading.Thread(target=probe, args=(Client(*login), args.paths, stop, latencies, errors))
+               for _ in range(args.concurrency)]
+    threads += [threading.Thread(target=importer, args=(Client(*login), args.project_id, workbook, stop,
+                                                        import_durations, errors))
+                for _ in range(imports)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (float('nan'),) * 3
+    return {'imports': imports, 'requests': len(latencies), 'p50': p50, 'p95': p95, 'p99': p99,
+            'completed_imports': len(import_durations), 'errors': len(errors)}
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    cli.add_argument('--url', default='http://localhost')
+    cli.add_argument('--username', required=True)
+    cli.add_argument('--password', required=True)
+    cli.add_argument('--project-id', required=True)
+    cli.add_argument('--workbook', type=Path, help='export to upload; generated when omitted')
+    cli.add_argument('--file-type', default='rv-tools', choices=['rv-tools', 'live-optics'])
+    cli.add_argument('--vms', type=int, default=50000, help='size of the generated workbook')
+    cli.add_argument('--workbook-dir', type=Path, default=Path(__file__).parent / '.workbooks')
+    cli.add_argument('--paths', type=lambda value: value.split(','), default=['/dashboard', '/health'],
+                     help='comma separated interactive pages to time')
+    cli.add_argument('--concurrency', type=int, default=4, help='interactive clients')
+    cli.add_argument('--imports', type=int, default=2, help='concurrent uploading clients')
+    cli.add_argument('--duration', type=float, default=60, help='seconds per phase')
+    cli.add_argument('--timeout', type=float, default=3600, help='seconds per request')
+    cli.add_argument('--max-p99-ms', type=float, help='fail when the loaded p99 exceeds this')
+    args = cli.parse_args(argv)
+
+    workbook = args.workbook or generate(args.file_type, args.workbook_dir, args.vms)
+    print(f'{workbook.name}: {workbook.stat().st_size / 1024 / 1024:.1f} MiB, {args.imports} concurrent imports, '
+          f'{args.concurrency} interactive clients on {", ".join(args.paths)}')
+    print(f'{"phase":<10}{"requests":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"imports":>10}{"errors":>8}')
+    results = []
+    for phase, imports in (('baseline', 0), ('imports', args.imports)):
+        result = measure(args, workbook, imports)
+        results.append(result)
+        print(f'{phase:<10}{result["requests"]:>10}{result["p50"]:>10.1f}{result["p95"]:>10.1f}'
+              f'{result["p99"]:>10.1f}{result["completed_imports"]:>10}{result["errors"]:>8}')
+
+    if args.max_p99_ms is not None and not results[-1]['p99'] <= args.max_p99_ms:
+        print(f'FAIL: p99 {results[-1]["p99"]:.1f} ms under import load exceeds {args.max_p99_ms:.0f} ms')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Worker memory with and without the pre-fork warm-up.
+
+Reproduces gunicorn's preload model without gunicorn: a fresh interpreter
+builds the app, optionally runs ``parser.warmup.warm_up``, then forks
+``--workers`` children. Each child does what a worker does on its first
+upload and page views: imports pandas and openpyxl, compiles the templates
+and loads the inventory formats. It then reports its RSS, PSS and private
+memory (``parser.resources.process_memory``)::
+
+    python -m benchmarks.preload_memory --workers 4
+
+PSS is the figure to compare. RSS counts the pages a worker shares with the
+master at full size in every worker. Linux only (reads ``/proc``).
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _first_requests(app):
+    # what a worker loads lazily when it has not been warmed up
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+    from parser.transform.registry import registered_transforms
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    registered_transforms()
+
+
+def run_phase(warm, workers):
+    """Build the app, fork the workers and collect their memory (runs in a fresh interpreter).
+
+    Returns:
+        dict: ``master`` and per-``workers`` ``ProcessMemory`` as dicts, in bytes
+    """
+    from parser.app import create_app
+    from parser.resources import process_memory
+    from parser.warmup import warm_up
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'LOG_LEVEL': 'WARNING'})
+    if warm:
+        warm_up(app)
+
+    children = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            _first_requests(app)
+            os.write(write, b'ready\n')
+            signal.pause()  # keep the shared pages mapped until the parent has measured every worker
+            os._exit(0)
+        os.close(write)
+        children.append((pid, read))
+
+    for _, read in children:
+        with os.fdopen(read) as pipe:
+            pipe.readline()
+    # PSS depends on how many processes share a page, so it is read once all workers are up
+    memory = [process_memory(pid)._asdict() for pid, _ in children]
+    for pid, _ in children:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+    return {'master': process_memory()._asdict(), 'workers': memory}
+
+
+def measure(warm, workers):
+    """Run one phase in a fresh interpreter, so the phases don't share imports."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.preload_memory', '--phase', 'warm' if warm else 'cold',
+                             '--workers', str(workers)], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    cli.add_argument('--workers', type=int, default=4)
+    cli.add_argument('--phase', choices=['cold', 'warm'], help=argparse.SUPPRESS)
+    args = cli.parse_args(argv)
+
+    if args.phase:
+        print(json.dumps(run_phase(args.phase == 'warm', args.workers)))
+        return 0
+
+    mb = 1024 * 1024
+    print(f'{"warm-up":<10}{"master RSS":>12}{"worker RSS":>12}{"worker PSS":>12}{"private":>12}{"total PSS":>12}  (MB)')
+    for warm in (False, True):
+        result = measure(warm, args.workers)
+        workers = result['workers']
+
+        def mean(key):
+            return sum(worker[key] for worker in workers) / len(workers) / mb
+
+        total = (result['master']['pss'] + sum(worker['pss'] for worker in workers)) / mb
+        print(f'{"on" if warm else "off":<10}{result["master"]["rss"] / mb:>12.1f}{mean("rss"):>12.1f}'
+              f'{mean("pss"):>12.1f}{mean("private"):>12.1f}{total:>12.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
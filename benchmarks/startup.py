@@ -0,0 +1,112 @@
+"""Cold start: import time of the application, measured with ``python -X importtime``.
+
+Every boot (each gunicorn worker recycle, container restart, CLI command and
+test run) imports the app and builds it with ``create_app``. pandas and
+openpyxl are only needed to process an upload, so the routes and transforms
+import them on first use; this script shows which modules a boot still
+imports and what they cost::
+
+    python -m benchmarks.startup --top 15
+    python -m benchmarks.startup --budget-ms 1000
+
+``tests/test_startup.py`` enforces the same budget and the list of modules
+that must stay out of a cold start.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Builds the app the way gunicorn does, without touching a real database
+BOOT_CODE = "from parser.app import create_app; create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})"
+
+# Only needed to process an upload or size a project; importing them at boot is a regression
+LAZY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+
+class ImportTime(NamedTuple):
+    """One line of ``-X importtime`` output.
+
+    Attributes:
+        module (str): Module name
+        self_us (int): Microseconds spent in the module itself
+        cumulative_us (int): Microseconds including the modules it imported
+        depth (int): Nesting level, 0 for modules imported by the boot code
+    """
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output):
+    """Parse the stderr of ``python -X importtime``.
+
+    Args:
+        output (str): stderr of the interpreter
+
+    Returns:
+        list: ``ImportTime`` per imported module, in import-completion order
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        module = name.lstrip()
+        depth = (len(name) - len(module) - 1) // 2
+        imports.append(ImportTime(module, int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def measure_startup(code=BOOT_CODE):
+    """Run code in a fresh interpreter and record its imports.
+
+    Args:
+        code (str): Python source to run, by default building the app
+
+    Returns:
+        tuple: (total import milliseconds, list of ``ImportTime``)
+
+    Raises:
+        subprocess.CalledProcessError: If the code fails
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    imports = parse_importtime(result.stderr)
+    total_ms = sum(entry.cumulative_us for entry in imports if entry.depth == 0) / 1000
+    return total_ms, imports
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    cli.add_argument('--top', type=int, default=10, help='slowest top-level imports to list')
+    cli.add_argument('--budget-ms', type=float, help='fail when the total import time exceeds this')
+    args = cli.parse_args(argv)
+
+    total_ms, imports = measure_startup()
+    print(f'{"module":<40}{"cumulative ms":>15}')
+    for entry in sorted((e for e in imports if e.depth == 0), key=lambda e: -e.cumulative_us)[:args.top]:
+        print(f'{entry.module:<40}{entry.cumulative_us / 1000:>15.1f}')
+    print(f'{"total":<40}{total_ms:>15.1f}')
+
+    status = 0
+    loaded = sorted({entry.module for entry in imports} & set(LAZY_MODULES))
+    if loaded:
+        print(f'FAIL: imported at startup: {", ".join(loaded)}')
+        status = 1
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f'FAIL: startup imports take {total_ms:.0f} ms, budget {args.budget_ms:.0f} ms')
+        status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
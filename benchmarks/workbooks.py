@@ -0,0 +1,266 @@
+"""Deterministic synthetic RVTools and LiveOptics workbooks for benchmarking.
+
+The generated files carry exactly the sheet lists ``filetype_validation``
+expects, the columns the transforms read plus a realistic number of filler
+columns, and either the ``MiB`` or the older ``MB`` header variant. The same
+seed always produces the same inventory.
+
+Generate a workbook from the command line::
+
+    python -m benchmarks.workbooks rv-tools --vms 200000 --units MB --out /tmp/bench
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+from openpyxl import Workbook
+
+from parser.transform.data_validation import LIVE_OPTICS_SHEETS, RVTOOLS_SHEETS
+
+UNITS = ('MiB', 'MB')
+
+OS_NAMES = [
+    'Microsoft Windows Server 2019 (64-bit)',
+    'Microsoft Windows Server 2016 or later (64-bit)',
+    'Microsoft Windows Server 2012 (64-bit)',
+    'Red Hat Enterprise Linux 8 (64-bit)',
+    'Red Hat Enterprise Linux 7 (64-bit)',
+    'Ubuntu Linux (64-bit)',
+    'SUSE Linux Enterprise 15 (64-bit)',
+    'Other 3.x or later Linux (64-bit)',
+]
+POWER_STATES = ['poweredOn', 'poweredOff', 'suspended']
+VCPU_CHOICES = [1, 2, 4, 8, 16, 32]
+VRAM_CHOICES_MIB = [1024, 2048, 4096, 8192, 16384, 32768, 65536]
+
+# Columns the transforms ignore, written so sheet parsing cost is realistic
+VINFO_FILLER = ['Template', 'SRM Placeholder', 'Config status', 'Connection state', 'Guest state',
+                'Heartbeat', 'NICs', 'Disks', 'Resource pool', 'Folder', 'Firmware', 'HW version',
+                'Path', 'Annotation', 'Host', 'OS according to the configuration file', 'VM UUID',
+                'VI SDK Server']
+DISK_FILLER = ['Powerstate', 'Template', 'Disk Key', 'Disk Mode', 'Thin', 'Controller', 'Label',
+               'Path', 'Datacenter', 'Cluster', 'Host', 'VM UUID']
+VMS_FILLER = ['IsRunning', 'Disks', 'NICs', 'VMware Tools Version', 'Connection State', 'Template',
+              'vCenter', 'UUID', 'InstanceUUID', 'Datastore', 'Host', 'Boot Time']
+PERF_FILLER = ['VM Name', 'Host', 'Datacenter', 'Cluster', 'VM IO Classification', 'Peak IOPS', 'Average IOPS']
+
+
+def workbook_name(file_type, vms, units='MiB', seed=0):
+    """Return the canonical file name for a generated workbook.
+
+    Args:
+        file_type (str): 'rv-tools' or 'live-optics'
+        vms (int): Number of VMs
+        units (str): 'MiB' or 'MB' header variant
+        seed (int): Random seed
+
+    Returns:
+        str: File name such as ``rv-tools_1000vms_MiB_s0.xlsx``
+    """
+    return f'{file_type}_{vms}vms_{units}_s{seed}.xlsx'
+
+
+def _inventory(vms, seed):
+    """Build the per-VM attributes shared by both formats."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, vms + 1)
+    vm_id = np.char.add('vm-', ids.astype(str))
+    vm_name = np.char.add('bench-vm', ids.astype(str))
+    power = rng.choice(POWER_STATES, size=vms, p=[0.85, 0.13, 0.02])
+    vram = rng.choice(VRAM_CHOICES_MIB, size=vms)
+    # RVTools and LiveOptics both report MiB; the "MB" variant only differs in headers
+    provisioned = rng.integers(20 * 1024, 2048 * 1024, size=vms)
+    used = (provisioned * rng.uniform(0.05, 0.95, size=vms)).astype(np.int64)
+    ip = np.char.add('10.', np.char.add((ids // 65536 % 256).astype(str),
+                                       np.char.add('.', np.char.add((ids // 256 % 256).astype(str),
+                                                                    np.char.add('.', (ids % 256).astype(str))))))
+    has_ip = (power == 'poweredOn') & (rng.random(vms) < 0.95)
+    return {
+        'vm_id': vm_id.tolist(),
+        'vm_name': vm_name.tolist(),
+        'os': rng.choice(OS_NAMES, size=vms).tolist(),
+        'power': power.tolist(),
+        'vcpu': rng.choice(VCPU_CHOICES, size=vms).tolist(),
+        'vram': vram.tolist(),
+        'provisioned': provisioned.tolist(),
+        'used': used.tolist(),
+        'cluster': np.char.add('Cluster ', (rng.integers(1, 33, size=vms)).astype(str)).tolist(),
+        'datacenter': np.char.add('DC', (rng.integers(1, 5, size=vms)).astype(str)).tolist(),
+        'ip': np.where(has_ip, ip, '').tolist(),
+        'rng': rng,
+    }
+
+
+def _write_workbook(path, sheet_names, sheets):
+    """Write sheets in order with openpyxl's streaming writer.
+
+    Args:
+        path (Path): Output file
+        sheet_names (list): Every sheet, in workbook order
+        sheets (dict): ``{sheet: (header, rows)}`` for sheets with content;
+            the rest get only a header row
+    """
+    wb = Workbook(write_only=True)
+    for name in sheet_names:
+        ws = wb.create_sheet(name)
+        header, rows = sheets.get(name, (['Name'], ()))
+        ws.append(header)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+
+
+def _filler(columns, vms):
+    return [['x'] * vms for _ in columns]
+
+
+def generate_rvtools(path, vms, disks_per_vm=2, partitions_per_vm=2, units='MiB', seed=0):
+    """Write a synthetic RVTools export.
+
+    Every VM gets ``disks_per_vm`` rows in vDisk. Powered-on VMs get
+    ``partitions_per_vm`` rows in vPartition; the others get none, so the
+    transform's fallback to the vInfo totals is exercised too.
+
+    Args:
+        path (str): Output file
+        vms (int): Number of VMs in vInfo
+        disks_per_vm (int): vDisk rows per VM
+        partitions_per_vm (int): vPartition rows per powered-on VM
+        units (str): 'MiB' (current RVTools) or 'MB' (older releases) headers
+        seed (int): Random seed
+
+    Returns:
+        Path: The written file
+    """
+    if units not in UNITS:
+        raise ValueError(f'units must be one of {UNITS}')
+    inv = _inventory(vms, seed)
+    rng = inv['rng']
+
+    vinfo_header = ['VM', 'Powerstate', 'DNS Name', 'CPUs', 'Memory', 'Primary IP Address',
+                    f'Provisioned {units}', f'In Use {units}', 'Datacenter', 'Cluster',
+                    'OS according to the VMware Tools', 'VM ID'] + VINFO_FILLER
+    vinfo_columns = [inv['vm_name'], inv['power'], inv['vm_name'], inv['vcpu'], inv['vram'],
+                     [ip or None for ip in inv['ip']], inv['provisioned'], inv['used'],
+                     inv['datacenter'], inv['cluster'], inv['os'], inv['vm_id']] + _filler(VINFO_FILLER, vms)
+
+    disk_owner = np.repeat(np.arange(vms), disks_per_vm)
+    disk_capacity = rng.integers(10 * 1024, 1024 * 1024, size=len(disk_owner)).tolist()
+    vm_id = np.array(inv['vm_id'], dtype=object)
+    vdisk_header = ['VM', 'Disk', f'Capacity {units}', 'VM ID'] + DISK_FILLER
+    vdisk_columns = [np.array(inv['vm_name'], dtype=object)[disk_owner].tolist(),
+                     [f'Hard disk {n % disks_per_vm + 1}' for n in range(len(disk_owner))],
+                     disk_capacity, vm_id[disk_owner].tolist()] + _filler(DISK_FILLER, len(disk_owner))
+
+    powered_on = np.flatnonzero(np.array(inv['power']) == 'poweredOn')
+    part_owner = np.repeat(powered_on, partitions_per_vm)
+    part_capacity = rng.integers(5 * 1024, 512 * 1024, size=len(part_owner))
+    part_consumed = (part_capacity * rng.uniform(0.05, 0.95, size=len(part_owner))).astype(np.int64)
+    vpart_header = ['VM', 'Disk', f'Capacity {units}', f'Consumed {units}', 'VM ID'] + DISK_FILLER
+    vpart_columns = [np.array(inv['vm_name'], dtype=object)[part_owner].tolist(),
+                     [f'/part{n % partitions_per_vm}' for n in range(len(part_owner))],
+                     part_capacity.tolist(), part_consumed.tolist(),
+                     vm_id[part_owner].tolist()] + _filler(DISK_FILLER, len(part_owner))
+
+    path = Path(path)
+    _write_workbook(path, RVTOOLS_SHEETS, {
+        'vInfo': (vinfo_header, zip(*vinfo_columns)),
+        'vDisk': (vdisk_header, zip(*vdisk_columns)),
+        'vPartition': (vpart_header, zip(*vpart_columns)),
+    })
+    return path
+
+
+def generate_liveoptics(path, vms, units='MiB', seed=0):
+    """Write a synthetic LiveOptics export.
+
+    Args:
+        path (str): Output file
+        vms (int): Number of VMs in the VMs and VM Performance sheets
+        units (str): 'MiB' (current LiveOptics) or 'MB' headers
+        seed (int): Random seed
+
+    Returns:
+        Path: The written file
+    """
+    if units not in UNITS:
+        raise ValueError(f'units must be one of {UNITS}')
+    inv = _inventory(vms, seed)
+    rng = inv['rng']
+
+    # up to four guest IPs; most VMs only report the first
+    ips = [[ip or None for ip in inv['ip']]]
+    for n in range(2, 5):
+        extra = rng.random(vms) < 0.2 / n
+        ips.append([f'192.168.{n}.{i % 250 + 1}' if flag and ip else None
+                    for i, (flag, ip) in enumerate(zip(extra, inv['ip']))])
+
+    vms_header = ['MOB ID', 'VM Name', 'Guest Hostname', 'Power State', 'VM OS', 'Virtual CPU',
+                  f'Provisioned Memory ({units})', f'Virtual Disk Size ({units})',
+                  f'Virtual Disk Used ({units})', 'Datacenter', 'Cluster',
+                  'Guest IP1', 'Guest IP2', 'Guest IP3', 'Guest IP4'] + VMS_FILLER
+    vms_columns = [inv['vm_id'], inv['vm_name'], inv['vm_name'], inv['power'], inv['os'], inv['vcpu'],
+                   inv['vram'], inv['provisioned'], inv['used'], inv['datacenter'], inv['cluster']] \
+        + ips + _filler(VMS_FILLER, vms)
+
+    perf = {name: rng.integers(low, high, size=vms).tolist() for name, low, high in [
+        ('Avg Read IOPS', 0, 500), ('Avg Write IOPS', 0, 500),
+        ('Peak Read IOPS', 500, 10000), ('Peak Write IOPS', 500, 10000),
+        ('Avg Read MB/s', 0, 50), ('Avg Write MB/s', 0, 50),
+        ('Peak Read MB/s', 50, 500), ('Peak Write MB/s', 50, 500),
+        ('Average vCPU %', 1, 40), ('Peak vCPU %', 40, 101),
+        ('Avg Memory %', 5, 50), ('Peak Memory %', 50, 101),
+    ]}
+    perf_header = ['MOB ID'] + list(perf) + PERF_FILLER
+    perf_columns = [inv['vm_id']] + list(perf.values()) + _filler(PERF_FILLER, vms)
+
+    path = Path(path)
+    _write_workbook(path, LIVE_OPTICS_SHEETS, {
+        'VMs': (vms_header, zip(*vms_columns)),
+        'VM Performance': (perf_header, zip(*perf_columns)),
+    })
+    return path
+
+
+GENERATORS = {
+    'rv-tools': generate_rvtools,
+    'live-optics': generate_liveoptics,
+}
+
+
+def generate(file_type, directory, vms, units='MiB', seed=0):
+    """Generate a workbook into directory unless it already exists.
+
+    Args:
+        file_type (str): 'rv-tools' or 'live-optics'
+        directory (str): Output directory
+        vms (int): Number of VMs
+        units (str): 'MiB' or 'MB' header variant
+        seed (int): Random seed
+
+    Returns:
+        Path: The workbook path
+    """
+    path = Path(directory) / workbook_name(file_type, vms, units, seed)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary name so an interrupted run never leaves a truncated workbook behind
+        partial = path.with_suffix('.partial')
+        GENERATORS[file_type](partial, vms, units=units, seed=seed)
+        partial.rename(path)
+    return path
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    cli.add_argument('file_type', choices=sorted(GENERATORS))
+    cli.add_argument('--vms', type=int, default=1000)
+    cli.add_argument('--units', choices=UNITS, default='MiB')
+    cli.add_argument('--seed', type=int, default=0)
+    cli.add_argument('--out', default='.')
+    args = cli.parse_args(argv)
+    print(generate(args.file_type, args.out, args.vms, units=args.units, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,51 @@
 # Gunicorn configuration for Flask Workload Parser
 # Based on official Gunicorn documentation: https://docs.gunicorn.org/en/stable/configure.html
 
-import multiprocessing
 import os
+import sys
+
+# gunicorn only adds its working directory to sys.path after reading this file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from parser.resources import MB, container_cpus, container_memory, plan_workers, process_memory
+
+# Worker pool
+# 'all' (default) serves every route from one pool. With nginx.pools.conf two
+# gunicorn services run from the same image: 'web' serves the interactive pages
+# with threaded workers and short timeouts, 'import' serves /upload,
+# /process_upload and /save_workloads with sync workers and long timeouts, so
+# hour-long uploads never hold the workers that answer /dashboard or /health.
+pool = os.getenv('GUNICORN_POOL', 'all').lower()
+if pool not in ('all', 'web', 'import'):
+    raise ValueError(f"GUNICORN_POOL must be 'all', 'web' or 'import', not {pool!r}")
 
 # Server socket configuration
-bind = "0.0.0.0:8000"
+bind = os.getenv('GUNICORN_BIND', "0.0.0.0:8000")
 backlog = 2048
 
 # Worker processes
-# Flask documentation recommends CPU cores * 2 + 1 for sync workers
+# Flask documentation recommends CPU cores * 2 + 1 for sync workers, counted
+# from the container's CPU quota rather than the host's cores, and capped so
+# that every worker can hold its baseline plus one import within the
+# container's memory limit (see parser/resources.py). The web pool runs no
+# imports, so only its idle workers count against the memory limit.
 # Reference: https://flask.palletsprojects.com/en/stable/deploying/gunicorn/
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"  # Best for CPU-intensive workloads like pandas processing
+threads = int(os.getenv('GUNICORN_THREADS', 4 if pool == 'web' else 1))
+worker_plan = plan_workers(
+    cpus=container_cpus(),
+    memory=container_memory(),
+    worker_memory=int(os.getenv('WORKER_MEMORY_MB', 200)) * MB,  # idle worker RSS
+    import_memory=0 if pool == 'web' else int(os.getenv('IMPORT_MEMORY_MB', 1024)) * MB,  # peak of one import
+    threads=threads,
+)
+workers = int(os.getenv('GUNICORN_WORKERS', 0)) or worker_plan.workers
+# Read by parser.config when the app is loaded below (preload_app)
+os.environ.setdefault('IMPORT_CONCURRENCY', str(worker_plan.import_slots))
+worker_class = "sync" if threads == 1 else "gthread"  # sync is best for CPU-intensive pandas processing
 worker_connections = 1000
 
-# Timeouts - Extended for large file uploads and processing (10GB files)
-timeout = 3600  # 1 hour for very large file uploads and processing
+# Timeouts - Extended for large file uploads and processing (10GB files),
+# except in the web pool where a stuck request should free its thread quickly
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60 if pool == 'web' else 3600))
 keepalive = 2
 
 # Worker lifecycle management
@@ -50,6 +79,10 @@ limit_request_field_size = 8190
 # Preload application for better memory usage
 # Reference: https://docs.gunicorn.org/en/stable/settings.html#preload-app
 preload_app = True
+# Before forking, import pandas/numpy/openpyxl, compile the templates and load
+# the inventory formats in the master so workers share them copy-on-write
+# (see parser/warmup.py). Set to false to compare worker memory without it.
+warmup = os.getenv('GUNICORN_WARMUP', 'True').lower() in ('true', '1', 'yes')
 
 # Environment variables
 raw_env = [
@@ -59,3 +92,52 @@ raw_env = [
 # Worker restart settings
 max_worker_restart = 10
 restart_worker_on_failure = True
+
+# Server hooks
+# Reference: https://docs.gunicorn.org/en/stable/settings.html#server-hooks
+def _memory(usage):
+    if usage is None:
+        return "unknown"
+    pss = f"{usage.pss / MB:.0f} MB" if usage.pss is not None else "unknown"
+    private = f"{usage.private / MB:.0f} MB" if usage.private is not None else "unknown"
+    return f"RSS {usage.rss / MB:.0f} MB, PSS {pss}, private {private}"
+
+
+def when_ready(server):
+    """Log the worker plan derived from the container limits, and warm up the preloaded app.
+
+    Runs in the master after the app is loaded and before the first worker
+    is forked.
+    """
+    memory = f"{worker_plan.memory / MB:.0f} MB" if worker_plan.memory else "unknown"
+    server.log.info("Container limits: %.2f CPUs, %s memory; %s pool with %d %s workers x %d threads, "
+                    "%s imports per worker", worker_plan.cpus, memory, pool, workers, worker_class, threads,
+                    os.environ['IMPORT_CONCURRENCY'])
+    if preload_app and warmup:
+        from parser.warmup import warm_up
+        warm_up(server.app.wsgi())
+    server.log.info("Master memory: %s", _memory(process_memory()))
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connection pool.
+
+    With preload_app the SQLAlchemy engine is created in the master, so any
+    pooled connections would be shared by every forked worker. Drop them
+    without closing the sockets the parent still owns.
+    Reference: https://docs.sqlalchemy.org/en/20/core/pooling.html#using-connection-pools-with-multiprocessing-or-os-fork
+    """
+    from parser.app import db
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """Log the worker's memory once it is ready to serve.
+
+    RSS includes the pages shared with the master; PSS and private memory
+    show what the warm-up saves per worker (compare with GUNICORN_WARMUP=false).
+    """
+    worker.log.info("Worker %s memory: %s", worker.pid, _memory(process_memory()))
@@ -0,0 +1,294 @@
+"""Admission of memory-heavy imports (upload processing).
+
+Two gates run before a transform loads an upload into pandas:
+
+* Each worker lets at most ``IMPORT_CONCURRENCY`` imports run at the same
+  time. ``gunicorn.conf.py`` derives it and the worker count from the
+  container's CPU and memory limits (see ``parser.resources``).
+* ``ImportAdmission`` shares one memory budget between all workers. Every
+  import reserves its estimated peak memory (from the sniffed sheet
+  dimensions, see ``estimate_import_memory``) in a small JSON state file
+  guarded by an ``flock``. An import is admitted while the reservations and
+  the container's current memory usage leave room for it. Otherwise it
+  queues for up to ``IMPORT_QUEUE_TIMEOUT`` seconds, and it is turned away
+  with an estimate of the wait if it cannot start by then.
+
+An import always runs when nothing else is importing, unless its estimate
+exceeds the container's memory limit.
+"""
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import current_app
+
+from parser.resources import MB, container_memory, container_memory_usage
+from parser.transform.registry import FileProbe
+
+# Seconds per MB of estimated import memory before any import was timed
+DEFAULT_SECONDS_PER_MB = 0.05
+# Weight of the newest import in the running average of seconds per MB
+RATE_SMOOTHING = 0.3
+# Seconds between admission checks of a queued import
+POLL_INTERVAL = 0.5
+# Fraction of the memory limit never planned for (page cache, master, database client)
+MEMORY_RESERVE = 0.1
+
+
+class ImportBusyError(Exception):
+    """Raised when an import cannot start in time, or at all.
+
+    Attributes:
+        retry_after (int): Estimated seconds until the import could start;
+            None if it is too large for this server
+    """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ImportAdmission(object):
+    """Memory reservations of the running imports, shared by all workers.
+
+    Args:
+        path (str): State file; its lock file is ``path + '.lock'``. Must be
+            on a filesystem shared by the workers (local disk).
+        budget (int): Bytes all running imports together may reserve
+        limit (int): Memory limit of the container in bytes (None if unknown)
+        usage (callable): Returns the container's current memory use in
+            bytes, or None if unknown
+    """
+
+    def __init__(self, path, budget, limit=None, usage=container_memory_usage):
+        self.path = path
+        self.budget = budget
+        self.limit = limit
+        self.usage = usage
+
+    def _read(self):
+        # writers replace the file atomically, so reading needs no lock
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault('active', {})
+        state.setdefault('seconds_per_mb', DEFAULT_SECONDS_PER_MB)
+        return state
+
+    @contextmanager
+    def _state(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = self._read()
+                yield state
+                tmp = f'{self.path}.{os.getpid()}.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _prune(state):
+        # reservations of workers that died mid-import (OOM kill, timeout) are released
+        for ticket, entry in list(state['active'].items()):
+            try:
+                os.kill(entry['pid'], 0)
+            except ProcessLookupError:
+                del state['active'][ticket]
+            except PermissionError:
+                pass
+
+    def _fits(self, committed, estimate, usage):
+        if committed + estimate > self.budget:
+            return False
+        return usage is None or not self.limit or usage + estimate <= self.limit * (1 - MEMORY_RESERVE)
+
+    def _wait(self, state, estimate, usage, now):
+        # finish times from the running average, earliest first; each frees its reservation
+        running = sorted((entry['started'] + entry['bytes'] / MB * state['seconds_per_mb'], entry['bytes'])
+                         for entry in state['active'].values())
+        committed = sum(reserved for _, reserved in running)
+        finish = now
+        for finish, reserved in running:
+            committed -= reserved
+            if usage is not None:
+                usage = max(0, usage - reserved)
+            if self._fits(committed, estimate, usage):
+                break
+        return max(1, math.ceil(finish - now))
+
+    def try_acquire(self, estimate):
+        """Reserve memory for an import if it can start now.
+
+        Args:
+            estimate (int): Estimated peak memory of the import in bytes
+
+        Returns:
+            tuple: ``(ticket, wait)``; ticket is None when not admitted, and
+                wait is the estimated seconds until it could be
+
+        Raises:
+            ImportBusyError: If the estimate exceeds the memory limit
+        """
+        if self.limit and estimate > self.limit:
+            raise ImportBusyError(f'Import needs about {estimate / MB:.0f} MB, more than the '
+                                  f'{self.limit / MB:.0f} MB available', retry_after=None)
+        with self._state() as state:
+            self._prune(state)
+            now = time.time()
+            committed = sum(entry['bytes'] for entry in state['active'].values())
+            usage = self.usage() if state['active'] else None
+            if state['active'] and not self._fits(committed, estimate, usage):
+                return None, self._wait(state, estimate, usage, now)
+            ticket = uuid.uuid4().hex
+            state['active'][ticket] = {'pid': os.getpid(), 'bytes': int(estimate), 'started': now}
+            return ticket, 0
+
+    def acquire(self, estimate, timeout):
+        """Reserve memory for an import, queueing until it fits.
+
+        Args:
+            estimate (int): Estimated peak memory of the import in bytes
+            timeout (float): Seconds to wait at most
+
+        Returns:
+            str: Ticket to pass to ``release``
+
+        Raises:
+            ImportBusyError: If the import is too large, or cannot be
+                expected to start within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            ticket, wait = self.try_acquire(estimate)
+            if ticket is not None:
+                return ticket
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or wait > remaining + POLL_INTERVAL:
+                raise ImportBusyError(f'Other imports are using the memory; expected wait {wait}s',
+                                      retry_after=wait)
+            time.sleep(min(POLL_INTERVAL, remaining))
+
+    def release(self, ticket):
+        """Free an import's reservation and learn from its duration."""
+        with self._state() as state:
+            entry = state['active'].pop(ticket, None)
+            if entry and entry['bytes'] >= MB:
+                observed = (time.time() - entry['started']) / (entry['bytes'] / MB)
+                state['seconds_per_mb'] += RATE_SMOOTHING * (observed - state['seconds_per_mb'])
+
+    def stats(self):
+        """Running imports, reserved and budgeted bytes, and the learned seconds per MB.
+
+        Read-only: takes no lock and leaves dead workers' reservations in
+        the file for the next import to release; they are not counted here.
+        """
+        state = self._read()
+        self._prune(state)
+        return {
+            'active': len(state['active']),
+            'reserved_bytes': sum(entry['bytes'] for entry in state['active'].values()),
+            'budget_bytes': self.budget,
+            'seconds_per_mb': round(state['seconds_per_mb'], 4),
+        }
+
+
+def import_admission(app=None):
+    """The application's import admission controller, created on first use."""
+    app = app or current_app._get_current_object()
+    admission = app.extensions.get('import_admission')
+    if admission is None:
+        limit = container_memory()
+        budget = app.config['IMPORT_MEMORY_BUDGET_MB'] * MB or int((limit or 0) * 0.8) or 2 ** 62
+        admission = app.extensions['import_admission'] = ImportAdmission(
+            app.config['IMPORT_ADMISSION_PATH'], budget=budget, limit=limit)
+    return admission
+
+
+def estimate_import_memory(input_path, file_name, plugin):
+    """Estimated peak memory of converting an upload.
+
+    Workbooks are sized from the rows and columns of the sheets the format
+    reads (``TransformPlugin.read_sheets``), times ``IMPORT_BYTES_PER_CELL``.
+    Other files, and workbooks without dimension records, are sized from the
+    file size times ``IMPORT_FILE_MEMORY_FACTOR``.
+
+    Args:
+        input_path (str): Directory containing the upload
+        file_name (str): File name
+        plugin (TransformPlugin): Format of the upload
+
+    Returns:
+        int: Bytes
+    """
+    config = current_app.config
+    probe = FileProbe(input_path, file_name)
+    dimensions = probe.sheet_dimensions
+    sheets = [name for name in plugin.read_sheets if name in dimensions] or list(dimensions)
+    if sheets:
+        cells = sum(rows * columns for rows, columns in (dimensions[name] for name in sheets))
+        return int(cells * config['IMPORT_BYTES_PER_CELL'])
+    return int(os.path.getsize(probe.path) * config['IMPORT_FILE_MEMORY_FACTOR'])
+
+
+def estimate_save_memory(frame_bytes):
+    """Estimated peak memory of saving a staged upload.
+
+    Saving holds the loaded frame, its object copy and the insert mappings
+    built from it, sized as the frame's in-memory size times
+    ``IMPORT_SAVE_MEMORY_FACTOR``.
+
+    Args:
+        frame_bytes (int): Deep memory usage of the staged frame
+            (``parser.staging.staged_memory``); None if unknown
+
+    Returns:
+        int: Bytes
+    """
+    return int((frame_bytes or 0) * current_app.config['IMPORT_SAVE_MEMORY_FACTOR'])
+
+
+def import_semaphore(app=None):
+    """This worker's import semaphore, created on first use."""
+    app = app or current_app._get_current_object()
+    semaphore = app.extensions.get('import_semaphore')
+    if semaphore is None:
+        semaphore = app.extensions['import_semaphore'] = threading.BoundedSemaphore(
+            max(1, app.config['IMPORT_CONCURRENCY']))
+    return semaphore
+
+
+@contextmanager
+def import_slot(estimate=0):
+    """Hold an import slot of this worker and a memory reservation for the block.
+
+    Args:
+        estimate (int): Estimated peak memory of the import in bytes
+
+    Raises:
+        ImportBusyError: If the import cannot start within ``IMPORT_QUEUE_TIMEOUT``
+    """
+    timeout = current_app.config['IMPORT_QUEUE_TIMEOUT']
+    deadline = time.monotonic() + timeout
+    semaphore = import_semaphore()
+    if not semaphore.acquire(timeout=timeout):
+        raise ImportBusyError('All import slots are busy', retry_after=max(1, timeout))
+    try:
+        admission = import_admission()
+        ticket = admission.acquire(estimate, max(0, deadline - time.monotonic()))
+        try:
+            yield
+        finally:
+            admission.release(ticket)
+    finally:
+        semaphore.release()
@@ -3,7 +3,11 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_wtf import CSRFProtect
 from flask_login import LoginManager
-from parser.config import Config
+from parser.config import Config, DB_POOL_SETTINGS, CACHE_SETTINGS, UPLOAD_SETTINGS, LOGGING_SETTINGS, INSTRUMENTATION_SETTINGS, SIZING_SETTINGS, engine_options
+from parser.log import configure_logging
+from parser.cache import TTLCache
+from parser.fragments import FragmentCacheExtension, template_bytecode_cache
+from sqlalchemy.orm import make_transient_to_detached
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
@@ -15,11 +19,19 @@ def create_app(config=None):
     app.config['SQLALCHEMY_DATABASE_URI'] = Config.SQLALCHEMY_DATABASE_URI
     app.config['UPLOAD_FOLDER'] = Config.UPLOAD_FOLDER
     app.config['SECRET_KEY'] = Config.SECRET_KEY
+    for key in DB_POOL_SETTINGS + CACHE_SETTINGS + UPLOAD_SETTINGS + LOGGING_SETTINGS + INSTRUMENTATION_SETTINGS + SIZING_SETTINGS:
+        app.config[key] = getattr(Config, key)
     # Override with provided config if available
     if config:
         app.config.update(config)
+    configure_logging(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'])
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
     db.init_app(app)
 
+    if app.config['INSTRUMENTATION_ENABLED']:
+        from parser.instrumentation import init_instrumentation
+        init_instrumentation(app, db)
+
     login_manager = LoginManager()
     login_manager.session_protection = "strong"
     login_manager.login_view = "pages.login" # this is the endpoint for the login page
@@ -29,12 +41,33 @@ def create_app(config=None):
     csrf = CSRFProtect(app)  # Enable CSRF Protection
 
     from parser.models import User, Workload, Project
+
+    # Users are cached across requests so rebuilding current_user doesn't need a
+    # query; entries are invalidated when a User row is updated or deleted
+    user_cache = TTLCache(maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+    app.extensions['user_cache'] = user_cache
+
     @login_manager.user_loader
     def load_user(id):
-        return User.query.get(int(id))
+        user_id = int(id)
+        cached = user_cache.get(user_id)
+        if cached is None:
+            user = db.session.get(User, user_id)
+            if user is not None:
+                user_cache.set(user_id, {'id': user.id, 'username': user.username})
+            return user
+        # attach the cached snapshot to this request's session without a SELECT;
+        # attributes not in the snapshot (password, projects) load lazily
+        user = User(**cached)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
 
     bcrypt.init_app(app)
 
+    # {% cache %} blocks and compiled templates on disk (see parser/fragments.py)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.bytecode_cache = template_bytecode_cache(app.config['TEMPLATE_CACHE_FOLDER'])
+
     from parser.routes import bp
     app.register_blueprint(bp)
 
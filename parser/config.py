@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load .env but don't override existing environment variables
@@ -26,6 +27,117 @@ class Config(object):
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 10737418240))  # 10GB default
     # Increase timeout for large file processing
     SEND_FILE_MAX_AGE_DEFAULT = 0  # Disable caching for uploads
+    # Processed uploads wait here (shared by all workers) until saved or cancelled
+    STAGING_FOLDER = os.getenv('STAGING_FOLDER', os.path.join(tempfile.gettempdir(), 'parser-staging'))
+    STAGING_TTL = int(os.getenv('STAGING_TTL', 86400))  # seconds before an abandoned upload is purged
+    PREVIEW_SAMPLE_ROWS = int(os.getenv('PREVIEW_SAMPLE_ROWS', 100))  # rows rendered with the preview page
+    PREVIEW_MAX_PAGE_SIZE = int(os.getenv('PREVIEW_MAX_PAGE_SIZE', 1000))  # largest page of the preview data endpoint
+    # Imports (upload processing and saving) one worker runs at a time; gunicorn.conf.py
+    # derives it from the container limits (see parser.resources) unless set
+    IMPORT_CONCURRENCY = int(os.getenv('IMPORT_CONCURRENCY', 1))
+    IMPORT_QUEUE_TIMEOUT = int(os.getenv('IMPORT_QUEUE_TIMEOUT', 60))  # seconds an import waits for a slot
+    # Memory admission shared by all workers: reservations file (local disk), budget
+    # (0 = 80% of the container memory limit) and the per-import estimate
+    IMPORT_ADMISSION_PATH = os.getenv('IMPORT_ADMISSION_PATH', os.path.join(tempfile.gettempdir(), 'parser-imports.json'))
+    IMPORT_MEMORY_BUDGET_MB = int(os.getenv('IMPORT_MEMORY_BUDGET_MB', 0))
+    IMPORT_BYTES_PER_CELL = int(os.getenv('IMPORT_BYTES_PER_CELL', 250))  # of the sheets a format reads
+    IMPORT_FILE_MEMORY_FACTOR = float(os.getenv('IMPORT_FILE_MEMORY_FACTOR', 10))  # times file size otherwise
+    IMPORT_SAVE_MEMORY_FACTOR = float(os.getenv('IMPORT_SAVE_MEMORY_FACTOR', 4))  # times the staged frame's size
+    # Database connection pool (per gunicorn worker)
+    # Reference: https://docs.sqlalchemy.org/en/20/core/pooling.html
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # seconds before a connection is replaced
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True').lower() in ('true', '1', 'yes')
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))  # 0 disables the timeout
+    # In-process caches
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 1024))  # users kept for the login user_loader
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 300))  # seconds; 0 disables the user cache
+    # Generated reports, keyed by project content version; persisted so recycled workers start warm
+    REPORT_CACHE_FOLDER = os.getenv('REPORT_CACHE_FOLDER', os.path.join(tempfile.gettempdir(), 'parser-reports'))
+    REPORT_CACHE_MAX_ENTRIES = int(os.getenv('REPORT_CACHE_MAX_ENTRIES', 256))  # reports kept on disk
+    REPORT_CACHE_MEMORY_ENTRIES = int(os.getenv('REPORT_CACHE_MEMORY_ENTRIES', 32))  # per worker
+    REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', 86400))  # seconds; 0 disables the report cache
+    # Cache shared by all workers (SQLite file on local disk) for analytics, dashboard and exports
+    SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'parser-cache.sqlite3'))
+    SHARED_CACHE_MAX_BYTES = int(os.getenv('SHARED_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    SHARED_CACHE_TTL = int(os.getenv('SHARED_CACHE_TTL', 300))  # seconds; 0 disables the shared cache
+    # Rendered {% cache %} blocks (workload table, analytics distributions) in the shared cache
+    FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', 3600))  # seconds; 0 disables fragment caching
+    # Compiled templates, so restarted and recycled workers skip the Jinja compile; empty disables
+    TEMPLATE_CACHE_FOLDER = os.getenv('TEMPLATE_CACHE_FOLDER', os.path.join(tempfile.gettempdir(), 'parser-templates'))
+    # Logging for the parser package: level and 'json' (one object per line) or 'text'
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+    # Request profiling: /metrics endpoint and one JSON log line per request
+    INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    # Per-stage wall/CPU time of the transforms, shown on the upload preview
+    TRANSFORM_PROFILING = os.getenv('TRANSFORM_PROFILING', 'True').lower() in ('true', '1', 'yes')
+    # Also record the tracemalloc peak per stage (slows down large imports)
+    TRANSFORM_TRACE_MEMORY = os.getenv('TRANSFORM_TRACE_MEMORY', 'False').lower() in ('true', '1', 'yes')
+    # Right-sizing defaults ('peak' or 'average' utilization, headroom as a fraction); overridable per request
+    RIGHTSIZING_BASIS = os.getenv('RIGHTSIZING_BASIS', 'peak').lower()
+    RIGHTSIZING_CPU_HEADROOM = float(os.getenv('RIGHTSIZING_CPU_HEADROOM', 0.2))
+    RIGHTSIZING_MEMORY_HEADROOM = float(os.getenv('RIGHTSIZING_MEMORY_HEADROOM', 0.2))
+    RIGHTSIZING_STORAGE_HEADROOM = float(os.getenv('RIGHTSIZING_STORAGE_HEADROOM', 0.2))
+    # Default target host for host sizing on /reports; overridable per request
+    HOST_CORES = int(os.getenv('HOST_CORES', 64))
+    HOST_RAM_GB = float(os.getenv('HOST_RAM_GB', 1024))
+    HOST_STORAGE_GB = float(os.getenv('HOST_STORAGE_GB', 30720))  # usable GB per host
+    HOST_CPU_OVERCOMMIT = float(os.getenv('HOST_CPU_OVERCOMMIT', 4.0))  # vCPUs per core
+    HOST_RAM_OVERCOMMIT = float(os.getenv('HOST_RAM_OVERCOMMIT', 1.0))
+    HOST_STORAGE_OVERCOMMIT = float(os.getenv('HOST_STORAGE_OVERCOMMIT', 1.0))
+    HOST_MAX_UTILIZATION = float(os.getenv('HOST_MAX_UTILIZATION', 0.8))  # fill target per host
+    HOST_HA_SPARES = int(os.getenv('HOST_HA_SPARES', 1))  # N+x spare hosts per cluster
+
+DB_POOL_SETTINGS = ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT',
+                    'DB_POOL_RECYCLE', 'DB_POOL_PRE_PING', 'DB_STATEMENT_TIMEOUT_MS')
+
+CACHE_SETTINGS = ('USER_CACHE_SIZE', 'USER_CACHE_TTL', 'REPORT_CACHE_FOLDER', 'REPORT_CACHE_MAX_ENTRIES',
+                  'REPORT_CACHE_MEMORY_ENTRIES', 'REPORT_CACHE_TTL', 'SHARED_CACHE_PATH',
+                  'SHARED_CACHE_MAX_BYTES', 'SHARED_CACHE_TTL', 'FRAGMENT_CACHE_TTL', 'TEMPLATE_CACHE_FOLDER')
+
+UPLOAD_SETTINGS = ('STAGING_FOLDER', 'STAGING_TTL', 'PREVIEW_SAMPLE_ROWS', 'PREVIEW_MAX_PAGE_SIZE',
+                   'IMPORT_CONCURRENCY', 'IMPORT_QUEUE_TIMEOUT', 'IMPORT_ADMISSION_PATH', 'IMPORT_MEMORY_BUDGET_MB',
+                   'IMPORT_BYTES_PER_CELL', 'IMPORT_FILE_MEMORY_FACTOR', 'IMPORT_SAVE_MEMORY_FACTOR')
+
+LOGGING_SETTINGS = ('LOG_LEVEL', 'LOG_FORMAT')
+
+INSTRUMENTATION_SETTINGS = ('INSTRUMENTATION_ENABLED', 'TRANSFORM_PROFILING', 'TRANSFORM_TRACE_MEMORY')
+
+SIZING_SETTINGS = ('RIGHTSIZING_BASIS', 'RIGHTSIZING_CPU_HEADROOM', 'RIGHTSIZING_MEMORY_HEADROOM',
+                   'RIGHTSIZING_STORAGE_HEADROOM', 'HOST_CORES', 'HOST_RAM_GB', 'HOST_STORAGE_GB',
+                   'HOST_CPU_OVERCOMMIT', 'HOST_RAM_OVERCOMMIT', 'HOST_STORAGE_OVERCOMMIT',
+                   'HOST_MAX_UTILIZATION', 'HOST_HA_SPARES')
+
+
+def engine_options(settings):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from the DB_* pool settings.
+
+    Args:
+        settings (Mapping): App config (or any mapping) holding the DB_* keys
+            and SQLALCHEMY_DATABASE_URI
+
+    Returns:
+        dict: Keyword arguments for ``sqlalchemy.create_engine``
+    """
+    uri = settings.get('SQLALCHEMY_DATABASE_URI') or ''
+    options = {
+        'pool_pre_ping': settings['DB_POOL_PRE_PING'],
+        'pool_recycle': settings['DB_POOL_RECYCLE'],
+    }
+    # SQLite engines may use pools that don't accept sizing arguments
+    if not uri.startswith('sqlite'):
+        options.update({
+            'pool_size': settings['DB_POOL_SIZE'],
+            'max_overflow': settings['DB_MAX_OVERFLOW'],
+            'pool_timeout': settings['DB_POOL_TIMEOUT'],
+        })
+    if uri.startswith('postgresql') and settings['DB_STATEMENT_TIMEOUT_MS'] > 0:
+        options['connect_args'] = {'options': f"-c statement_timeout={settings['DB_STATEMENT_TIMEOUT_MS']}"}
+    return options
+
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -0,0 +1,136 @@
+"""Interned dimension tables for the OS, cluster and datacenter strings.
+
+Every workload repeats long strings such as "Microsoft Windows Server 2016 or
+later (64-bit)". Each distinct value is stored once in ``os_tb``,
+``clusters_tb`` or ``datacenters_tb`` and workloads reference it by an integer
+ID, so the analytics GROUP BYs run on narrow integer columns and
+``workloads_tb`` carries no strings for them at all.
+
+Bulk imports intern all names of a batch with one SELECT and one INSERT per
+dimension (``assign_dimension_ids``); the ``os``, ``cluster`` and
+``virtualdatacenter`` setters of ``Workload`` intern single names. Queries
+that read the names outer-join the dimension tables (``join_dimensions``).
+"""
+from sqlalchemy import desc, func, insert, select
+
+from parser.app import db
+from parser.models import Cluster, Datacenter, OperatingSystem, Project, Workload
+
+# (name attribute on Workload, ID column on Workload, dimension model)
+DIMENSIONS = (
+    ('os', 'os_id', OperatingSystem),
+    ('cluster', 'cluster_id', Cluster),
+    ('virtualdatacenter', 'datacenter_id', Datacenter),
+)
+
+# Name attribute on Workload to the column holding the name, once joined
+DIMENSION_NAMES = {column: model.name for column, _, model in DIMENSIONS}
+
+# Names per statement, to bound IN lists
+DIMENSION_BATCH_SIZE = 1000
+
+
+def _batches(items, size=DIMENSION_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _insert_ignore(model, dialect):
+    # concurrent imports may create the same name; the loser keeps the winner's row
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing(index_elements=['name'])
+
+
+def intern_names(model, names, connection=None):
+    """Get or create the dimension rows for a set of names.
+
+    Args:
+        model: ``OperatingSystem``, ``Cluster`` or ``Datacenter``
+        names (Iterable[str]): Names to look up; None and empty strings are skipped
+        connection: Connection or session to run on; defaults to ``db.session``
+
+    Returns:
+        dict: Name to dimension ID
+    """
+    connection = connection if connection is not None else db.session
+    names = sorted({name for name in names if isinstance(name, str) and name})
+    ids = {}
+    for batch in _batches(names):
+        ids.update(connection.execute(select(model.name, model.id).where(model.name.in_(batch))).all())
+        missing = [name for name in batch if name not in ids]
+        if missing:
+            bind = connection.get_bind() if hasattr(connection, 'get_bind') else connection
+            connection.execute(_insert_ignore(model, bind.dialect.name), [{'name': name} for name in missing])
+            ids.update(connection.execute(select(model.name, model.id).where(model.name.in_(missing))).all())
+    return ids
+
+
+def assign_dimension_ids(records):
+    """Replace the OS, cluster and datacenter names of workload insert/update mappings by their IDs.
+
+    ``os``, ``cluster`` and ``virtualdatacenter`` are popped and
+    ``os_id``, ``cluster_id`` and ``datacenter_id`` set in their place.
+    Records without a dimension's name are left alone for that dimension.
+
+    Args:
+        records (list[dict]): Mappings keyed by ``Workload`` column name, plus the names
+
+    Returns:
+        list[dict]: The same records
+    """
+    for column, id_column, model in DIMENSIONS:
+        if not any(column in record for record in records):
+            continue
+        ids = intern_names(model, (record.get(column) for record in records))
+        for record in records:
+            if column in record:
+                record[id_column] = ids.get(record.pop(column))
+    return records
+
+
+def join_dimensions(query):
+    """Outer-join the dimension tables of ``Workload`` so ``DIMENSION_NAMES`` can be selected and filtered.
+
+    Args:
+        query (Select): Query selecting from ``workloads_tb``
+
+    Returns:
+        Select: The query joined to ``os_tb``, ``clusters_tb`` and ``datacenters_tb``
+    """
+    for _, id_column, model in DIMENSIONS:
+        query = query.outerjoin(model, getattr(Workload, id_column) == model.id)
+    return query
+
+
+def dimension_distribution(id_column, model, user_id):
+    """Workload count per dimension value over a user's projects, largest first.
+
+    Workloads are grouped on the integer ID; names are joined to the (much
+    smaller) grouped result afterwards.
+
+    Args:
+        id_column: ``Workload.os_id``, ``Workload.cluster_id`` or ``Workload.datacenter_id``
+        model: The matching dimension model
+        user_id (int): Owner of the projects counted
+
+    Returns:
+        list[tuple]: ``(name, count)`` pairs
+    """
+    counts = (
+        select(id_column.label('dimension_id'), func.count(Workload.vmid).label('workloads'))
+        .join(Project, Workload.pid == Project.pid)
+        .where(Project.userid == user_id, id_column.isnot(None))
+        .group_by(id_column)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(model.name, counts.c.workloads)
+        .join(counts, model.id == counts.c.dimension_id)
+        .order_by(desc(counts.c.workloads), model.name)
+    ).all()
+    return [tuple(row) for row in rows]
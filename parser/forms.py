@@ -4,6 +4,7 @@ from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms.validators import InputRequired, Length, ValidationError, Optional
 
 from parser.models import User
+from parser.transform.registry import upload_extensions
 
 class RegisterForm(FlaskForm):
     username = StringField(validators=[
@@ -99,7 +100,7 @@ class CreateWorkloadForm(FlaskForm):
         Length(max=100)], render_kw={"placeholder": "Datacenter name"})
     
     ip_addresses = StringField('IP Addresses', validators=[
-        Length(max=255)], render_kw={"placeholder": "192.168.1.10, 10.0.0.5"})
+        Length(max=2000)], render_kw={"placeholder": "192.168.1.10, 10.0.0.5"})
     
     # Storage Information
     vinfo_provisioned = DecimalField('vInfo Provisioned (GB)', validators=[
@@ -146,11 +147,12 @@ class EditWorkloadForm(CreateWorkloadForm):
     submit = SubmitField('Update Workload')
 
 class UploadFileForm(FlaskForm):
-    file = FileField('Excel File (up to 10GB)', validators=[
+    # extensions of every registered inventory format (see parser.transform.registry)
+    file = FileField('Inventory File (up to 10GB)', validators=[
         FileRequired(),
-        FileAllowed(['xls', 'xlsx'], 'Excel files only! (.xls or .xlsx)')
+        FileAllowed(upload_extensions(), f"Supported inventory exports only! ({', '.join('.' + ext for ext in upload_extensions())})")
     ], render_kw={
-        "accept": ".xls,.xlsx",
+        "accept": ','.join('.' + ext for ext in upload_extensions()),
         "class": "form-control-file",
         "id": "file-upload",
         "data-max-size": "10737418240"  # 10GB in bytes for client-side validation
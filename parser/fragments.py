@@ -0,0 +1,68 @@
+"""Template fragment caching and the compiled-template cache.
+
+Expensive blocks of a page are wrapped in a ``cache`` tag, keyed by whatever
+their content depends on (usually a project's ``content_version``)::
+
+    {% cache 'project_workloads', project.pid, project.content_version %}
+      ... rendered only on a miss ...
+    {% endcache %}
+
+The rendered HTML is stored in the shared cache (see ``parser.shared_cache``),
+so every worker reuses it. Bumping the content version yields a new key and
+the old fragment ages out after ``FRAGMENT_CACHE_TTL``. The key also carries
+a digest of the block's own template code, so a deploy that changes the
+block never serves HTML rendered by the old template.
+
+A cached block must not render anything specific to the request or the
+session, such as CSRF tokens or flashed messages.
+
+``template_bytecode_cache`` stores the compiled templates on disk, so a
+restarted or recycled worker skips the Jinja compile.
+"""
+import hashlib
+import os
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from parser.shared_cache import shared_cache
+
+
+class FragmentCacheExtension(Extension):
+    """Jinja extension adding the ``{% cache name, key... %}...{% endcache %}`` tag."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        # the block's code is part of the key, so edited templates don't reuse old fragments
+        digest = hashlib.sha1(repr(body).encode()).hexdigest()[:12]
+        call = self.call_method('_render', [nodes.List(parts), nodes.Const(digest)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, digest, caller):
+        ttl = current_app.config['FRAGMENT_CACHE_TTL']
+        if ttl <= 0:
+            return caller()
+        key = 'fragment:' + ':'.join(str(part) for part in parts) + ':' + digest
+        return shared_cache().get_or_set(key, lambda: str(caller()), ttl=ttl)
+
+
+def template_bytecode_cache(folder):
+    """Bytecode cache for the Jinja environment, or None if folder is empty.
+
+    Args:
+        folder (str): Directory for the compiled templates; created if missing
+
+    Returns:
+        FileSystemBytecodeCache
+    """
+    if not folder:
+        return None
+    os.makedirs(folder, exist_ok=True)
+    return FileSystemBytecodeCache(folder)
@@ -0,0 +1,229 @@
+"""Opt-in request instrumentation.
+
+When ``INSTRUMENTATION_ENABLED`` is set, every request records its total time,
+database time and query count, template render time and any named spans
+(e.g. transform stages). Totals are exported in Prometheus text format on
+``/metrics``, together with the cache and import admission stats sampled at
+scrape time, and each request is logged as one structured record (a JSON line
+with the default ``LOG_FORMAT``).
+
+Metrics are kept per process; with several gunicorn workers each worker
+reports its own counters.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsRegistry(object):
+    """Process-local counters and summaries rendered as Prometheus text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._summaries = {}
+        self._help = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            count, total = self._summaries.get(key, (0, 0.0))
+            self._summaries[key] = (count + 1, total + value)
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels) + '}'
+
+    def render(self, gauges=None):
+        """Render all metrics in the Prometheus text exposition format.
+
+        Args:
+            gauges (dict): Extra ``{name: value}`` gauges sampled at scrape time
+
+        Returns:
+            str: Metrics text
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            summaries = sorted(self._summaries.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name}{self._labels(labels)} {value}')
+
+        for (name, labels), (count, total) in summaries:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} summary')
+            lines.append(f'{name}_count{self._labels(labels)} {count}')
+            lines.append(f'{name}_sum{self._labels(labels)} {total:.6f}')
+
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _add_gauges(gauges, prefix, stats):
+    # nested dicts (the report cache's memory tier) become prefix_key_subkey
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            _add_gauges(gauges, f'{prefix}_{key}', value)
+        elif value is not None:
+            gauges[f'{prefix}_{key}'] = value
+
+
+@contextmanager
+def span(name):
+    """Time a block of work and attribute it to the current request.
+
+    Outside a request, or when instrumentation is disabled, this is a no-op.
+
+    Args:
+        name (str): Span name, e.g. ``read_sheet``; repeated spans are summed
+    """
+    timings = g.get('_instrumentation') if has_request_context() else None
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans = timings['spans']
+        spans[name] = spans.get(name, 0.0) + time.perf_counter() - start
+
+
+def init_instrumentation(app, db):
+    """Attach request, database and template timing hooks to the app.
+
+    Args:
+        app (Flask): Application to instrument
+        db (SQLAlchemy): Extension whose engines are timed
+    """
+    registry = MetricsRegistry()
+    registry.describe('parser_http_request_duration_seconds', 'Total request time')
+    registry.describe('parser_db_query_duration_seconds', 'Time spent in database queries per request')
+    registry.describe('parser_db_queries_total', 'Database queries executed')
+    registry.describe('parser_template_render_duration_seconds', 'Time spent rendering templates per request')
+    registry.describe('parser_span_duration_seconds', 'Time spent in named spans such as transform stages')
+    app.extensions['metrics'] = registry
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info['_query_start'].pop()
+        timings = g.get('_instrumentation') if has_request_context() else None
+        if timings is not None:
+            timings['db_time'] += time.perf_counter() - start
+            timings['db_queries'] += 1
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    def on_before_render(sender, template, context, **extra):
+        timings = g.get('_instrumentation') if has_request_context() else None
+        if timings is not None:
+            timings['render_stack'].append(time.perf_counter())
+
+    def on_rendered(sender, template, context, **extra):
+        timings = g.get('_instrumentation') if has_request_context() else None
+        if timings is not None and timings['render_stack']:
+            timings['render_time'] += time.perf_counter() - timings['render_stack'].pop()
+
+    before_render_template.connect(on_before_render, app, weak=False)
+    template_rendered.connect(on_rendered, app, weak=False)
+
+    @app.before_request
+    def start_request_timer():
+        g._instrumentation = {
+            'start': time.perf_counter(),
+            'db_time': 0.0,
+            'db_queries': 0,
+            'render_time': 0.0,
+            'render_stack': [],
+            'spans': {},
+        }
+
+    @app.after_request
+    def record_request(response):
+        timings = g.pop('_instrumentation', None)
+        if timings is None:
+            return response
+        duration = time.perf_counter() - timings['start']
+        endpoint = request.endpoint or 'unknown'
+
+        registry.observe('parser_http_request_duration_seconds', duration,
+                         endpoint=endpoint, method=request.method, status=response.status_code)
+        registry.observe('parser_db_query_duration_seconds', timings['db_time'], endpoint=endpoint)
+        registry.inc('parser_db_queries_total', timings['db_queries'], endpoint=endpoint)
+        registry.observe('parser_template_render_duration_seconds', timings['render_time'], endpoint=endpoint)
+        for name, seconds in timings['spans'].items():
+            registry.observe('parser_span_duration_seconds', seconds, endpoint=endpoint, span=name)
+
+        logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'db_time_ms': round(timings['db_time'] * 1000, 3),
+            'db_queries': timings['db_queries'],
+            'render_ms': round(timings['render_time'] * 1000, 3),
+            'spans_ms': {name: round(seconds * 1000, 3) for name, seconds in timings['spans'].items()},
+        })
+        return response
+
+    def metrics():
+        from parser.admission import import_admission
+        # caches not created yet by this worker are left out
+        sources = {
+            'user_cache': app.extensions.get('user_cache'),
+            'report_cache': app.extensions.get('report_cache'),
+            'shared_cache': app.extensions.get('shared_cache'),
+            'import_admission': import_admission(app),
+        }
+        gauges = {}
+        for source, stats_owner in sources.items():
+            if stats_owner is None:
+                continue
+            # a failing source (locked or unreadable file) is reported, not raised
+            try:
+                _add_gauges(gauges, f'parser_{source}', stats_owner.stats())
+                gauges[f'parser_{source}_stats_up'] = 1
+            except Exception as e:
+                logger.warning('Stats of %s unavailable: %s', source, e, extra={'source': source, 'error': str(e)})
+                gauges[f'parser_{source}_stats_up'] = 0
+        return registry.render(gauges), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
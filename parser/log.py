@@ -0,0 +1,140 @@
+"""Structured, non-blocking logging for the ``parser`` package.
+
+Records from every ``parser.*`` logger are handed to a queue and written to
+stderr by a background thread, so request and import code never waits on
+console I/O. Formatting (including ``%`` interpolation of the message) happens
+on that thread too. Fields passed through ``extra=`` become top-level keys of
+the JSON output, e.g.::
+
+    logger.info('Transform finished for %s', file_name,
+                extra={'file_name': file_name, 'rows': len(df), 'duration_ms': 812.4})
+
+Call sites that build expensive arguments should check
+``logger.isEnabledFor(...)`` first.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+LOG_FORMATS = ('json', 'text')
+
+_handler = None
+_output = None
+_listener = None
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, pid, message and any extra fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'message': record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with extra fields appended as ``key=value``."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Writes to whatever ``sys.stderr`` is at emit time (it may be swapped, e.g. by pytest)."""
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _AsyncHandler(QueueHandler):
+    """Enqueue the record untouched; formatting is left to the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+def _start_listener():
+    global _listener
+    _handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_handler.queue, _output)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # the listener thread does not survive fork (gunicorn preloads the app in the master)
+    if _handler is not None:
+        _start_listener()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def configure_logging(level='INFO', fmt='json'):
+    """Route the ``parser`` loggers through the background stderr writer.
+
+    Safe to call more than once; later calls only change level and format.
+
+    Args:
+        level (str): Minimum level, e.g. ``INFO`` or ``DEBUG``
+        fmt (str): ``json`` for machine-parseable lines or ``text``; anything
+            else (e.g. a ``%(asctime)s`` format string from an old env file)
+            falls back to ``json`` with a warning
+    """
+    global _handler, _output
+    logger = logging.getLogger('parser')
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+    if _handler is None:
+        _output = _StderrHandler()
+        _handler = _AsyncHandler(queue.SimpleQueue())
+        _start_listener()
+        logger.addHandler(_handler)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        atexit.register(_stop_listener)
+
+    valid = fmt in LOG_FORMATS
+    _output.setFormatter(TextFormatter() if fmt == 'text' else JsonFormatter())
+    if not valid:
+        logger.warning('Unknown LOG_FORMAT %r, logging as json', fmt,
+                       extra={'log_format': fmt, 'valid_formats': list(LOG_FORMATS)})
+
+
+def flush_logging():
+    """Block until every queued record has been written."""
+    if _listener is not None:
+        _listener.stop()
+        _start_listener()
@@ -1,5 +1,8 @@
 from parser.app import db
+from flask import current_app, has_app_context
 from flask_login import UserMixin
+from sqlalchemy import event, func
+from sqlalchemy.dialects.postgresql import INET
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users_tb'
@@ -14,14 +17,50 @@ class User(db.Model, UserMixin):
         return f'<User {self.username}>'
 
 
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    """Drop a changed or deleted user from the user_loader cache."""
+    if has_app_context() and 'user_cache' in current_app.extensions:
+        current_app.extensions['user_cache'].delete(target.id)
+
+
 class Project(db.Model):
     __tablename__ = 'projects_tb'
     pid = db.Column(db.Integer, primary_key=True)
     userid = db.Column(db.Integer, db.ForeignKey('users_tb.id'), nullable=False)
     projectname = db.Column(db.String(20), nullable=False, unique=True)
+    # Bumped whenever the project's workloads change; part of every report cache key
+    content_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationship: One project can have many workloads
     workloads = db.relationship('Workload', backref='project', lazy=True, cascade='all, delete-orphan')
+    # Relationship: One project can have many imports, newest first
+    imports = db.relationship('WorkloadImport', backref='project', lazy=True, cascade='all, delete-orphan',
+                              order_by='desc(WorkloadImport.id)')
+
+    def bump_content_version(self):
+        """Mark the project's workloads as changed, invalidating its cached reports.
+
+        The increment is evaluated by the database on flush, so concurrent
+        saves never hand out the same version twice.
+        """
+        self.content_version = Project.content_version + 1
+
+    @property
+    def total_vcpus(self):
+        """Sum of the workloads' vCPUs."""
+        return sum(workload.vcpu or 0 for workload in self.workloads)
+
+    @property
+    def total_vram_gb(self):
+        """Sum of the workloads' vRAM in GB."""
+        return sum(float(workload.vram or 0) / 1024 for workload in self.workloads)
+
+    @property
+    def total_storage_gb(self):
+        """Sum of the workloads' provisioned storage in GB."""
+        return sum(workload.total_storage_gb for workload in self.workloads)
 
     def __repr__(self):
         return f'<Project {self.projectname}>'
@@ -32,15 +71,16 @@ class Workload(db.Model):
     vmid = db.Column(db.Integer, primary_key=True)
     pid = db.Column(db.Integer, db.ForeignKey('projects_tb.pid'), nullable=False)
     mobid = db.Column(db.String(50))  # Increased for longer MOB IDs
-    cluster = db.Column(db.String(100))  # Increased for longer cluster names
-    virtualdatacenter = db.Column(db.String(100))  # Increased for longer datacenter names
-    os = db.Column(db.String(120))  # Increased for full OS descriptions like "Microsoft Windows Server 2016 or later (64-bit)"
+    # OS, cluster and datacenter names are stored once in their dimension tables (see parser.dimensions)
+    os_id = db.Column(db.Integer, db.ForeignKey('os_tb.id'))
+    cluster_id = db.Column(db.Integer, db.ForeignKey('clusters_tb.id'))
+    datacenter_id = db.Column(db.Integer, db.ForeignKey('datacenters_tb.id'))
     os_name = db.Column(db.String(100))  # Increased for longer hostnames
     vmstate = db.Column(db.String(30))  # Slightly increased for VM states
     vcpu = db.Column(db.Integer)
     vmname = db.Column(db.String(100))  # Increased for longer VM names
     vram = db.Column(db.Integer)
-    ip_addresses = db.Column(db.String(255))  # Significantly increased for multiple IPv4/IPv6 addresses
+    ip_addresses = db.Column(db.Text)  # display string; individual addresses live in workload_ips_tb
     vinfo_provisioned = db.Column(db.Numeric(12,6))
     vinfo_used = db.Column(db.Numeric(12,6))
     vmdktotal = db.Column(db.Numeric(12,6))
@@ -53,10 +93,50 @@ class Workload(db.Model):
     writethroughput = db.Column(db.Numeric(12,6))
     peakreadthroughput = db.Column(db.Numeric(12,6))
     peakwritethroughput = db.Column(db.Numeric(12,6))
+    # CPU and memory utilization in percent of the allocated vCPU/vRAM (LiveOptics only)
+    avgcpupercent = db.Column(db.Numeric(12,6))
+    peakcpupercent = db.Column(db.Numeric(12,6))
+    avgmemorypercent = db.Column(db.Numeric(12,6))
+    peakmemorypercent = db.Column(db.Numeric(12,6))
+
+    # Relationship: the parsed addresses of ip_addresses (see parser.workload_ips)
+    ips = db.relationship('WorkloadIP', backref='workload', lazy=True, cascade='all, delete-orphan')
+
+    # Relationships: the dimension rows, loaded with the workload for display
+    os_ref = db.relationship('OperatingSystem', lazy='joined')
+    cluster_ref = db.relationship('Cluster', lazy='joined')
+    datacenter_ref = db.relationship('Datacenter', lazy='joined')
 
     def __repr__(self):
         return f'<Workload {self.vmname}>'
 
+    @property
+    def os(self):
+        """Guest OS description, e.g. "Microsoft Windows Server 2016 or later (64-bit)"."""
+        return self.os_ref.name if self.os_ref else None
+
+    @os.setter
+    def os(self, name):
+        self.os_ref = _dimension(OperatingSystem, name)
+
+    @property
+    def cluster(self):
+        """Cluster name."""
+        return self.cluster_ref.name if self.cluster_ref else None
+
+    @cluster.setter
+    def cluster(self, name):
+        self.cluster_ref = _dimension(Cluster, name)
+
+    @property
+    def virtualdatacenter(self):
+        """Datacenter name."""
+        return self.datacenter_ref.name if self.datacenter_ref else None
+
+    @virtualdatacenter.setter
+    def virtualdatacenter(self, name):
+        self.datacenter_ref = _dimension(Datacenter, name)
+
     @property
     def total_storage_gb(self):
         """Calculate total storage in GB."""
@@ -73,3 +153,78 @@ class Workload(db.Model):
         if self.vmdktotal and float(self.vmdktotal) > 0:
             return round((float(self.vmdkused) / float(self.vmdktotal)) * 100, 2)
         return 0.0
+
+
+class OperatingSystem(db.Model):
+    """Distinct guest OS description, referenced by ``Workload.os_id``."""
+    __tablename__ = 'os_tb'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f'<OperatingSystem {self.name}>'
+
+
+class Cluster(db.Model):
+    """Distinct cluster name, referenced by ``Workload.cluster_id``."""
+    __tablename__ = 'clusters_tb'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f'<Cluster {self.name}>'
+
+
+class Datacenter(db.Model):
+    """Distinct datacenter name, referenced by ``Workload.datacenter_id``."""
+    __tablename__ = 'datacenters_tb'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f'<Datacenter {self.name}>'
+
+
+def _dimension(model, name):
+    """Get or create the dimension row of a name; None for a missing or empty name.
+
+    Bulk imports intern whole batches with ``assign_dimension_ids`` instead.
+    """
+    if not name:
+        return None
+    from parser.dimensions import intern_names
+    return db.session.get(model, intern_names(model, [name])[name])
+
+
+class WorkloadImport(db.Model):
+    """One saved upload, with the summary computed by the transform."""
+    __tablename__ = 'imports_tb'
+    id = db.Column(db.Integer, primary_key=True)
+    pid = db.Column(db.Integer, db.ForeignKey('projects_tb.pid'), nullable=False)
+    file_name = db.Column(db.String(255))
+    file_type = db.Column(db.String(20))
+    import_mode = db.Column(db.String(10))
+    workload_count = db.Column(db.Integer)
+    summary = db.Column(db.JSON)  # see parser.transform.summary.summarize_workloads
+    imported_at = db.Column(db.DateTime, server_default=func.now())
+
+    def __repr__(self):
+        return f'<WorkloadImport {self.file_name}>'
+
+    @property
+    def powered_on_percent(self):
+        """Share of powered-on VMs in the imported file, in percent."""
+        return round((self.summary or {}).get('powered_on_ratio', 0.0) * 100, 1)
+
+
+class WorkloadIP(db.Model):
+    """One IP address of a workload, for exact and subnet lookups."""
+    __tablename__ = 'workload_ips_tb'
+    id = db.Column(db.Integer, primary_key=True)
+    vmid = db.Column(db.Integer, db.ForeignKey('workloads_tb.vmid'), nullable=False)
+    pid = db.Column(db.Integer, db.ForeignKey('projects_tb.pid'), nullable=False)
+    # inet on PostgreSQL (indexed for <<= subnet queries); normalized text elsewhere
+    address = db.Column(db.String(45).with_variant(INET(), 'postgresql'), nullable=False)
+
+    def __repr__(self):
+        return f'<WorkloadIP {self.address}>'
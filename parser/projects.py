@@ -0,0 +1,37 @@
+"""Set-based deletion of a project and everything stored under it.
+
+Deleting a ``Project`` through the ORM cascade loads every workload, IP
+address and import record into the session and deletes them one by one.
+``purge_project`` instead issues one ``DELETE ... WHERE pid = :pid`` per
+table, children first. When ``workloads_tb`` is hash-partitioned on ``pid``
+(see ``WORKLOAD_PARTITIONS`` in the init scripts) each of those deletes is
+pruned to the single partition holding the project.
+"""
+from sqlalchemy import delete
+
+from parser.app import db
+from parser.models import Project, Workload, WorkloadImport, WorkloadIP
+
+# Children before parents, to satisfy the foreign keys
+PROJECT_TABLES = (WorkloadIP, WorkloadImport, Workload)
+
+
+def purge_project(pid):
+    """Delete a project with its workloads, IP addresses and import history.
+
+    Objects of the project already loaded into the session are not updated;
+    the caller is responsible for committing the session, which expires them.
+
+    Args:
+        pid (int): Project to delete
+
+    Returns:
+        dict: Rows deleted per table name
+    """
+    deleted = {}
+    for model in PROJECT_TABLES + (Project,):
+        result = db.session.execute(
+            delete(model).where(model.pid == pid).execution_options(synchronize_session=False)
+        )
+        deleted[model.__tablename__] = result.rowcount
+    return deleted
@@ -0,0 +1,188 @@
+"""Cache of generated project reports, in memory and on disk.
+
+Entries are keyed by project, the project's ``content_version`` and the report
+parameters. Saving, creating, editing or deleting a workload bumps the
+version, so older entries simply stop being looked up; they are removed the
+next time a newer version of the same project is stored.
+
+Reports are pickled under ``REPORT_CACHE_FOLDER`` so a worker that gunicorn
+recycles after ``max_requests`` starts warm. Both tiers evict least recently
+used entries: the in-process tier after ``REPORT_CACHE_MEMORY_ENTRIES``, the
+disk tier after ``REPORT_CACHE_MAX_ENTRIES`` (file mtime records the last
+use). Entries older than ``REPORT_CACHE_TTL`` seconds are ignored; a TTL of
+0 disables the cache.
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+import uuid
+
+from flask import current_app
+
+from parser.cache import TTLCache
+
+_NAME_RE = re.compile(r'^[a-z0-9_]+$')
+_SUFFIX = '.pkl'
+
+
+class ReportCache(object):
+    """Two-tier LRU cache of report results shared by the workers of one host."""
+
+    def __init__(self, folder, maxsize=256, memory_size=32, ttl=86400):
+        """
+        Args:
+            folder (str): Directory holding the pickled reports
+            maxsize (int): Reports kept on disk
+            memory_size (int): Reports also kept in this process
+            ttl (float): Seconds a report stays valid; 0 disables caching
+        """
+        self.folder = folder
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=memory_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(project_id, version, name, params=None):
+        """File name of one report.
+
+        Args:
+            project_id (int): Project the report belongs to
+            version (int): The project's ``content_version``
+            name (str): Report name (lowercase letters, digits and underscores)
+            params (dict): JSON-serializable report parameters
+
+        Returns:
+            str: ``<project>-<version>-<name>-<parameter digest>.pkl``
+        """
+        if not _NAME_RE.match(name):
+            raise ValueError('Invalid report name')
+        digest = hashlib.sha1(json.dumps(params or {}, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return f'{int(project_id)}-{int(version)}-{name}-{digest}{_SUFFIX}'
+
+    def get(self, key):
+        """Return the cached report for key, or None if missing or expired."""
+        if self.ttl <= 0:
+            return None
+        value = self._memory.get(key)
+        if value is not None:
+            return value
+        path = os.path.join(self.folder, key)
+        try:
+            if os.path.getmtime(path) < time.time() - self.ttl:
+                raise FileNotFoundError(path)
+            with open(path, 'rb') as fh:
+                value = pickle.load(fh)
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        self._memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        """Store a report, dropping older versions of its project and the least recently used files."""
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        self._memory.set(key, value)
+        os.makedirs(self.folder, exist_ok=True)
+        partial = os.path.join(self.folder, f'{key}.{uuid.uuid4().hex}.partial')
+        with open(partial, 'wb') as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, os.path.join(self.folder, key))
+        self._evict(key)
+
+    def _evict(self, stored):
+        project, version = stored.split('-', 2)[:2]
+        entries = []
+        for entry in os.scandir(self.folder):
+            if not entry.name.endswith(_SUFFIX):
+                continue
+            entry_project, entry_version = entry.name.split('-', 2)[:2]
+            try:
+                if entry_project == project and int(entry_version) < int(version):
+                    os.remove(entry.path)
+                else:
+                    entries.append((entry.stat().st_mtime, entry.path))
+            except (FileNotFoundError, ValueError):
+                pass
+        entries.sort()
+        for _, path in entries[:max(len(entries) - self.maxsize, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def discard_project(self, project_id):
+        """Delete every stored report of a project (e.g. when the project is deleted)."""
+        prefix = f'{int(project_id)}-'
+        try:
+            entries = list(os.scandir(self.folder))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.name.endswith(_SUFFIX):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        """Return the memory tier counters plus disk hits and full misses.
+
+        Returns:
+            dict: ``memory`` (see ``TTLCache.stats``), disk_hits, misses and hit_ratio
+        """
+        memory = self._memory.stats()
+        with self._lock:
+            hits = memory['hits'] + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory': memory,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def report_cache():
+    """The application's report cache, created on first use."""
+    cache = current_app.extensions.get('report_cache')
+    if cache is None:
+        cache = current_app.extensions['report_cache'] = ReportCache(
+            current_app.config['REPORT_CACHE_FOLDER'],
+            maxsize=current_app.config['REPORT_CACHE_MAX_ENTRIES'],
+            memory_size=current_app.config['REPORT_CACHE_MEMORY_ENTRIES'],
+            ttl=current_app.config['REPORT_CACHE_TTL'],
+        )
+    return cache
+
+
+def cached_report(project, name, params, build):
+    """Return a project report from the cache, building and storing it on a miss.
+
+    Args:
+        project (Project): Project the report is about
+        name (str): Report name
+        params (dict): Parameters the report depends on
+        build (callable): Called without arguments to generate the report
+
+    Returns:
+        The cached or freshly built report
+    """
+    cache = report_cache()
+    key = cache.key(project.pid, project.content_version, name, params)
+    report = cache.get(key)
+    if report is None:
+        report = build()
+        cache.set(key, report)
+    return report
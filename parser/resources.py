@@ -0,0 +1,202 @@
+"""CPU and memory limits of the container, the worker plan derived from them,
+and the memory used by the worker processes.
+
+``os.cpu_count()`` and the physical memory size describe the host, not the
+container: a service capped at 1 CPU and 2 GB on a 16-core host would start
+33 sync workers, each able to load a multi-GB workbook into pandas. The
+limits are read from the cgroup filesystem instead (v2 first, then v1),
+falling back to the CPU affinity mask and physical memory outside a
+container.
+
+This module has no Flask dependency so ``gunicorn.conf.py`` can import it
+before the application is loaded.
+"""
+import math
+import os
+from typing import NamedTuple
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+PROC_ROOT = '/proc'
+
+# cgroup v1 reports "no limit" as a huge page-aligned number
+_UNLIMITED = 1 << 60
+
+MB = 1024 * 1024
+
+
+def _read(root, *names):
+    for name in names:
+        try:
+            with open(os.path.join(root, name)) as f:
+                return f.read().strip()
+        except OSError:
+            continue
+    return None
+
+
+def host_cpus():
+    """CPUs this process may run on (affinity mask, else all host CPUs)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def host_memory():
+    """Physical memory of the host in bytes, or None if unknown."""
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def container_cpus(root=CGROUP_ROOT):
+    """CPU limit of the container.
+
+    Args:
+        root (str): cgroup filesystem mount point
+
+    Returns:
+        float: CPU quota divided by its period (e.g. 1.5), capped at the CPUs
+            the process may run on; the latter when there is no quota
+    """
+    cpus = host_cpus()
+    quota = period = None
+    v2 = _read(root, 'cpu.max')
+    if v2:
+        quota, _, period = v2.partition(' ')
+    else:
+        quota = _read(root, 'cpu/cpu.cfs_quota_us', 'cpu,cpuacct/cpu.cfs_quota_us')
+        period = _read(root, 'cpu/cpu.cfs_period_us', 'cpu,cpuacct/cpu.cfs_period_us')
+    try:
+        quota, period = int(quota), int(period)
+    except (TypeError, ValueError):
+        return float(cpus)
+    if quota <= 0 or period <= 0:
+        return float(cpus)
+    return min(float(cpus), quota / period)
+
+
+def container_memory(root=CGROUP_ROOT):
+    """Memory limit of the container in bytes.
+
+    Args:
+        root (str): cgroup filesystem mount point
+
+    Returns:
+        int: The cgroup limit, or the host's physical memory without one
+            (None if that is unknown too)
+    """
+    limit = _read(root, 'memory.max', 'memory/memory.limit_in_bytes')
+    host = host_memory()
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return host
+    if limit >= _UNLIMITED:
+        return host
+    return min(limit, host) if host else limit
+
+
+def container_memory_usage(root=CGROUP_ROOT):
+    """Memory currently charged to the container in bytes, or None outside a cgroup."""
+    usage = _read(root, 'memory.current', 'memory/memory.usage_in_bytes')
+    try:
+        return int(usage)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProcessMemory(NamedTuple):
+    """Memory of one process, in bytes.
+
+    RSS counts every page the process maps, including pages shared
+    copy-on-write with the gunicorn master and the other workers. PSS splits
+    shared pages evenly between the processes mapping them, so the PSS of all
+    workers adds up to what they really use; private pages belong to this
+    process alone.
+
+    Attributes:
+        rss (int): Resident set size
+        pss (int): Proportional set size (None without ``smaps_rollup``)
+        private (int): Pages only this process maps (None without ``smaps_rollup``)
+    """
+    rss: int
+    pss: int
+    private: int
+
+
+def process_memory(pid='self', root=PROC_ROOT):
+    """Resident memory of a process, read from ``/proc``.
+
+    Args:
+        pid (int): Process ID, ``self`` for the calling process
+        root (str): proc filesystem mount point
+
+    Returns:
+        ProcessMemory: None if the process does not exist or ``/proc`` is unavailable
+    """
+    fields = {}
+    for name in (f'{pid}/smaps_rollup', f'{pid}/status'):
+        text = _read(root, name)
+        if text is None:
+            continue
+        for line in text.splitlines():
+            key, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[key] = int(value.split()[0]) * 1024
+        break
+    rss = fields.get('Rss', fields.get('VmRSS'))
+    if rss is None:
+        return None
+    private = None
+    if 'Private_Clean' in fields:
+        private = fields['Private_Clean'] + fields.get('Private_Dirty', 0)
+    return ProcessMemory(rss, fields.get('Pss'), private)
+
+
+class WorkerPlan(NamedTuple):
+    """Gunicorn sizing for the container.
+
+    Attributes:
+        workers (int): Worker processes to start
+        import_slots (int): Imports one worker may run at the same time
+        cpus (float): CPU limit the plan was made for
+        memory (int): Memory limit in bytes the plan was made for (None if unknown)
+    """
+    workers: int
+    import_slots: int
+    cpus: float
+    memory: int
+
+
+def plan_workers(cpus, memory, worker_memory, import_memory, threads=1, reserve=0.1):
+    """Size the worker pool to the CPU and memory limits.
+
+    The CPU bound is the usual ``2 * CPUs + 1``. The memory bound makes sure
+    every worker can hold its baseline plus one import at the same time, so
+    the container cannot be OOM-killed by uploads arriving in parallel.
+
+    Args:
+        cpus (float): CPU limit, e.g. from ``container_cpus``
+        memory (int): Memory limit in bytes, e.g. from ``container_memory``;
+            None for no memory bound
+        worker_memory (int): Resident memory of an idle worker in bytes
+        import_memory (int): Estimated peak memory of one import in bytes;
+            0 for a pool that runs no imports
+        threads (int): Threads per worker
+        reserve (float): Fraction of the memory left to the master, the page
+            cache and the database client
+
+    Returns:
+        WorkerPlan
+    """
+    workers = 2 * max(1, math.ceil(cpus)) + 1
+    if not memory:
+        return WorkerPlan(workers, threads, cpus, memory)
+    usable = memory * (1 - reserve)
+    workers = max(1, min(workers, int(usable // (worker_memory + import_memory))))
+    if not import_memory:
+        return WorkerPlan(workers, threads, cpus, memory)
+    slots = int((usable / workers - worker_memory) // import_memory)
+    return WorkerPlan(workers, max(1, min(threads, slots)), cpus, memory)
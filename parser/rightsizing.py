@@ -0,0 +1,217 @@
+"""Vectorized vCPU/vRAM/storage right-sizing of a project's workloads.
+
+The project's sizing columns are read from ``workloads_tb`` in one query and
+turned into NumPy arrays; every recommendation is then a handful of
+whole-array operations, so 100k VMs are sized in milliseconds instead of a
+Python loop over ``Workload`` objects.
+
+CPU and memory recommendations need utilization data (LiveOptics
+``VM Performance``); VMs without it keep their current allocation.
+"""
+from typing import NamedTuple
+
+from sqlalchemy import select
+
+from parser.app import db
+from parser.models import Cluster, Workload
+
+BASES = ('peak', 'average')
+
+# Guards against ceil() turning 2.0000000001 into 3
+_EPSILON = 1e-9
+
+
+class RightSizingPolicy(NamedTuple):
+    """How much capacity a recommendation keeps on top of the measured demand.
+
+    Attributes:
+        basis (str): Size from ``peak`` or ``average`` utilization
+        cpu_headroom (float): Extra CPU capacity, e.g. 0.2 for 20%
+        memory_headroom (float): Extra memory capacity
+        storage_headroom (float): Extra storage on top of the used capacity
+        min_vcpu (int): Smallest vCPU count recommended
+        min_vram_gb (float): Smallest vRAM recommended, in GB
+        vram_step_gb (float): vRAM recommendations are rounded up to multiples of this
+    """
+    basis: str = 'peak'
+    cpu_headroom: float = 0.2
+    memory_headroom: float = 0.2
+    storage_headroom: float = 0.2
+    min_vcpu: int = 1
+    min_vram_gb: float = 1.0
+    vram_step_gb: float = 1.0
+
+
+def load_sizing_arrays(project_id):
+    """Read a project's sizing columns as NumPy arrays.
+
+    Args:
+        project_id (int): Project to read
+
+    Returns:
+        dict: ``vmid`` (int64), object arrays ``vmname``, ``cluster`` and ``vmstate``
+            plus float64 arrays (NaN for missing values) ``vcpu``,
+            ``vram_gb``, ``storage_total_gb``, ``storage_used_gb``,
+            ``avg_cpu_percent``, ``peak_cpu_percent``, ``avg_memory_percent``
+            and ``peak_memory_percent``
+    """
+    import numpy as np
+    rows = db.session.execute(
+        select(Workload.vmid, Workload.vmname, Cluster.name, Workload.vmstate,
+               Workload.vcpu, Workload.vram, Workload.vmdktotal, Workload.vmdkused,
+               Workload.avgcpupercent, Workload.peakcpupercent,
+               Workload.avgmemorypercent, Workload.peakmemorypercent)
+        .outerjoin(Cluster, Workload.cluster_id == Cluster.id)
+        .where(Workload.pid == project_id)
+        .order_by(Workload.vmid)
+    ).all()
+    columns = list(zip(*rows)) if rows else [()] * 12
+
+    def floats(values):
+        # None becomes NaN; Numeric columns arrive as Decimal
+        return np.array(values, dtype=np.float64)
+
+    return {
+        'vmid': np.array(columns[0], dtype=np.int64),
+        'vmname': np.array(columns[1], dtype=object),
+        'cluster': np.array(columns[2], dtype=object),
+        'vmstate': np.array(columns[3], dtype=object),
+        'vcpu': floats(columns[4]),
+        'vram_gb': floats(columns[5]) / 1024,
+        'storage_total_gb': floats(columns[6]),
+        'storage_used_gb': floats(columns[7]),
+        'avg_cpu_percent': floats(columns[8]),
+        'peak_cpu_percent': floats(columns[9]),
+        'avg_memory_percent': floats(columns[10]),
+        'peak_memory_percent': floats(columns[11]),
+    }
+
+
+def rightsize(arrays, policy=None):
+    """Recommend vCPU, vRAM and storage per VM.
+
+    Args:
+        arrays (dict): Columns as returned by ``load_sizing_arrays``
+        policy (RightSizingPolicy): Headroom and rounding; defaults apply if None
+
+    Returns:
+        dict: ``recommended_vcpu``, ``recommended_vram_gb`` and
+            ``recommended_storage_gb`` arrays, the matching ``*_savings``
+            arrays (current minus recommended; negative means grow the VM),
+            and ``has_utilization`` (bool array)
+    """
+    import numpy as np
+    policy = policy or RightSizingPolicy()
+    if policy.basis not in BASES:
+        raise ValueError(f"basis must be one of {', '.join(BASES)}")
+    prefix = 'peak' if policy.basis == 'peak' else 'avg'
+
+    vcpu = arrays['vcpu']
+    vram_gb = arrays['vram_gb']
+    cpu_percent = arrays[f'{prefix}_cpu_percent']
+    memory_percent = arrays[f'{prefix}_memory_percent']
+
+    # NaN propagates through the demand, and np.where keeps the current size for those VMs
+    with np.errstate(invalid='ignore'):
+        cpu_demand = vcpu * cpu_percent / 100 * (1 + policy.cpu_headroom)
+        recommended_vcpu = np.where(np.isnan(cpu_demand), vcpu,
+                                    np.maximum(np.ceil(cpu_demand - _EPSILON), policy.min_vcpu))
+
+        memory_demand = vram_gb * memory_percent / 100 * (1 + policy.memory_headroom)
+        steps = np.ceil(memory_demand / policy.vram_step_gb - _EPSILON) * policy.vram_step_gb
+        recommended_vram_gb = np.where(np.isnan(memory_demand), vram_gb, np.maximum(steps, policy.min_vram_gb))
+
+        used = arrays['storage_used_gb']
+        storage_demand = np.ceil(used * (1 + policy.storage_headroom) - _EPSILON)
+        recommended_storage_gb = np.where(np.isnan(storage_demand) | (used <= 0),
+                                          arrays['storage_total_gb'], storage_demand)
+
+    return {
+        'recommended_vcpu': recommended_vcpu,
+        'recommended_vram_gb': recommended_vram_gb,
+        'recommended_storage_gb': recommended_storage_gb,
+        'vcpu_savings': vcpu - recommended_vcpu,
+        'vram_gb_savings': vram_gb - recommended_vram_gb,
+        'storage_gb_savings': arrays['storage_total_gb'] - recommended_storage_gb,
+        'has_utilization': ~(np.isnan(cpu_percent) & np.isnan(memory_percent)),
+    }
+
+
+def summarize_rightsizing(arrays, result):
+    """Project-wide totals of a right-sizing result.
+
+    Args:
+        arrays (dict): Columns as returned by ``load_sizing_arrays``
+        result (dict): Output of ``rightsize``
+
+    Returns:
+        dict: VM counts (``workloads``, ``with_utilization``, ``oversized``,
+            ``undersized``) and current/recommended/savings totals for vCPU,
+            vRAM (GB) and storage (GB)
+    """
+    import numpy as np
+    def total(values):
+        return round(float(np.nansum(values)), 2)
+
+    with np.errstate(invalid='ignore'):
+        shrink = (result['vcpu_savings'] > 0) | (result['vram_gb_savings'] > 0)
+        grow = (result['vcpu_savings'] < 0) | (result['vram_gb_savings'] < 0)
+
+    totals = {
+        'workloads': int(len(arrays['vmid'])),
+        'with_utilization': int(np.count_nonzero(result['has_utilization'])),
+        'oversized': int(np.count_nonzero(shrink)),
+        'undersized': int(np.count_nonzero(grow)),
+    }
+    for name, current, recommended in (
+        ('vcpu', arrays['vcpu'], result['recommended_vcpu']),
+        ('vram_gb', arrays['vram_gb'], result['recommended_vram_gb']),
+        ('storage_gb', arrays['storage_total_gb'], result['recommended_storage_gb']),
+    ):
+        totals[f'current_{name}'] = total(current)
+        totals[f'recommended_{name}'] = total(recommended)
+        totals[f'{name}_savings'] = round(totals[f'current_{name}'] - totals[f'recommended_{name}'], 2)
+    return totals
+
+
+def rightsize_project(project_id, policy=None):
+    """Load, size and summarize a project's workloads.
+
+    Args:
+        project_id (int): Project to size
+        policy (RightSizingPolicy): Headroom and rounding; defaults apply if None
+
+    Returns:
+        tuple: (arrays, per-VM result, totals) - see ``load_sizing_arrays``,
+            ``rightsize`` and ``summarize_rightsizing``
+    """
+    arrays = load_sizing_arrays(project_id)
+    result = rightsize(arrays, policy)
+    return arrays, result, summarize_rightsizing(arrays, result)
+
+
+def workload_table(arrays, result):
+    """Per-VM current and recommended sizes as JSON-serializable columns.
+
+    Args:
+        arrays (dict): Columns as returned by ``load_sizing_arrays``
+        result (dict): Output of ``rightsize``
+
+    Returns:
+        dict: Column name to list, with NaN as None
+    """
+    import numpy as np
+    def column(values):
+        return np.where(np.isnan(values), None, np.round(values, 2)).tolist()
+
+    return {
+        'vmid': arrays['vmid'].tolist(),
+        'vmname': arrays['vmname'].tolist(),
+        'vcpu': column(arrays['vcpu']),
+        'recommended_vcpu': column(result['recommended_vcpu']),
+        'vram_gb': column(arrays['vram_gb']),
+        'recommended_vram_gb': column(result['recommended_vram_gb']),
+        'storage_gb': column(arrays['storage_total_gb']),
+        'recommended_storage_gb': column(result['recommended_storage_gb']),
+        'has_utilization': result['has_utilization'].tolist(),
+    }
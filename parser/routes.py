@@ -1,22 +1,45 @@
-from flask import Blueprint, request, redirect, render_template, url_for, session, flash, abort, make_response
+from flask import Blueprint, request, redirect, render_template, url_for, session, flash, abort, make_response, jsonify
 from flask import current_app as app
+from werkzeug.datastructures import MultiDict
 from werkzeug.utils import secure_filename
 from flask_login import login_user, login_required, logout_user, current_user
 from parser.app import db, bcrypt
 from parser.forms import RegisterForm, LoginForm, UploadFileForm, CreateProjectForm, CreateWorkloadForm, EditProjectForm, EditWorkloadForm
-from parser.models import User, Workload, Project
-from sqlalchemy import func, desc
+from parser.models import User, Workload, Project, WorkloadImport, OperatingSystem, Cluster
+from sqlalchemy import func, desc, insert
 
 import os, sys
-import pandas as pd
 import json
 from parser.transform.data_validation import filetype_validation
-from parser.transform.transform_lova import lova_conversion
-from parser.transform.transform_rvtools import rvtools_conversion
+from parser.transform.registry import get_transform, registered_transforms
+from parser.transform.schema import to_workload_frame, to_workload_records, WorkloadSchemaError
+from parser.transform.summary import summarize_workloads
+from parser.staging import stage_frame, load_staged, load_staged_rows, staged_memory, discard_staged
+from parser.workload_sync import merge_workloads
+from parser.rightsizing import BASES, RightSizingPolicy, rightsize_project, workload_table
+from parser.host_sizing import HostProfile, STORAGE_BASES, size_hosts, size_project
+from parser.report_cache import cached_report, report_cache
+from parser.shared_cache import shared_cache, user_content_key
+from parser.search import FILTER_FIELDS, SEARCH_FIELDS, search_workloads
+from parser.workload_ips import insert_workload_ips, sync_workload_ips
+from parser.dimensions import assign_dimension_ids, dimension_distribution
+from parser.projects import purge_project
+from parser.instrumentation import span
+from parser.admission import ImportBusyError, estimate_import_memory, estimate_save_memory, import_slot
+from parser.transform.pipeline import run_profiled
 
 
 bp = Blueprint("pages", __name__)
 
+
+def clear_upload_session():
+    """Remove the staged upload from the session and the staging folder."""
+    discard_staged(session.pop('staged_upload', None))
+    session.pop('project_id', None)
+    session.pop('file_name', None)
+    session.pop('file_type', None)
+
+
 @bp.route("/")
 def home():
     context = {}
@@ -44,12 +67,22 @@ def home():
 def dashboard():
     # Get all projects for the current user
     user_projects = Project.query.filter_by(userid=current_user.id).all()
+
+    # Workload count per project in one grouped query, shared by all workers until a project changes
+    def count_workloads():
+        return dict(db.session.query(Workload.pid, func.count(Workload.vmid)).join(Project).filter(
+            Project.userid==current_user.id
+        ).group_by(Workload.pid).all())
+
+    key = user_content_key('dashboard', current_user.id, [(p.pid, p.content_version) for p in user_projects])
+    workload_counts = shared_cache().get_or_set(key, count_workloads)
     
     # Calculate total workloads across all projects
-    total_workloads = sum(len(project.workloads) for project in user_projects)
+    total_workloads = sum(workload_counts.values())
     
     return render_template("pages/dashboard.html", 
                          user_projects=user_projects, 
+                         workload_counts=workload_counts,
                          total_workloads=total_workloads)
 
 
@@ -78,17 +111,15 @@ def create_project():
 @login_required
 def view_project(project_id):
     project = Project.query.filter_by(pid=project_id, userid=current_user.id).first_or_404()
-    
-    # Calculate summary statistics
-    total_vcpus = sum(workload.vcpu or 0 for workload in project.workloads)
-    total_vram = sum(float(workload.vram or 0) / 1024 for workload in project.workloads)  # Convert MB to GB
-    total_storage = sum(workload.total_storage_gb for workload in project.workloads)
+
+    # Per-import stats were stored at save time, no need to look at the workloads again.
+    # The workload table and totals are a cached fragment of the template, so the
+    # workloads are only loaded when the project's content version changed.
+    recent_imports = WorkloadImport.query.filter_by(pid=project.pid).order_by(desc(WorkloadImport.id)).limit(5).all()
     
     return render_template("pages/view_project.html", 
                          project=project,
-                         total_vcpus=total_vcpus,
-                         total_vram=total_vram,
-                         total_storage=total_storage)
+                         recent_imports=recent_imports)
 
 
 @bp.route("/edit_project/<int:project_id>", methods=['GET', 'POST'])
@@ -120,8 +151,9 @@ def delete_project(project_id):
     project_name = project.projectname
     
     try:
-        db.session.delete(project)
+        purge_project(project.pid)
         db.session.commit()
+        report_cache().discard_project(project_id)
         flash(f'Project "{project_name}" and all its workloads have been deleted.', 'success')
     except Exception as e:
         db.session.rollback()
@@ -166,6 +198,9 @@ def create_workload(project_id):
         
         try:
             db.session.add(new_workload)
+            db.session.flush()
+            insert_workload_ips(project.pid, [new_workload.vmid], [new_workload.ip_addresses])
+            project.bump_content_version()
             db.session.commit()
             flash(f'Workload "{form.vmname.data}" added successfully!', 'success')
             return redirect(url_for('pages.view_project', project_id=project.pid))
@@ -224,6 +259,9 @@ def edit_workload(workload_id):
         workload.peakwritethroughput = form.peakwritethroughput.data
         
         try:
+            db.session.flush()
+            sync_workload_ips(workload.pid, [workload.vmid])
+            workload.project.bump_content_version()
             db.session.commit()
             flash(f'Workload "{form.vmname.data}" updated successfully!', 'success')
             return redirect(url_for('pages.view_project', project_id=workload.pid))
@@ -271,6 +309,7 @@ def delete_workload(workload_id):
     project_id = workload.pid
     
     try:
+        workload.project.bump_content_version()
         db.session.delete(workload)
         db.session.commit()
         flash(f'Workload "{workload_name}" deleted successfully!', 'success')
@@ -287,10 +326,26 @@ def delete_workload(workload_id):
 def export_project(project_id):
     project = Project.query.filter_by(pid=project_id, userid=current_user.id).first_or_404()
     
-    if not project.workloads:
+    # The CSV only changes with the project's workloads, so every worker can reuse it
+    output = shared_cache().get_or_set(f'export:{project.pid}:{project.content_version}',
+                                       lambda: project_csv(project))
+    if not output:
         flash('No workloads to export in this project.', 'warning')
         return redirect(url_for('pages.view_project', project_id=project_id))
     
+    response = make_response(output)
+    response.headers["Content-Disposition"] = f"attachment; filename={project.projectname}_workloads.csv"
+    response.headers["Content-type"] = "text/csv"
+    
+    return response
+
+
+def project_csv(project):
+    """Render a project's workloads as CSV text; empty if it has none."""
+    import pandas as pd
+    if not project.workloads:
+        return ''
+    
     # Create DataFrame from workloads
     workload_data = []
     for workload in project.workloads:
@@ -316,18 +371,15 @@ def export_project(project_id):
             'Read Throughput (MB/s)': float(workload.readthroughput or 0),
             'Write Throughput (MB/s)': float(workload.writethroughput or 0),
             'Peak Read Throughput (MB/s)': float(workload.peakreadthroughput or 0),
-            'Peak Write Throughput (MB/s)': float(workload.peakwritethroughput or 0)
+            'Peak Write Throughput (MB/s)': float(workload.peakwritethroughput or 0),
+            'Avg CPU (%)': float(workload.avgcpupercent) if workload.avgcpupercent is not None else None,
+            'Peak CPU (%)': float(workload.peakcpupercent) if workload.peakcpupercent is not None else None,
+            'Avg Memory (%)': float(workload.avgmemorypercent) if workload.avgmemorypercent is not None else None,
+            'Peak Memory (%)': float(workload.peakmemorypercent) if workload.peakmemorypercent is not None else None
         })
     
     df = pd.DataFrame(workload_data)
-    
-    # Create CSV response
-    output = df.to_csv(index=False)
-    response = make_response(output)
-    response.headers["Content-Disposition"] = f"attachment; filename={project.projectname}_workloads.csv"
-    response.headers["Content-type"] = "text/csv"
-    
-    return response
+    return df.to_csv(index=False)
 
 
 @bp.route("/login", methods=['GET', 'POST'])
@@ -368,10 +420,8 @@ def register():
 def profile():
     # Check if the user is logged in
     if 'loggedin' in session:
-        # We need all the account info for the user so we can display it on the profile page
-        user = User.query.filter_by(username=session['username']).first()
-        # Show the profile page with account info
-        return render_template('pages/profile.html', user=user)
+        # current_user already holds the account info (served from the user cache)
+        return render_template('pages/profile.html', user=current_user)
     # User is not logged in redirect to login page
     return redirect(url_for('pages.login'))
 
@@ -398,7 +448,8 @@ def upload(project_id=None):
         filename = secure_filename(f.filename)
         input_path = app.config['UPLOAD_FOLDER']
         f.save(os.path.join(input_path, filename))
-        ft = filetype_validation(input_path, filename)
+        with span('detect'):
+            ft = filetype_validation(input_path, filename)
         
         # Pass project_id to success page
         target_project_id = project_id or request.form.get('project_id')
@@ -411,12 +462,14 @@ def upload(project_id=None):
     return render_template('pages/upload.html', 
                          form=form, 
                          user_projects=user_projects,
-                         selected_project=selected_project)
+                         selected_project=selected_project,
+                         transforms=registered_transforms())
 
 
 @bp.route('/process_upload')
 @login_required
 def process_upload():
+    import pandas as pd
     input_path = request.args.get('input_path')
     file_type = request.args.get('file_type') 
     file_name = request.args.get('file_name')
@@ -433,18 +486,34 @@ def process_upload():
     
     try:
         vm_data_df = None
-        match file_type:
-            case 'live-optics':
-                vm_data_df = pd.DataFrame(lova_conversion(**describe_params))
-            case 'rv-tools':
-                vm_data_df = pd.DataFrame(rvtools_conversion(**describe_params))
-            case 'invalid':
-                try:
-                    os.remove(os.path.join(input_path, file_name))
-                except:
-                    pass
-                flash(f'Invalid file type for {file_name}. Please upload a valid LiveOptics or RVTools file.', 'error')
-                return redirect(url_for('pages.upload'))
+        stage_profile = None
+        # Formats register themselves in parser.transform.registry
+        plugin = get_transform(file_type)
+        if plugin is None:
+            try:
+                os.remove(os.path.join(input_path, file_name))
+            except:
+                pass
+            flash(f'Invalid file type for {file_name}. Please upload a supported inventory export '
+                  f'({", ".join(p.label for p in registered_transforms())}).', 'error')
+            return redirect(url_for('pages.upload'))
+
+        conversion = plugin.conversion
+        # Queues for an import slot and a memory reservation; the transform is the memory-heavy part
+        with import_slot(estimate_import_memory(input_path, file_name, plugin)):
+            if app.config['TRANSFORM_PROFILING']:
+                result, stage_profile = run_profiled(conversion, trace_memory=app.config['TRANSFORM_TRACE_MEMORY'],
+                                                     **describe_params)
+                app.logger.info('Transform stages for %s', file_name, extra={
+                    'file_name': file_name,
+                    'duration_ms': stage_profile.total_wall_ms,
+                    'stages': stage_profile.as_list(),
+                })
+            else:
+                result = conversion(**describe_params)
+            vm_data_df = pd.DataFrame(result)
+            # the constructor drops attrs; keep the summary the transform computed
+            vm_data_df.attrs['summary'] = getattr(result, 'attrs', {}).get('summary') or summarize_workloads(vm_data_df)
         
         # Clean up uploaded file
         try:
@@ -454,14 +523,16 @@ def process_upload():
             app.logger.warning(f'File deletion failed for {file_name}: {e}')
         
         if vm_data_df is not None and not vm_data_df.empty:
-            # Store processed data in session for preview
-            session['processed_data'] = vm_data_df.to_json(orient='records')
+            # Stage the processed data server-side; the session only keeps its token
+            clear_upload_session()
+            session['staged_upload'] = stage_frame(vm_data_df)
             session['project_id'] = project_id
             session['file_name'] = file_name
             session['file_type'] = file_type
             
-            # Generate HTML table for preview
-            vmdf_html = vm_data_df.to_html(
+            # Render only the first page; the table fetches the rest from preview_data
+            sample_size = app.config['PREVIEW_SAMPLE_ROWS']
+            vmdf_html = vm_data_df.head(sample_size).to_html(
                 classes=["table", "table-sm", "table-striped", "text-center", 
                          "table-responsive", "table-hover", "table-dark"],
                 table_id="workload-preview-table"
@@ -471,12 +542,38 @@ def process_upload():
                                  project=project,
                                  file_name=file_name, 
                                  file_type=file_type, 
+                                 file_label=plugin.label,
                                  tables=[vmdf_html], 
-                                 workload_count=len(vm_data_df))
+                                 workload_count=len(vm_data_df),
+                                 sample_size=min(sample_size, len(vm_data_df)),
+                                 summary=vm_data_df.attrs['summary'],
+                                 stage_profile=stage_profile)
         else:
             flash('No valid workload data found in the uploaded file.', 'error')
             return redirect(url_for('pages.upload'))
-    
+
+    except ImportBusyError as e:
+        app.logger.warning(f'Upload {file_name} rejected: {e}')
+        try:
+            os.remove(os.path.join(input_path, file_name))
+        except:
+            pass
+        if e.retry_after is None:
+            flash(f'{file_name} is too large to import on this server.', 'error')
+        else:
+            flash(f'The server is busy processing other imports. Please try again in {e.retry_after} seconds.',
+                  'warning')
+        return redirect(url_for('pages.upload'))
+
+    except WorkloadSchemaError as e:
+        app.logger.error(f'Upload {file_name} does not match the workload schema: {e}')
+        try:
+            os.remove(os.path.join(input_path, file_name))
+        except:
+            pass
+        flash(f'The uploaded file contains unexpected workload data: {e}', 'error')
+        return redirect(url_for('pages.upload'))
+
     except Exception as e:
         app.logger.error(f'Error processing upload: {e}')
         # Clean up file on error
@@ -491,75 +588,82 @@ def process_upload():
 @bp.route('/save_workloads', methods=['POST'])
 @login_required
 def save_workloads():
-    # Get processed data from session
-    processed_data_json = session.get('processed_data')
+    token = session.get('staged_upload')
+    file_name = session.get('file_name')
+    try:
+        # Loading and persisting the frame is memory-heavy too; it queues like the transform
+        with import_slot(estimate_save_memory(staged_memory(token))):
+            return save_staged_workloads(token)
+    except ImportBusyError as e:
+        app.logger.warning(f'Saving {file_name} rejected: {e}')
+        if e.retry_after is None:
+            clear_upload_session()
+            flash(f'{file_name} is too large to import on this server.', 'error')
+        else:
+            # the staged upload is kept, so the preview can be submitted again
+            flash(f'The server is busy processing other imports. Please try again in {e.retry_after} seconds.',
+                  'warning')
+        return redirect(url_for('pages.upload'))
+
+
+def save_staged_workloads(token):
+    """Load a staged upload and save it to the session's project; returns the response."""
+    vm_data_df = load_staged(token)
     project_id = session.get('project_id')
     file_name = session.get('file_name')
+    import_mode = request.form.get('import_mode', 'append')
     
-    if not all([processed_data_json, project_id]):
+    if vm_data_df is None or not project_id:
         flash('No processed data found. Please upload a file first.', 'error')
         return redirect(url_for('pages.upload'))
     
     # Validate project belongs to user
     project = Project.query.filter_by(pid=project_id, userid=current_user.id).first_or_404()
     
+    # Staged with the frame by the transform; only older staged uploads lack it
+    summary = vm_data_df.attrs.get('summary') or summarize_workloads(vm_data_df)
+    workload_import = WorkloadImport(pid=project.pid, file_name=file_name, file_type=session.get('file_type'),
+                                     import_mode='merge' if import_mode == 'merge' else 'append',
+                                     workload_count=summary['workloads'], summary=summary)
+    
     try:
-        # Convert JSON back to DataFrame
-        processed_data = json.loads(processed_data_json)
-        vm_data_df = pd.DataFrame(processed_data)
-        
-        workloads_created = 0
-        workloads_failed = 0
-        
-        # Create workload objects from DataFrame
-        for _, row in vm_data_df.iterrows():
-            try:
-                workload = Workload(
-                    pid=project.pid,
-                    vmname=row.get('vmName'),
-                    mobid=row.get('vmId'),  # MOB ID maps to vmId in processed data
-                    os=row.get('os'),
-                    os_name=row.get('os_name'),
-                    vmstate=row.get('vmState'),
-                    vcpu=int(row.get('vCpu', 0)) if pd.notna(row.get('vCpu')) else 0,
-                    vram=int(row.get('vRam', 0) * 1024) if pd.notna(row.get('vRam')) else 0,  # Convert GB to MB
-                    cluster=row.get('cluster'),
-                    virtualdatacenter=row.get('virtualDatacenter'),
-                    ip_addresses=row.get('ip_addresses'),
-                    vinfo_provisioned=row.get('vinfo_provisioned'),
-                    vinfo_used=row.get('vinfo_used'),
-                    vmdktotal=row.get('vmdkTotal'),
-                    vmdkused=row.get('vmdkUsed'),
-                    readiops=row.get('readIOPS'),
-                    writeiops=row.get('writeIOPS'),
-                    peakreadiops=row.get('peakReadIOPS'),
-                    peakwriteiops=row.get('peakWriteIOPS'),
-                    readthroughput=row.get('readThroughput'),
-                    writethroughput=row.get('writeThroughput'),
-                    peakreadthroughput=row.get('peakReadThroughput'),
-                    peakwritethroughput=row.get('peakWriteThroughput')
-                )
-                db.session.add(workload)
-                workloads_created += 1
-            except Exception as e:
-                workloads_failed += 1
-                app.logger.error(f'Error creating workload from row: {e}')
-                continue
+        if import_mode == 'merge':
+            # Refresh the project in place: only new, changed and removed VMs are written
+            merge_result = merge_workloads(project.pid, to_workload_frame(vm_data_df))
+            db.session.add(workload_import)
+            project.bump_content_version()
+            db.session.commit()
+            clear_upload_session()
+            message = (f'Merged {file_name} into project "{project.projectname}": '
+                       f'{merge_result["inserted"]} added, {merge_result["updated"]} updated, '
+                       f'{merge_result["deleted"]} removed, {merge_result["unchanged"]} unchanged.')
+            if merge_result['duplicates']:
+                message += (f' {merge_result["duplicates"]} rows repeating a VM already in the file '
+                            f'(same MOB ID and datacenter) were skipped.')
+            flash(message, 'success')
+            return redirect(url_for('pages.view_project', project_id=project.pid))
+
+        # Create all workloads with a single bulk insert
+        workload_records = to_workload_records(vm_data_df, project.pid)
+        if workload_records:
+            assign_dimension_ids(workload_records)
+            vmids = db.session.execute(insert(Workload).returning(Workload.vmid, sort_by_parameter_order=True),
+                                       workload_records).scalars().all()
+            insert_workload_ips(project.pid, vmids, [record['ip_addresses'] for record in workload_records])
+        workloads_created = len(workload_records)
+        if workloads_created:
+            db.session.add(workload_import)
+            project.bump_content_version()
         
         # Commit all workloads
         db.session.commit()
         
         # Clear session data
-        session.pop('processed_data', None)
-        session.pop('project_id', None)
-        session.pop('file_name', None)
-        session.pop('file_type', None)
+        clear_upload_session()
         
         # Provide user feedback
         if workloads_created > 0:
             flash(f'Successfully imported {workloads_created} workloads to project "{project.projectname}".', 'success')
-            if workloads_failed > 0:
-                flash(f'{workloads_failed} workloads could not be imported due to data issues.', 'warning')
         else:
             flash('No workloads could be imported. Please check your file format.', 'error')
         
@@ -572,14 +676,39 @@ def save_workloads():
         return redirect(url_for('pages.upload'))
 
 
+@bp.route('/upload_preview/data')
+@login_required
+def preview_data():
+    """Page through the staged upload as JSON for the preview table."""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', app.config['PREVIEW_SAMPLE_ROWS'], type=int)
+    per_page = min(max(per_page, 1), app.config['PREVIEW_MAX_PAGE_SIZE'])
+    start = (page - 1) * per_page
+
+    # only the chunks of this page are unpickled
+    staged = load_staged_rows(session.get('staged_upload'), start, per_page)
+    if staged is None:
+        return jsonify({'error': 'No staged upload found'}), 404
+    rows, total = staged
+
+    columns = list(rows.columns)
+    rows = rows.astype(object).where(rows.notna(), None)
+    return jsonify({
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': -(-total // per_page),
+        'columns': columns,
+        'index': rows.index.tolist(),
+        'rows': rows.values.tolist(),
+    })
+
+
 @bp.route('/cancel_upload', methods=['POST'])
 @login_required
 def cancel_upload():
     # Clear session data
-    session.pop('processed_data', None)
-    session.pop('project_id', None)
-    session.pop('file_name', None)
-    session.pop('file_type', None)
+    clear_upload_session()
     
     flash('Upload cancelled.', 'info')
     return redirect(url_for('pages.dashboard'))
@@ -588,19 +717,32 @@ def cancel_upload():
 @bp.route("/analytics")
 @login_required
 def analytics():
+    # Aggregates only change with the user's projects, so every worker can reuse them
+    projects = db.session.query(Project.pid, Project.content_version).filter_by(userid=current_user.id).all()
+    key = user_content_key('analytics', current_user.id, [tuple(row) for row in projects])
+    stats = shared_cache().get_or_set(key, analytics_stats)
+
+    # Latest imports across all projects, with the summary stored when they were saved
+    recent_imports = WorkloadImport.query.join(Project).filter(
+        Project.userid==current_user.id
+    ).order_by(desc(WorkloadImport.id)).limit(10).all()
+
+    return render_template("pages/analytics.html", recent_imports=recent_imports, stats_key=key, **stats)
+
+
+def analytics_stats():
+    """Workload distributions and resource totals over the current user's projects.
+
+    Returns:
+        dict: Template context for the analytics page (counts, ``(value, count)``
+            distributions, totals and per-VM averages)
+    """
     # Total projects and workloads (using unique vmid)
     project_count = Project.query.filter_by(userid=current_user.id).count()
     total_workloads = Workload.query.join(Project).filter(Project.userid==current_user.id).count()
 
     # Group workloads by attributes (using distinct vmid for accurate counting)
-    os_distribution = db.session.query(
-        Workload.os, 
-        func.count(func.distinct(Workload.vmid))
-    ).join(Project).filter(
-        Project.userid==current_user.id,
-        Workload.os.isnot(None),
-        Workload.os != ''
-    ).group_by(Workload.os).order_by(desc(func.count(func.distinct(Workload.vmid)))).all()
+    os_distribution = dimension_distribution(Workload.os_id, OperatingSystem, current_user.id)
     
     cpu_distribution = db.session.query(
         Workload.vcpu, 
@@ -610,14 +752,7 @@ def analytics():
         Workload.vcpu.isnot(None)
     ).group_by(Workload.vcpu).order_by(desc(func.count(func.distinct(Workload.vmid)))).all()
     
-    cluster_distribution = db.session.query(
-        Workload.cluster, 
-        func.count(func.distinct(Workload.vmid))
-    ).join(Project).filter(
-        Project.userid==current_user.id,
-        Workload.cluster.isnot(None),
-        Workload.cluster != ''
-    ).group_by(Workload.cluster).order_by(desc(func.count(func.distinct(Workload.vmid)))).all()
+    cluster_distribution = dimension_distribution(Workload.cluster_id, Cluster, current_user.id)
     
     # VM State distribution
     state_distribution = db.session.query(
@@ -648,26 +783,206 @@ def analytics():
     avg_ram_per_vm = round(total_vram_gb / total_workloads, 2) if total_workloads > 0 else 0
     avg_storage_per_vm = round(total_storage_gb / total_workloads, 2) if total_workloads > 0 else 0
 
-    return render_template("pages/analytics.html", 
-                           project_count=project_count, 
-                           total_workloads=total_workloads, 
-                           os_distribution=os_distribution,
-                           cpu_distribution=cpu_distribution,
-                           cluster_distribution=cluster_distribution,
-                           state_distribution=state_distribution,
-                           total_vcpus=total_vcpus,
-                           total_vram_gb=total_vram_gb,
-                           total_storage_gb=total_storage_gb,
-                           avg_cpu_per_vm=avg_cpu_per_vm,
-                           avg_ram_per_vm=avg_ram_per_vm,
-                           avg_storage_per_vm=avg_storage_per_vm)
+    def pairs(rows):
+        return [tuple(row) for row in rows]
+
+    return {
+        'project_count': project_count,
+        'total_workloads': total_workloads,
+        'os_distribution': pairs(os_distribution),
+        'cpu_distribution': pairs(cpu_distribution),
+        'cluster_distribution': pairs(cluster_distribution),
+        'state_distribution': pairs(state_distribution),
+        'total_vcpus': total_vcpus,
+        'total_vram_gb': total_vram_gb,
+        'total_storage_gb': total_storage_gb,
+        'avg_cpu_per_vm': avg_cpu_per_vm,
+        'avg_ram_per_vm': avg_ram_per_vm,
+        'avg_storage_per_vm': avg_storage_per_vm,
+    }
+
+
+@bp.route("/rightsizing/<int:project_id>")
+@login_required
+def rightsizing(project_id):
+    """Right-sizing recommendations for a project as JSON.
+
+    Query parameters override the RIGHTSIZING_* defaults: ``basis`` (peak or
+    average), ``cpu_headroom``, ``memory_headroom`` and ``storage_headroom``
+    (fractions, e.g. 0.2). ``details=0`` leaves out the per-VM columns.
+    """
+    project = Project.query.filter_by(pid=project_id, userid=current_user.id).first_or_404()
+
+    policy = RightSizingPolicy(
+        basis=request.args.get('basis', app.config['RIGHTSIZING_BASIS']),
+        cpu_headroom=request.args.get('cpu_headroom', app.config['RIGHTSIZING_CPU_HEADROOM'], type=float),
+        memory_headroom=request.args.get('memory_headroom', app.config['RIGHTSIZING_MEMORY_HEADROOM'], type=float),
+        storage_headroom=request.args.get('storage_headroom', app.config['RIGHTSIZING_STORAGE_HEADROOM'], type=float),
+    )
+    if policy.basis not in BASES:
+        return jsonify({'error': f"basis must be one of {', '.join(BASES)}"}), 400
+    if min(policy.cpu_headroom, policy.memory_headroom, policy.storage_headroom) < 0:
+        return jsonify({'error': 'headroom must not be negative'}), 400
+
+    with span('rightsizing'):
+        arrays, result, totals = rightsize_project(project.pid, policy)
+
+    payload = {'project_id': project.pid, 'policy': policy._asdict(), 'totals': totals}
+    if request.args.get('details', 1, type=int):
+        payload['workloads'] = workload_table(arrays, result)
+    return jsonify(payload)
+
+
+def host_sizing_request(args):
+    """Host profile and packing options from query parameters.
+
+    Parameters missing from ``args`` fall back to the HOST_* settings.
+
+    Args:
+        args (MultiDict): Request query parameters
+
+    Returns:
+        tuple: (HostProfile, dict of ``size_hosts`` keyword arguments)
+
+    Raises:
+        ValueError: For a non-positive host size or ratio, a negative spare
+            count or an unknown storage basis
+    """
+    profile = HostProfile(
+        cores=args.get('cores', app.config['HOST_CORES'], type=int),
+        ram_gb=args.get('ram_gb', app.config['HOST_RAM_GB'], type=float),
+        storage_gb=args.get('storage_gb', app.config['HOST_STORAGE_GB'], type=float),
+        cpu_overcommit=args.get('cpu_overcommit', app.config['HOST_CPU_OVERCOMMIT'], type=float),
+        ram_overcommit=args.get('ram_overcommit', app.config['HOST_RAM_OVERCOMMIT'], type=float),
+        storage_overcommit=args.get('storage_overcommit', app.config['HOST_STORAGE_OVERCOMMIT'], type=float),
+        max_utilization=args.get('max_utilization', app.config['HOST_MAX_UTILIZATION'], type=float),
+        ha_hosts=args.get('ha_hosts', app.config['HOST_HA_SPARES'], type=int),
+    )
+    if min(profile[:-1]) <= 0 or profile.max_utilization > 1:
+        raise ValueError('host sizes and ratios must be positive and max_utilization at most 1')
+    if profile.ha_hosts < 0:
+        raise ValueError('ha_hosts must not be negative')
+    options = {
+        'storage_basis': args.get('storage_basis', 'provisioned'),
+        'powered_on_only': args.get('powered_on_only', 0, type=int) == 1,
+        'per_cluster': args.get('per_cluster', 1, type=int) == 1,
+        'rightsized': args.get('rightsized', 0, type=int) == 1,
+    }
+    if options['storage_basis'] not in STORAGE_BASES:
+        raise ValueError(f"storage_basis must be one of {', '.join(STORAGE_BASES)}")
+    return profile, options
+
+
+def sizing_policy():
+    """Right-sizing policy from the RIGHTSIZING_* settings."""
+    return RightSizingPolicy(
+        basis=app.config['RIGHTSIZING_BASIS'],
+        cpu_headroom=app.config['RIGHTSIZING_CPU_HEADROOM'],
+        memory_headroom=app.config['RIGHTSIZING_MEMORY_HEADROOM'],
+        storage_headroom=app.config['RIGHTSIZING_STORAGE_HEADROOM'],
+    )
+
+
+@bp.route("/host_sizing/<int:project_id>")
+@login_required
+def host_sizing(project_id):
+    """Hosts needed per cluster to run a project on a target host, as JSON.
+
+    Query parameters override the HOST_* defaults: ``cores``, ``ram_gb``,
+    ``storage_gb``, ``cpu_overcommit``, ``ram_overcommit``,
+    ``storage_overcommit``, ``max_utilization`` and ``ha_hosts``. Packing
+    options: ``storage_basis`` (provisioned or used), ``powered_on_only=1``,
+    ``per_cluster=0`` (one pool for the whole project) and ``rightsized=1``
+    (pack the right-sizing recommendations).
+    """
+    project = Project.query.filter_by(pid=project_id, userid=current_user.id).first_or_404()
+    try:
+        profile, options = host_sizing_request(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    policy = sizing_policy()
+    with span('host_sizing'):
+        sizing = cached_report(project, 'host_sizing', {**profile._asdict(), **options, 'policy': policy._asdict()},
+                               lambda: size_project(project.pid, profile, policy=policy, **options))
+    return jsonify({'project_id': project.pid, 'options': options, **sizing})
 
 
 @bp.route("/reports")
 @login_required
 def reports():
-    # Implement any additional logic for generating reports
-    return render_template("pages/reports.html")
+    """Host sizing and right-sizing report for one of the user's projects."""
+    projects = Project.query.filter_by(userid=current_user.id).order_by(Project.projectname).all()
+    project = None
+    sizing = rightsizing_totals = None
+    try:
+        profile, options = host_sizing_request(request.args)
+    except ValueError as e:
+        flash(f'Invalid host profile: {e}', 'danger')
+        profile, options = host_sizing_request(MultiDict())
+
+    project_id = request.args.get('project_id', type=int)
+    if project_id is not None:
+        project = Project.query.filter_by(pid=project_id, userid=current_user.id).first_or_404()
+        policy = sizing_policy()
+
+        def build_report():
+            arrays, _, totals = rightsize_project(project.pid, policy)
+            return size_hosts(arrays, profile, policy=policy, **options), totals
+
+        with span('host_sizing'):
+            sizing, rightsizing_totals = cached_report(
+                project, 'sizing_report', {**profile._asdict(), **options, 'policy': policy._asdict()}, build_report)
+
+    return render_template("pages/reports.html", projects=projects, project=project, profile=profile,
+                           options=options, sizing=sizing, rightsizing_totals=rightsizing_totals)
+
+
+def search_request(args):
+    """Run ``search_workloads`` for the current user from query parameters.
+
+    ``q`` is the search text, ``fields`` a comma-separated subset of
+    ``SEARCH_FIELDS``; ``cluster``, ``datacenter``, ``os``, ``vmstate`` and
+    ``project_id`` filter exactly; ``network`` (an IP or CIDR) matches the
+    stored addresses; ``after`` and ``limit`` page the results.
+    """
+    fields = [name for name in args.get('fields', '').split(',') if name] or None
+    return search_workloads(
+        current_user.id,
+        text=args.get('q'),
+        fields=fields,
+        filters={name: args.get(name) for name in FILTER_FIELDS},
+        project_id=args.get('project_id', type=int),
+        network=args.get('network'),
+        after=args.get('after', type=int),
+        limit=args.get('limit', 50, type=int),
+    )
+
+
+@bp.route("/search/workloads")
+@login_required
+def search_api():
+    """Workloads across the user's projects matching the search, as paginated JSON."""
+    try:
+        with span('search'):
+            page = search_request(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'results': page.results, 'next_cursor': page.next_cursor})
+
+
+@bp.route("/search")
+@login_required
+def search():
+    page = None
+    if request.args.get('q') or request.args.get('network') or any(request.args.get(name) for name in FILTER_FIELDS):
+        try:
+            with span('search'):
+                page = search_request(request.args)
+        except ValueError as e:
+            flash(str(e), 'warning')
+    return render_template("pages/search.html", page=page, search_fields=SEARCH_FIELDS,
+                           filter_fields=FILTER_FIELDS)
 
 
 @bp.route("/about")
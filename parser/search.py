@@ -0,0 +1,113 @@
+"""Search and filter workloads across all of a user's projects.
+
+Free text is matched as a case-insensitive substring (``ILIKE '%text%'``) of
+the VM name, IP addresses, OS and cluster. OS and cluster names are matched
+on the dimension tables (see ``parser.dimensions``). On PostgreSQL the pg_trgm
+GIN indexes created by the init scripts serve these predicates, so a search
+stays an index lookup on millions of rows; SQLite runs the same query as a plain
+``LIKE`` scan. Search text shorter than three characters cannot use a
+trigram index and is rejected.
+
+Results are paged with a keyset cursor on ``vmid`` rather than OFFSET, so
+every page costs the same and no total count has to be computed.
+"""
+from typing import NamedTuple
+
+from sqlalchemy import or_, select
+
+from parser.app import db
+from parser.dimensions import DIMENSION_NAMES, join_dimensions
+from parser.models import Project, Workload, WorkloadIP
+from parser.workload_ips import address_filter
+
+SEARCH_FIELDS = {
+    'vmname': Workload.vmname,
+    'ip': Workload.ip_addresses,
+    'os': DIMENSION_NAMES['os'],
+    'cluster': DIMENSION_NAMES['cluster'],
+}
+FILTER_FIELDS = {
+    'cluster': DIMENSION_NAMES['cluster'],
+    'datacenter': DIMENSION_NAMES['virtualdatacenter'],
+    'os': DIMENSION_NAMES['os'],
+    'vmstate': Workload.vmstate,
+}
+MIN_QUERY_LENGTH = 3
+MAX_PAGE_SIZE = 500
+
+_RESULT_COLUMNS = (Workload.vmid, Workload.pid, Project.projectname, Workload.vmname, Workload.ip_addresses,
+                   *(name.label(column) for column, name in DIMENSION_NAMES.items()), Workload.vmstate,
+                   Workload.vcpu, Workload.vram)
+
+
+class SearchPage(NamedTuple):
+    """One page of search results.
+
+    Attributes:
+        results (list): One dict per workload (see ``search_workloads``)
+        next_cursor (int): ``after`` value for the next page, or None on the last page
+    """
+    results: list
+    next_cursor: int = None
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_workloads(user_id, text=None, fields=None, filters=None, project_id=None, network=None,
+                     after=None, limit=50):
+    """Find a user's workloads by text and exact-match filters.
+
+    Args:
+        user_id (int): Only this user's projects are searched
+        text (str): Substring to look for; None or empty to only filter
+        fields (Iterable[str]): ``SEARCH_FIELDS`` keys to match the text against; all if None
+        filters (dict): ``FILTER_FIELDS`` key to exact value
+        project_id (int): Restrict the search to one project
+        network (str): Only workloads with an address equal to this IP or
+            inside this CIDR network (see ``parser.workload_ips``)
+        after (int): Cursor from the previous page (last ``vmid`` returned)
+        limit (int): Page size, at most ``MAX_PAGE_SIZE``
+
+    Returns:
+        SearchPage: Workloads ordered by ``vmid``, with ``vmid``, ``pid``,
+            ``projectname``, ``vmname``, ``ip_addresses``, ``os``, ``cluster``,
+            ``virtualdatacenter``, ``vmstate``, ``vcpu`` and ``vram``
+
+    Raises:
+        ValueError: For unknown fields or filters, text shorter than
+            ``MIN_QUERY_LENGTH``, an invalid network, or neither text nor
+            filters given
+    """
+    text = (text or '').strip()
+    fields = list(fields or SEARCH_FIELDS)
+    filters = {key: value for key, value in (filters or {}).items() if value}
+    unknown = [name for name in fields if name not in SEARCH_FIELDS] + \
+              [name for name in filters if name not in FILTER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown search field: {', '.join(unknown)}")
+    if text and len(text) < MIN_QUERY_LENGTH:
+        raise ValueError(f'Search text must be at least {MIN_QUERY_LENGTH} characters')
+    if not text and not filters and project_id is None and not network:
+        raise ValueError('Give search text, a filter or a project')
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    query = join_dimensions(select(*_RESULT_COLUMNS).join(Project, Workload.pid == Project.pid)) \
+        .where(Project.userid == user_id)
+    if text:
+        pattern = f'%{_escape_like(text)}%'
+        query = query.where(or_(*(SEARCH_FIELDS[name].ilike(pattern, escape='\\') for name in fields)))
+    for name, value in filters.items():
+        query = query.where(FILTER_FIELDS[name] == value)
+    if project_id is not None:
+        query = query.where(Workload.pid == project_id)
+    if network:
+        query = query.where(Workload.vmid.in_(select(WorkloadIP.vmid).where(address_filter(network))))
+    if after is not None:
+        query = query.where(Workload.vmid > after)
+
+    # one extra row tells whether there is a next page
+    rows = db.session.execute(query.order_by(Workload.vmid).limit(limit + 1)).all()
+    results = [row._asdict() for row in rows[:limit]]
+    return SearchPage(results, results[-1]['vmid'] if len(rows) > limit else None)
@@ -0,0 +1,251 @@
+"""Cache shared by all gunicorn workers on a host, backed by a SQLite file.
+
+Every worker is a separate process, so the in-process caches are duplicated
+per worker and start cold whenever gunicorn recycles one. Entries stored here
+live in ``SHARED_CACHE_PATH`` (SQLite in WAL mode, so readers never wait on a
+writer) and are visible to every worker without running another service.
+
+Entries expire after their TTL. When the stored values exceed
+``SHARED_CACHE_MAX_BYTES`` the least recently read entries are evicted.
+
+Reads do not write: SQLite has a single writer lock, and taking it on every
+hit would serialize the workers' page views. Hits and misses are counted in
+the process and added to the shared counters by the next ``set``; an entry's
+read time is only refreshed once it is ``access_resolution`` seconds old, so
+LRU order is approximate at that resolution. A locked or otherwise failing
+database file is logged and treated as a miss (``get``) or skipped (``set``),
+never as an error of the page being served.
+
+Callers key entries by content (see ``user_content_key``) rather than
+deleting them on writes: a changed project yields a new key and the old
+entry ages out.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+    'size INTEGER NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS entries_accessed_idx ON entries (accessed)',
+    'CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+)
+_COUNTERS = ('hits', 'misses', 'evictions')
+
+# Seconds before a read refreshes an entry's LRU timestamp
+ACCESS_RESOLUTION = 60
+
+
+class SharedCache(object):
+    """Cross-process cache with TTL, size-based LRU eviction and shared counters."""
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, ttl=300, access_resolution=ACCESS_RESOLUTION, timeout=5):
+        """
+        Args:
+            path (str): SQLite database file; created if missing
+            max_bytes (int): Total size of the pickled values kept
+            ttl (float): Default seconds an entry stays valid; 0 disables caching
+            access_resolution (float): Seconds before a read refreshes an entry's
+                LRU timestamp (a write); 0 refreshes on every read
+            timeout (float): Seconds to wait for another process's write lock
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.access_resolution = access_resolution
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = {'hits': 0, 'misses': 0}
+        self._pending_pid = os.getpid()
+
+    def _connect(self):
+        # connections must not cross a fork, so each process (and thread) opens its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        with conn:
+            conn.executemany('INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)', [(n,) for n in _COUNTERS])
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            if self._pending_pid != os.getpid():
+                # counts inherited through a fork belong to the parent
+                self._pending, self._pending_pid = {'hits': 0, 'misses': 0}, os.getpid()
+            self._pending[name] += 1
+
+    def _pending_counts(self):
+        with self._lock:
+            if self._pending_pid != os.getpid():
+                return {'hits': 0, 'misses': 0}
+            return dict(self._pending)
+
+    def _unavailable(self, operation, key, exc):
+        logger.warning('Shared cache %s skipped: %s', operation, exc,
+                       extra={'cache_key': key, 'cache_path': self.path, 'error': str(exc)})
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing, expired or unreadable."""
+        if self.ttl <= 0:
+            return default
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT value, accessed FROM entries WHERE key = ? AND expires > ?',
+                               (key, now)).fetchone()
+        except sqlite3.OperationalError as exc:
+            self._unavailable('read', key, exc)
+            row = None
+        if row is None:
+            self._count('misses')
+            return default
+        if now - row[1] >= self.access_resolution:
+            try:
+                with conn:
+                    conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+            except sqlite3.OperationalError:
+                pass  # another worker is writing; the entry just looks older to the LRU
+        self._count('hits')
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, then evict expired and least recently read entries.
+
+        Also adds the hits and misses counted since the last ``set`` to the
+        shared counters. Does nothing if the database stays locked.
+
+        Args:
+            key (str): Cache key
+            value: Any picklable value
+            ttl (float): Seconds the entry stays valid; defaults to the cache TTL
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if self.ttl <= 0 or ttl <= 0:
+            return
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        pending = self._pending_counts()
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+                             (key, blob, len(blob), now + ttl, now))
+                evicted = conn.execute('DELETE FROM entries WHERE expires <= ?', (now,)).rowcount
+                total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+                if total > self.max_bytes:
+                    # walk from the least recently read entry until enough bytes are freed
+                    excess, victims = total - self.max_bytes, []
+                    for victim, size in conn.execute('SELECT key, size FROM entries WHERE key != ? ORDER BY accessed',
+                                                     (key,)):
+                        victims.append((victim,))
+                        excess -= size
+                        if excess <= 0:
+                            break
+                    conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+                    evicted += len(victims)
+                conn.executemany('UPDATE counters SET value = value + ? WHERE name = ?',
+                                 [(pending['hits'], 'hits'), (pending['misses'], 'misses'), (evicted, 'evictions')])
+        except sqlite3.OperationalError as exc:
+            self._unavailable('write', key, exc)
+            return
+        with self._lock:
+            if self._pending_pid == os.getpid():
+                for name, count in pending.items():
+                    self._pending[name] -= count
+
+    def get_or_set(self, key, build, ttl=None):
+        """Return the cached value for key, building and storing it on a miss.
+
+        If the database file is unavailable the value is built and not stored.
+
+        Args:
+            key (str): Cache key
+            build (callable): Called without arguments to produce the value
+            ttl (float): Seconds a built value stays valid
+
+        Returns:
+            The cached or freshly built value
+        """
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.set(key, value, ttl)
+        return value
+
+    def clear(self):
+        """Remove every entry; counters are kept."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries')
+
+    def stats(self):
+        """Return entry count, size and the counters shared by all workers.
+
+        The counters include this process's hits and misses not yet written by
+        a ``set``; other workers' are added by their next ``set``.
+
+        Returns:
+            dict: size, bytes, max_bytes, hits, misses, evictions and hit_ratio
+        """
+        conn = self._connect()
+        size, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        counters = dict(conn.execute('SELECT name, value FROM counters').fetchall())
+        for name, count in self._pending_counts().items():
+            counters[name] += count
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'size': size,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'evictions': counters['evictions'],
+            'hit_ratio': round(counters['hits'] / lookups, 4) if lookups else 0.0,
+        }
+
+
+def shared_cache():
+    """The application's shared cache, created on first use."""
+    cache = current_app.extensions.get('shared_cache')
+    if cache is None:
+        cache = current_app.extensions['shared_cache'] = SharedCache(
+            current_app.config['SHARED_CACHE_PATH'],
+            max_bytes=current_app.config['SHARED_CACHE_MAX_BYTES'],
+            ttl=current_app.config['SHARED_CACHE_TTL'],
+        )
+    return cache
+
+
+def user_content_key(name, user_id, projects):
+    """Cache key for a view over all of a user's projects.
+
+    Args:
+        name (str): View name
+        user_id (int): Owner of the projects
+        projects (Iterable): ``(pid, content_version)`` pairs of every project
+            the view covers; adding, deleting or changing one yields a new key
+
+    Returns:
+        str: ``<name>:<user_id>:<digest>``
+    """
+    digest = hashlib.sha1(repr(sorted(projects)).encode()).hexdigest()[:16]
+    return f'{name}:{int(user_id)}:{digest}'
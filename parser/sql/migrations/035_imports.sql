@@ -0,0 +1,35 @@
+-- Import history: one row per saved upload with its summary (imports_tb).
+--
+-- Upgrades databases created before the table was added to init-db.sh.
+-- Idempotent; run as the owner of the tables (see docs/WARP.md).
+
+BEGIN;
+
+CREATE SEQUENCE IF NOT EXISTS imports_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE IF NOT EXISTS "public"."imports_tb" (
+    "id" integer DEFAULT nextval('imports_tb_id_seq') NOT NULL,
+    "pid" integer NOT NULL,
+    "file_name" character varying(255),
+    "file_type" character varying(20),
+    "import_mode" character varying(10),
+    "workload_count" integer,
+    "summary" json,
+    "imported_at" timestamp DEFAULT now(),
+    CONSTRAINT "imports_tb_pkey" PRIMARY KEY ("id")
+) WITH (oids = false);
+
+CREATE INDEX IF NOT EXISTS "imports_tb_pid_idx" ON "public"."imports_tb" USING btree ("pid");
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'imports_tb_pid_fkey') THEN
+        ALTER TABLE ONLY "public"."imports_tb" ADD CONSTRAINT "imports_tb_pid_fkey" FOREIGN KEY (pid) REFERENCES projects_tb(pid) NOT DEFERRABLE;
+    END IF;
+END
+$$;
+
+GRANT ALL ON "public"."imports_tb" TO inventorydbuser;
+GRANT USAGE, SELECT ON SEQUENCE imports_tb_id_seq TO inventorydbuser;
+
+COMMIT;
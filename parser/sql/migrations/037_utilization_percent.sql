@@ -0,0 +1,15 @@
+-- Average and peak CPU/memory utilization per workload, used by right-sizing.
+--
+-- Upgrades databases created before the columns were added to init-db.sh.
+-- Existing workloads keep NULL (no utilization data) until re-imported.
+-- Idempotent; run as the owner of the tables (see docs/WARP.md).
+
+BEGIN;
+
+ALTER TABLE "public"."workloads_tb"
+    ADD COLUMN IF NOT EXISTS "avgcpupercent" numeric(12,6),
+    ADD COLUMN IF NOT EXISTS "peakcpupercent" numeric(12,6),
+    ADD COLUMN IF NOT EXISTS "avgmemorypercent" numeric(12,6),
+    ADD COLUMN IF NOT EXISTS "peakmemorypercent" numeric(12,6);
+
+COMMIT;
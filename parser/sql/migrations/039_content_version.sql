@@ -0,0 +1,11 @@
+-- Per-project content version, bumped on every workload change; keys the
+-- report and page fragment caches.
+--
+-- Upgrades databases created before the column was added to init-db.sh.
+-- Idempotent; run as the owner of the tables (see docs/WARP.md).
+
+BEGIN;
+
+ALTER TABLE "public"."projects_tb" ADD COLUMN IF NOT EXISTS "content_version" integer DEFAULT 0 NOT NULL;
+
+COMMIT;
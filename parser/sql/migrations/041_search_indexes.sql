@@ -0,0 +1,15 @@
+-- Cross-project search: trigram indexes serving substring (ILIKE '%...%') matches.
+--
+-- Upgrades databases created before the indexes were added to init-db.sh.
+-- Search works without them, but scans every workload. Idempotent; run as
+-- the owner of the tables (see docs/WARP.md). OS and cluster names are
+-- matched on the dimension tables, indexed by 043_drop_dimension_strings.sql.
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS "workloads_tb_pid_idx" ON "public"."workloads_tb" USING btree ("pid");
+CREATE INDEX IF NOT EXISTS "workloads_tb_vmname_trgm_idx" ON "public"."workloads_tb" USING gin ("vmname" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "workloads_tb_ip_addresses_trgm_idx" ON "public"."workloads_tb" USING gin ("ip_addresses" gin_trgm_ops);
+
+COMMIT;
@@ -0,0 +1,68 @@
+-- Normalized per-address storage of workloads_tb.ip_addresses (workload_ips_tb),
+-- and ip_addresses widened to text.
+--
+-- Upgrades databases created before the table was added to init-db.sh, and
+-- fills it from the ip_addresses of the workloads saved until then: IP search
+-- only looks at workload_ips_tb. Tokens are split and validated like
+-- parser.workload_ips.parse_ip_addresses does. Workloads that already have
+-- rows are left alone, so the script is idempotent; run it as the owner of
+-- the tables (see docs/WARP.md).
+
+BEGIN;
+
+ALTER TABLE "public"."workloads_tb" ALTER COLUMN "ip_addresses" TYPE text;
+
+CREATE SEQUENCE IF NOT EXISTS workload_ips_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE IF NOT EXISTS "public"."workload_ips_tb" (
+    "id" integer DEFAULT nextval('workload_ips_tb_id_seq') NOT NULL,
+    "vmid" integer NOT NULL,
+    "pid" integer NOT NULL,
+    "address" inet NOT NULL,
+    CONSTRAINT "workload_ips_tb_pkey" PRIMARY KEY ("id")
+) WITH (oids = false);
+
+CREATE INDEX IF NOT EXISTS "workload_ips_tb_vmid_idx" ON "public"."workload_ips_tb" USING btree ("vmid");
+CREATE INDEX IF NOT EXISTS "workload_ips_tb_pid_idx" ON "public"."workload_ips_tb" USING btree ("pid");
+-- exact lookups use the btree, subnet (<<=) lookups the GiST index
+CREATE INDEX IF NOT EXISTS "workload_ips_tb_address_idx" ON "public"."workload_ips_tb" USING btree ("address");
+CREATE INDEX IF NOT EXISTS "workload_ips_tb_address_gist_idx" ON "public"."workload_ips_tb" USING gist ("address" inet_ops);
+
+-- Address of one token, or NULL for placeholders ("no ip"), networks and invalid entries
+CREATE FUNCTION pg_temp.workload_ip(token text) RETURNS inet LANGUAGE plpgsql IMMUTABLE AS $$
+DECLARE
+    host text := split_part(token, '%', 1);  -- IPv6 zone suffix, e.g. %eth0
+BEGIN
+    IF host = '' OR position('/' IN host) > 0 THEN
+        RETURN NULL;
+    END IF;
+    RETURN host::inet;
+EXCEPTION WHEN invalid_text_representation THEN
+    RETURN NULL;
+END
+$$;
+
+INSERT INTO "public"."workload_ips_tb" ("vmid", "pid", "address")
+SELECT DISTINCT w.vmid, w.pid, ip.address
+FROM "public"."workloads_tb" w
+CROSS JOIN LATERAL regexp_split_to_table(w.ip_addresses, '[\s,;]+') AS token(value)
+CROSS JOIN LATERAL (SELECT pg_temp.workload_ip(token.value) AS address) ip
+WHERE ip.address IS NOT NULL
+  AND w.pid IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM "public"."workload_ips_tb" i WHERE i.vmid = w.vmid);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'workload_ips_tb_vmid_fkey') THEN
+        ALTER TABLE ONLY "public"."workload_ips_tb" ADD CONSTRAINT "workload_ips_tb_vmid_fkey" FOREIGN KEY (vmid) REFERENCES workloads_tb(vmid) ON DELETE CASCADE NOT DEFERRABLE;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'workload_ips_tb_pid_fkey') THEN
+        ALTER TABLE ONLY "public"."workload_ips_tb" ADD CONSTRAINT "workload_ips_tb_pid_fkey" FOREIGN KEY (pid) REFERENCES projects_tb(pid) NOT DEFERRABLE;
+    END IF;
+END
+$$;
+
+GRANT ALL ON "public"."workload_ips_tb" TO inventorydbuser;
+GRANT USAGE, SELECT ON SEQUENCE workload_ips_tb_id_seq TO inventorydbuser;
+
+COMMIT;
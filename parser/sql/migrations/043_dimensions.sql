@@ -0,0 +1,65 @@
+-- Interned OS, cluster and datacenter names (os_tb, clusters_tb,
+-- datacenters_tb) referenced from workloads_tb by integer ID.
+--
+-- Upgrades databases created before the tables were added to init-db.sh:
+-- creates the tables, ID columns and foreign keys. The names of the workloads
+-- saved until then are interned by 043_drop_dimension_strings.sql, which runs
+-- next and drops the string columns. Idempotent; run as the owner of the
+-- tables (see docs/WARP.md).
+
+BEGIN;
+
+CREATE SEQUENCE IF NOT EXISTS os_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE IF NOT EXISTS "public"."os_tb" (
+    "id" integer DEFAULT nextval('os_tb_id_seq') NOT NULL,
+    "name" character varying(120) NOT NULL,
+    CONSTRAINT "os_tb_pkey" PRIMARY KEY ("id"),
+    CONSTRAINT "os_tb_name_key" UNIQUE ("name")
+) WITH (oids = false);
+
+CREATE SEQUENCE IF NOT EXISTS clusters_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE IF NOT EXISTS "public"."clusters_tb" (
+    "id" integer DEFAULT nextval('clusters_tb_id_seq') NOT NULL,
+    "name" character varying(100) NOT NULL,
+    CONSTRAINT "clusters_tb_pkey" PRIMARY KEY ("id"),
+    CONSTRAINT "clusters_tb_name_key" UNIQUE ("name")
+) WITH (oids = false);
+
+CREATE SEQUENCE IF NOT EXISTS datacenters_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE IF NOT EXISTS "public"."datacenters_tb" (
+    "id" integer DEFAULT nextval('datacenters_tb_id_seq') NOT NULL,
+    "name" character varying(100) NOT NULL,
+    CONSTRAINT "datacenters_tb_pkey" PRIMARY KEY ("id"),
+    CONSTRAINT "datacenters_tb_name_key" UNIQUE ("name")
+) WITH (oids = false);
+
+ALTER TABLE "public"."workloads_tb"
+    ADD COLUMN IF NOT EXISTS "os_id" integer,
+    ADD COLUMN IF NOT EXISTS "cluster_id" integer,
+    ADD COLUMN IF NOT EXISTS "datacenter_id" integer;
+
+CREATE INDEX IF NOT EXISTS "workloads_tb_os_id_idx" ON "public"."workloads_tb" USING btree ("os_id");
+CREATE INDEX IF NOT EXISTS "workloads_tb_cluster_id_idx" ON "public"."workloads_tb" USING btree ("cluster_id");
+CREATE INDEX IF NOT EXISTS "workloads_tb_datacenter_id_idx" ON "public"."workloads_tb" USING btree ("datacenter_id");
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'workloads_tb_os_id_fkey') THEN
+        ALTER TABLE "public"."workloads_tb" ADD CONSTRAINT "workloads_tb_os_id_fkey" FOREIGN KEY (os_id) REFERENCES os_tb(id) NOT DEFERRABLE;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'workloads_tb_cluster_id_fkey') THEN
+        ALTER TABLE "public"."workloads_tb" ADD CONSTRAINT "workloads_tb_cluster_id_fkey" FOREIGN KEY (cluster_id) REFERENCES clusters_tb(id) NOT DEFERRABLE;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'workloads_tb_datacenter_id_fkey') THEN
+        ALTER TABLE "public"."workloads_tb" ADD CONSTRAINT "workloads_tb_datacenter_id_fkey" FOREIGN KEY (datacenter_id) REFERENCES datacenters_tb(id) NOT DEFERRABLE;
+    END IF;
+END
+$$;
+
+GRANT ALL ON "public"."os_tb", "public"."clusters_tb", "public"."datacenters_tb" TO inventorydbuser;
+GRANT USAGE, SELECT ON SEQUENCE os_tb_id_seq, clusters_tb_id_seq, datacenters_tb_id_seq TO inventorydbuser;
+
+COMMIT;
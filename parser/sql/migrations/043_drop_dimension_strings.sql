@@ -0,0 +1,47 @@
+-- Workloads reference their OS, cluster and datacenter only by ID: the os,
+-- cluster and virtualdatacenter strings are dropped from workloads_tb and the
+-- names are read from os_tb, clusters_tb and datacenters_tb.
+--
+-- Runs after 043_dimensions.sql. Interns the names of the workloads still
+-- carrying strings (saved before the dimension tables existed, or by an older
+-- app version since), fills their ID columns, and only then drops the
+-- columns. The OS and cluster trigram search indexes move to the dimension
+-- names. Idempotent; run as the owner of the tables (see docs/WARP.md).
+
+BEGIN;
+
+DO $$
+DECLARE
+    dimension record;
+BEGIN
+    FOR dimension IN
+        SELECT * FROM (VALUES ('os', 'os_id', 'os_tb'),
+                              ('cluster', 'cluster_id', 'clusters_tb'),
+                              ('virtualdatacenter', 'datacenter_id', 'datacenters_tb')) AS d (name_column, id_column, dimension_table)
+    LOOP
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = 'public' AND table_name = 'workloads_tb'
+                     AND column_name = dimension.name_column) THEN
+            -- one dimension row per distinct non-empty name, then the IDs of the workloads still missing them
+            EXECUTE format('INSERT INTO "public".%I ("name") SELECT DISTINCT %I FROM "public"."workloads_tb" '
+                           'WHERE %I <> '''' ON CONFLICT ("name") DO NOTHING',
+                           dimension.dimension_table, dimension.name_column, dimension.name_column);
+            EXECUTE format('UPDATE "public"."workloads_tb" w SET %I = d.id FROM "public".%I d '
+                           'WHERE d.name = w.%I AND w.%I IS NULL',
+                           dimension.id_column, dimension.dimension_table, dimension.name_column, dimension.id_column);
+        END IF;
+    END LOOP;
+END
+$$;
+
+-- drops the trigram indexes on the columns with them
+ALTER TABLE "public"."workloads_tb"
+    DROP COLUMN IF EXISTS "os",
+    DROP COLUMN IF EXISTS "cluster",
+    DROP COLUMN IF EXISTS "virtualdatacenter";
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS "os_tb_name_trgm_idx" ON "public"."os_tb" USING gin ("name" gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "clusters_tb_name_trgm_idx" ON "public"."clusters_tb" USING gin ("name" gin_trgm_ops);
+
+COMMIT;
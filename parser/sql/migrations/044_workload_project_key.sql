@@ -0,0 +1,42 @@
+-- Every workload belongs to a project: pid NOT NULL and a (vmid, pid) unique
+-- key, which the PostgreSQL upserts (ON CONFLICT (vmid, pid)) and the
+-- workload_ips_tb foreign key rely on.
+--
+-- Upgrades plain (unpartitioned) databases created before the change to
+-- init-db.sh. Partitioning by pid (WORKLOAD_PARTITIONS) cannot be applied in
+-- place; it needs a fresh database and a dump/restore of the data.
+-- Idempotent; run as the owner of the tables (see docs/WARP.md).
+
+BEGIN;
+
+DO $$
+DECLARE
+    orphans bigint;
+BEGIN
+    SELECT count(*) INTO orphans FROM "public"."workloads_tb" WHERE "pid" IS NULL;
+    IF orphans > 0 THEN
+        RAISE EXCEPTION '% workloads have no project (pid IS NULL)', orphans
+            USING HINT = 'Assign them to a project or delete them, then run this script again.';
+    END IF;
+END
+$$;
+
+ALTER TABLE "public"."workloads_tb" ALTER COLUMN "pid" SET NOT NULL;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'workloads_tb_vmid_pid_key') THEN
+        ALTER TABLE "public"."workloads_tb" ADD CONSTRAINT "workloads_tb_vmid_pid_key" UNIQUE ("vmid", "pid");
+    END IF;
+    -- 042 created the foreign key on vmid alone
+    IF EXISTS (SELECT 1 FROM pg_constraint
+               WHERE conname = 'workload_ips_tb_vmid_fkey' AND array_length(conkey, 1) = 1) THEN
+        ALTER TABLE "public"."workload_ips_tb" DROP CONSTRAINT "workload_ips_tb_vmid_fkey";
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'workload_ips_tb_vmid_fkey') THEN
+        ALTER TABLE ONLY "public"."workload_ips_tb" ADD CONSTRAINT "workload_ips_tb_vmid_fkey" FOREIGN KEY (vmid, pid) REFERENCES workloads_tb(vmid, pid) ON DELETE CASCADE NOT DEFERRABLE;
+    END IF;
+END
+$$;
+
+COMMIT;
@@ -0,0 +1,209 @@
+"""Server-side staging of processed uploads between preview and save.
+
+The transform result is pickled under ``STAGING_FOLDER`` and only an opaque
+token is kept in the (cookie) session, so previews of large inventories don't
+travel back and forth with every request. Pickles keep the canonical workload
+dtypes, so nothing has to be re-parsed on save. Staged files older than
+``STAGING_TTL`` seconds are purged whenever a new upload is staged.
+
+A staged file is a sequence of pickled chunks of ``STAGE_CHUNK_ROWS`` rows,
+followed by an index (row count, chunk offsets, frame attrs and the frame's
+in-memory size) and the index's offset. ``load_staged_rows`` unpickles only
+the chunks of one preview page, and ``staged_memory`` reads only the index,
+so no request holds a whole inventory it does not need. Nothing is cached in
+the worker: the memory of a save is reserved for as long as it runs (see
+``parser.admission``) and freed when it ends.
+"""
+import logging
+import os
+import pickle
+import re
+import struct
+import time
+import uuid
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'^[0-9a-f]{32}$')
+_SUFFIX = '.pkl'
+# Rows per pickled chunk; a preview page unpickles only the chunks it covers
+STAGE_CHUNK_ROWS = 1000
+# Trailer holding the byte offset of the index
+_FOOTER = struct.Struct('<Q')
+
+
+def _folder():
+    return current_app.config['STAGING_FOLDER']
+
+
+def _path(token):
+    if not token or not _TOKEN_RE.match(token):
+        raise ValueError('Invalid staging token')
+    return os.path.join(_folder(), token + _SUFFIX)
+
+
+def _read_index(fh):
+    try:
+        fh.seek(-_FOOTER.size, os.SEEK_END)
+        fh.seek(_FOOTER.unpack(fh.read(_FOOTER.size))[0])
+        index = pickle.load(fh)
+    except Exception as e:  # truncated, or staged by an older version as one pickle
+        logger.warning('Unreadable staged upload %s: %s', os.path.basename(fh.name), e,
+                       extra={'path': fh.name})
+        return None
+    return index if isinstance(index, dict) and 'offsets' in index else None
+
+
+def _read_chunks(fh, index, first, last):
+    frames = []
+    for offset in index['offsets'][first:last + 1]:
+        fh.seek(offset)
+        frames.append(pickle.load(fh))
+    return frames
+
+
+def _open(token):
+    try:
+        return open(_path(token), 'rb')
+    except (ValueError, FileNotFoundError):
+        return None
+
+
+def purge_expired(ttl=None):
+    """Delete staged uploads older than ttl seconds.
+
+    Args:
+        ttl (int): Maximum age; defaults to ``STAGING_TTL``
+
+    Returns:
+        int: Number of files removed
+    """
+    ttl = current_app.config['STAGING_TTL'] if ttl is None else ttl
+    cutoff = time.time() - ttl
+    removed = 0
+    try:
+        entries = list(os.scandir(_folder()))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if entry.name.endswith(_SUFFIX) and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def stage_frame(frame, chunk_rows=STAGE_CHUNK_ROWS):
+    """Persist a processed upload and return its token.
+
+    Args:
+        frame (DataFrame): Conformed workload frame
+        chunk_rows (int): Rows per pickled chunk
+
+    Returns:
+        str: Token to keep in the session
+    """
+    os.makedirs(_folder(), exist_ok=True)
+    purge_expired()
+    token = uuid.uuid4().hex
+    path = _path(token)
+    partial = path + '.partial'
+    offsets = []
+    with open(partial, 'wb') as fh:
+        # an empty frame still gets one chunk, which carries its columns and dtypes
+        for start in range(0, max(len(frame), 1), chunk_rows):
+            offsets.append(fh.tell())
+            chunk = frame.iloc[start:start + chunk_rows]
+            chunk.attrs = {}
+            pickle.dump(chunk, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        index_offset = fh.tell()
+        pickle.dump({
+            'rows': len(frame),
+            'chunk_rows': chunk_rows,
+            'offsets': offsets,
+            'attrs': frame.attrs,
+            'memory_bytes': int(frame.memory_usage(deep=True).sum()),
+        }, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        fh.write(_FOOTER.pack(index_offset))
+    os.replace(partial, path)
+    return token
+
+
+def load_staged(token):
+    """Return the staged frame for token, or None if it is missing or expired.
+
+    Args:
+        token (str): Token returned by ``stage_frame``
+
+    Returns:
+        DataFrame: The staged workloads, or None
+    """
+    import pandas as pd
+    fh = _open(token)
+    if fh is None:
+        return None
+    with fh:
+        index = _read_index(fh)
+        if index is None:
+            return None
+        frame = pd.concat(_read_chunks(fh, index, 0, len(index['offsets']) - 1))
+    frame.attrs = index['attrs']
+    return frame
+
+
+def load_staged_rows(token, start, count):
+    """Return rows ``start`` to ``start + count`` of a staged upload.
+
+    Only the chunks covering those rows are read.
+
+    Args:
+        token (str): Token returned by ``stage_frame``
+        start (int): First row (0-based)
+        count (int): Rows wanted
+
+    Returns:
+        tuple: ``(rows, total)``, the rows as a DataFrame (empty past the end,
+            with the staged columns) and the staged row count; None if the
+            upload is missing or expired
+    """
+    import pandas as pd
+    fh = _open(token)
+    if fh is None:
+        return None
+    with fh:
+        index = _read_index(fh)
+        if index is None:
+            return None
+        size = index['chunk_rows']
+        last_chunk = len(index['offsets']) - 1
+        first = min(start // size, last_chunk)
+        last = min((start + count - 1) // size, last_chunk)
+        chunks = pd.concat(_read_chunks(fh, index, first, last))
+    offset = start - first * size
+    return chunks.iloc[offset:offset + count], index['rows']
+
+
+def staged_memory(token):
+    """In-memory size of a staged frame in bytes (from its index), or None if it is missing or unreadable."""
+    fh = _open(token)
+    if fh is None:
+        return None
+    with fh:
+        index = _read_index(fh)
+    return None if index is None else index['memory_bytes']
+
+
+def discard_staged(token):
+    """Delete a staged upload; unknown tokens are ignored."""
+    try:
+        path = _path(token)
+    except ValueError:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -1,60 +1,63 @@
-import pandas as pd
+import logging
 import os
+import time
 from pathlib import Path
+from parser.transform.registry import EXCEL_EXTENSIONS, detect_transform
+
+logger = logging.getLogger(__name__)
+
+# Sheet lists, in workbook order, of complete LiveOptics and RVTools exports
+LIVE_OPTICS_SHEETS = ['Details', 'ESX Hosts', 'ESX Performance', 'Host Devices', 'VMs', 
+                      'VM Performance', 'VM Disks', 'ESX Licenses', 'Host Disks', 'Host Network Adapters']
+RVTOOLS_SHEETS = ['vInfo', 'vCPU', 'vMemory', 'vDisk', 'vPartition', 'vNetwork', 'vCD', 
+                  'vUSB', 'vSnapshot', 'vTools', 'vSource', 'vRP', 'vCluster', 'vHost', 
+                  'vHBA', 'vNIC', 'vSwitch', 'vPort', 'dvSwitch', 'dvPort', 'vSC_VMK', 
+                  'vDatastore', 'vMultiPath', 'vLicense', 'vFileInfo', 'vHealth', 'vMetaData']
 
 def filetype_validation(input_path, fn):
-    """Validate file type for Excel workbooks, optimized for large files.
+    """Detect which registered inventory format a file is, optimized for large files.
     
     Args:
         input_path (str): Path to the directory containing the file
         fn (str): Filename
         
     Returns:
-        str: File type ('live-optics', 'rv-tools', or 'invalid')
+        str: File type of the matching format (e.g. 'live-optics', 'rv-tools')
+            or 'invalid'
     """
-    print(f"Determining file type for {fn}")
+    started = time.perf_counter()
+    logger.debug('Determining file type for %s', fn, extra={'file_name': fn})
     
     # Check file size for logging
     file_path = Path(input_path) / fn
+    size_mb = None
     if file_path.exists():
-        file_size = file_path.stat().st_size
-        print(f"File size: {file_size / 1024 / 1024:.2f} MB")
-    
-    lo_sheets = ['Details', 'ESX Hosts', 'ESX Performance', 'Host Devices', 'VMs', 
-                'VM Performance', 'VM Disks', 'ESX Licenses', 'Host Disks', 'Host Network Adapters']
-    rv_sheets = ['vInfo', 'vCPU', 'vMemory', 'vDisk', 'vPartition', 'vNetwork', 'vCD', 
-                'vUSB', 'vSnapshot', 'vTools', 'vSource', 'vRP', 'vCluster', 'vHost', 
-                'vHBA', 'vNIC', 'vSwitch', 'vPort', 'dvSwitch', 'dvPort', 'vSC_VMK', 
-                'vDatastore', 'vMultiPath', 'vLicense', 'vFileInfo', 'vHealth', 'vMetaData']
-    
-    file_type = ""
+        size_mb = round(file_path.stat().st_size / 1024 / 1024, 2)
     
     try:
-        # Use context manager for better memory management with large files
-        with pd.ExcelFile(os.path.join(input_path, fn)) as vmfile:
-            vmsheets = vmfile.sheet_names
-            print(f"Found {len(vmsheets)} sheets in {fn}")
-            
-            if vmsheets == lo_sheets:
-                print(f'{fn} is a match for LiveOptics')
-                file_type = "live-optics"
-            elif vmsheets == rv_sheets:
-                print(f'{fn} is a match for RVTools')
-                file_type = "rv-tools"
-            else:
-                print(f'{fn} is neither a LiveOptics file, nor an RVTools file, or is not correctly formed/complete.')
-                print(f"Expected LiveOptics sheets: {len(lo_sheets)}, RVTools sheets: {len(rv_sheets)}")
-                print(f"Found sheets: {vmsheets[:5]}..." if len(vmsheets) > 5 else f"Found sheets: {vmsheets}")
-                file_type = "invalid"
-                
+        plugin, probe = detect_transform(input_path, fn)
     except FileNotFoundError:
         # Re-raise FileNotFoundError to be explicit about missing files
-        print(f"File not found: {os.path.join(input_path, fn)}")
+        logger.error('File not found: %s', os.path.join(input_path, fn), extra={'file_name': fn})
         raise
-    except Exception as e:
-        print(f"Error reading Excel file {fn}: {e}")
+
+    vmsheets = probe.sheet_names if probe.extension in EXCEL_EXTENSIONS else []
+    if plugin is not None:
+        file_type = plugin.file_type
+    else:
+        logger.warning('%s does not match any supported inventory format, or is not correctly formed/complete',
+                       fn, extra={'file_name': fn, 'sheets': vmsheets[:5],
+                                  'expected_sheets': {'live-optics': len(LIVE_OPTICS_SHEETS),
+                                                      'rv-tools': len(RVTOOLS_SHEETS)}})
         file_type = "invalid"
     
+    logger.info('Detected %s for %s', file_type, fn, extra={
+        'file_name': fn,
+        'file_type': file_type,
+        'size_mb': size_mb,
+        'sheet_count': len(vmsheets),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+    })
     return file_type
 
 def get_file_info(input_path, fn):
@@ -67,6 +70,7 @@ def get_file_info(input_path, fn):
     Returns:
         dict: File information
     """
+    import pandas as pd
     file_path = Path(input_path) / fn
     info = {
         'filename': fn,
@@ -84,6 +88,6 @@ def get_file_info(input_path, fn):
             with pd.ExcelFile(file_path) as excel_file:
                 info['sheet_count'] = len(excel_file.sheet_names)
         except Exception as e:
-            print(f"Could not read Excel file: {e}")
+            logger.warning('Could not read Excel file %s: %s', fn, e, extra={'file_name': fn})
     
     return info
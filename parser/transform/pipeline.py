@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from parser.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Profile collecting stages for the transform currently running (if any)
+_active_profile = ContextVar('transform_stage_profile', default=None)
+
+# tracemalloc is process-wide: held by the one profiled run that started tracing
+_trace_lock = threading.Lock()
+
+
+class StageProfile(object):
+    """Wall time, CPU time and optional tracemalloc peak per transform stage."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    @contextmanager
+    def record(self, name, detail=None):
+        """Measure one stage and append it to the profile.
+
+        Args:
+            name (str): Stage name, e.g. ``read_sheet``
+            detail (str): Optional qualifier, e.g. the sheet name
+        """
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            entry = {
+                'stage': f'{name} ({detail})' if detail else name,
+                'wall_ms': round((time.perf_counter() - wall_start) * 1000, 3),
+                'cpu_ms': round((time.process_time() - cpu_start) * 1000, 3),
+                'peak_mb': None,
+            }
+            if self.trace_memory:
+                entry['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 3)
+            self.stages.append(entry)
+
+    @property
+    def total_wall_ms(self):
+        return round(sum(s['wall_ms'] for s in self.stages), 3)
+
+    @property
+    def total_cpu_ms(self):
+        return round(sum(s['cpu_ms'] for s in self.stages), 3)
+
+    def as_list(self):
+        """Return the recorded stages in execution order.
+
+        Returns:
+            list[dict]: stage, wall_ms, cpu_ms and peak_mb (None unless tracing memory)
+        """
+        return list(self.stages)
+
+
+@contextmanager
+def stage(name, detail=None):
+    """Mark a transform stage.
+
+    The stage is timed into the active ``StageProfile`` (see ``run_profiled``),
+    into the request instrumentation span of the same name and, at DEBUG level,
+    logged with its duration. With none of these enabled the overhead is a
+    context variable lookup and a level check.
+
+    Args:
+        name (str): Stage name, e.g. ``read_sheet``
+        detail (str): Optional qualifier shown in the profile, e.g. the sheet name
+    """
+    profile = _active_profile.get()
+    started = time.perf_counter() if logger.isEnabledFor(logging.DEBUG) else None
+    with span(name):
+        if profile is None:
+            yield
+        else:
+            with profile.record(name, detail):
+                yield
+    if started is not None:
+        logger.debug('Stage %s finished', f'{name} ({detail})' if detail else name, extra={
+            'stage': name,
+            'detail': detail,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        })
+
+
+def profiled_stage(name):
+    """Decorator form of ``stage`` for functions that are one pipeline stage."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def run_profiled(conversion, trace_memory=False, **kwargs):
+    """Run a transform and collect its stage profile.
+
+    Args:
+        conversion (callable): Transform function, e.g. ``rvtools_conversion``
+        trace_memory (bool): Also record the tracemalloc peak per stage
+            (slows allocation-heavy stages noticeably). Ignored while another
+            run or the interpreter itself is tracing; ``peak_mb`` is then None
+        **kwargs: Arguments passed to the transform
+
+    Returns:
+        tuple: (transform result, StageProfile)
+    """
+    # Only one run may trace at a time: a concurrent run (the web pool is
+    # threaded) would reset the peak between our stages and stop tracing
+    # under us. Runs that cannot own the tracer are profiled without memory.
+    owns_tracing = trace_memory and _trace_lock.acquire(blocking=False)
+    if owns_tracing and tracemalloc.is_tracing():
+        _trace_lock.release()  # traced by someone else (e.g. PYTHONTRACEMALLOC); leave it alone
+        owns_tracing = False
+    if trace_memory and not owns_tracing:
+        logger.info('Memory tracing already in use, profiling transform without it',
+                    extra={'transform': getattr(conversion, '__name__', repr(conversion))})
+    profile = StageProfile(trace_memory=owns_tracing)
+    if owns_tracing:
+        tracemalloc.start()
+    token = _active_profile.set(profile)
+    try:
+        result = conversion(**kwargs)
+    finally:
+        _active_profile.reset(token)
+        if owns_tracing:
+            tracemalloc.stop()
+            _trace_lock.release()
+    return result, profile
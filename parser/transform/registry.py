@@ -0,0 +1,395 @@
+"""Registry of the inventory formats the upload pipeline understands.
+
+A format is a conversion function registered with ``register_transform``,
+declaring how to recognise its files (extensions plus required sheets, or a
+custom detector)::
+
+    @register_transform('rv-tools', 'RVTools', sheets=RVTOOLS_SHEETS, exact_sheets=True,
+                        required_columns={'vInfo': ['VM ID', ('Provisioned MiB', 'Provisioned MB')]})
+    def rvtools_conversion(**kwargs):
+        ...  # read kwargs['input_path'] / kwargs['file_name']
+        return frame  # columns named after WORKLOAD_SCHEMA
+
+The decorated function is wrapped so every format shares the same head and
+tail: the header rows of the sheets it reads are checked against its
+``required_columns`` before it runs, schema validation and the import summary
+run after it as profiled stages, and one structured log record is written per
+file. A file missing a column fails with ``WorkloadSchemaError``, which the
+upload shows to the user, instead of a ``KeyError`` from inside the transform. Formats shipped with the app are
+listed in ``BUILTIN_TRANSFORMS``; other packages can add formats through the
+``parser.transforms`` entry point group (the entry point is imported, which
+registers the format).
+"""
+import importlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zipfile
+from xml.etree import ElementTree
+from functools import wraps
+from importlib.metadata import entry_points
+from typing import Callable, NamedTuple
+
+from parser.transform.pipeline import stage
+from parser.transform.schema import WorkloadSchemaError, conform_workload_frame
+from parser.transform.summary import summarize_workloads
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_TRANSFORMS = (
+    'parser.transform.transform_lova',
+    'parser.transform.transform_rvtools',
+    'parser.transform.transform_govc',
+)
+ENTRY_POINT_GROUP = 'parser.transforms'
+EXCEL_EXTENSIONS = ('xlsx', 'xls')
+
+_registry = {}
+_loaded = False
+_load_lock = threading.Lock()
+
+_SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_CELL_REF = re.compile(r'([A-Z]+)(\d+)')
+
+
+class TransformPlugin(NamedTuple):
+    """One registered inventory format.
+
+    Attributes:
+        file_type (str): Identifier passed between upload and process_upload
+        label (str): Name shown to users, e.g. ``RVTools``
+        conversion (callable): Wrapped conversion returning a conformed frame
+        extensions (tuple): Accepted file extensions, lower case without dot
+        sheets (tuple): Workbook sheets identifying the format
+        detect (callable): Takes a ``FileProbe`` and returns True for this format
+        read_sheets (tuple): Sheets the conversion loads (for memory estimates)
+        required_columns (dict): Sheet name to the header names the conversion
+            needs; a tuple entry lists alternatives (e.g. MiB or MB columns)
+    """
+    file_type: str
+    label: str
+    conversion: Callable
+    extensions: tuple
+    sheets: tuple
+    detect: Callable
+    read_sheets: tuple = ()
+    required_columns: dict | None = None
+
+
+class FileProbe(object):
+    """Lazily gathered facts about an uploaded file, shared by all detectors."""
+
+    def __init__(self, input_path, file_name):
+        self.file_name = file_name
+        self.path = os.path.join(input_path, file_name)
+        self.extension = os.path.splitext(file_name)[1].lstrip('.').lower()
+        self._sheet_names = None
+        self._sheet_dimensions = None
+        self._sheet_columns = {}
+        self._head = None
+
+    @property
+    def sheet_names(self):
+        """Sheet names of a workbook, or an empty list if it can't be read.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        if self._sheet_names is None:
+            import pandas as pd
+            try:
+                with pd.ExcelFile(self.path) as workbook:
+                    self._sheet_names = list(workbook.sheet_names)
+            except FileNotFoundError:
+                raise
+            except Exception as e:
+                logger.warning('Error reading Excel file %s: %s', self.file_name, e,
+                               extra={'file_name': self.file_name})
+                self._sheet_names = []
+        return self._sheet_names
+
+    @property
+    def sheet_dimensions(self):
+        """``(rows, columns)`` per sheet of an xlsx workbook, without loading any cells.
+
+        Read from the ``<dimension>`` element at the top of each worksheet;
+        sheets whose writer omitted it are left out. Empty for other formats
+        or unreadable files.
+        """
+        if self._sheet_dimensions is None:
+            self._sheet_dimensions = {}
+            if self.extension == 'xlsx':
+                try:
+                    self._sheet_dimensions = _xlsx_dimensions(self.path)
+                except (OSError, KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+                    logger.warning('Could not read sheet dimensions of %s: %s', self.file_name, e,
+                                   extra={'file_name': self.file_name})
+        return self._sheet_dimensions
+
+    def sheet_columns(self, sheets):
+        """Header row of each of the given sheets, reading no other rows.
+
+        Args:
+            sheets (Iterable[str]): Sheet names
+
+        Returns:
+            dict: Sheet name to list of column names; None for sheets the
+                workbook does not have
+        """
+        wanted = [sheet for sheet in sheets if sheet not in self._sheet_columns]
+        if wanted:
+            import pandas as pd
+            with pd.ExcelFile(self.path) as workbook:
+                for sheet in wanted:
+                    if sheet in workbook.sheet_names:
+                        self._sheet_columns[sheet] = [str(column) for column in
+                                                      workbook.parse(sheet, nrows=0).columns]
+                    else:
+                        self._sheet_columns[sheet] = None
+        return {sheet: self._sheet_columns[sheet] for sheet in sheets}
+
+    def head(self, size=4096):
+        """First bytes of the file, decoded as UTF-8 (for text formats)."""
+        if self._head is None:
+            with open(self.path, 'rb') as fh:
+                self._head = fh.read(size).decode('utf-8', errors='replace')
+        return self._head
+
+
+def _column_number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord('A') + 1
+    return number
+
+
+def _sheet_dimension(archive, member):
+    # the element precedes sheetData, so only the head of the sheet is parsed
+    with archive.open(member) as sheet:
+        for _, element in ElementTree.iterparse(sheet, events=('start',)):
+            if element.tag == f'{_SPREADSHEET_NS}dimension':
+                cells = _CELL_REF.findall(element.get('ref', '').upper())
+                if not cells:
+                    return None
+                (first_col, first_row), (last_col, last_row) = cells[0], cells[-1]
+                return (int(last_row) - int(first_row) + 1,
+                        _column_number(last_col) - _column_number(first_col) + 1)
+            if element.tag == f'{_SPREADSHEET_NS}sheetData':
+                return None
+    return None
+
+
+def _xlsx_dimensions(path):
+    with zipfile.ZipFile(path) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        relationships = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in relationships}
+        dimensions = {}
+        for sheet in workbook.iter(f'{_SPREADSHEET_NS}sheet'):
+            target = targets.get(sheet.get(f'{_RELATIONSHIP_NS}id'))
+            if not target:
+                continue
+            member = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+            dimension = _sheet_dimension(archive, member)
+            if dimension:
+                dimensions[sheet.get('name')] = dimension
+        return dimensions
+
+
+def _sheets_detector(sheets, exact):
+    def detect(probe):
+        names = probe.sheet_names
+        if exact:
+            return names == list(sheets)
+        return bool(names) and set(sheets) <= set(names)
+    return detect
+
+
+def check_required_columns(probe, required_columns, label):
+    """Raise if a workbook lacks a column its format's conversion needs.
+
+    Args:
+        probe (FileProbe): The uploaded file
+        required_columns (dict): Sheet name to required header names; a tuple
+            entry is satisfied by any one of its names
+        label (str): Format name for the message
+
+    Raises:
+        WorkloadSchemaError: Naming every missing sheet and column
+    """
+    problems = []
+    for sheet, columns in probe.sheet_columns(required_columns).items():
+        if columns is None:
+            problems.append(f'sheet {sheet} is missing')
+            continue
+        missing = []
+        for required in required_columns[sheet]:
+            options = (required,) if isinstance(required, str) else tuple(required)
+            if not any(option in columns for option in options):
+                missing.append(' or '.join(options))
+        if missing:
+            problems.append(f"sheet {sheet} is missing columns: {', '.join(missing)}")
+    if problems:
+        raise WorkloadSchemaError(f"Not a complete {label} export: {'; '.join(problems)}")
+
+
+def register_transform(file_type, label, sheets=(), extensions=EXCEL_EXTENSIONS, exact_sheets=False, detect=None,
+                       read_sheets=None, required_columns=None):
+    """Decorator registering a conversion function as an inventory format.
+
+    Args:
+        file_type (str): Unique identifier, e.g. ``rv-tools``
+        label (str): Name shown to users
+        sheets (list): Sheets identifying the format; a workbook containing
+            all of them is detected as this format unless ``detect`` is given
+        extensions (tuple): Accepted file extensions
+        exact_sheets (bool): Require the workbook to have exactly ``sheets``,
+            in order (complete exports of a known tool version)
+        detect (callable): Custom detector taking a ``FileProbe``
+        read_sheets (list): Sheets the conversion actually loads, used to
+            estimate the memory of an import; defaults to ``sheets``
+        required_columns (dict): Sheet name to the header names the conversion
+            reads; a tuple entry lists alternatives, e.g. ``('Provisioned MiB', 'Provisioned MB')``.
+            Checked before the conversion runs (workbook formats only)
+
+    Returns:
+        callable: Decorator returning the wrapped conversion
+    """
+    def decorator(func):
+        log = logging.getLogger(func.__module__)
+
+        @wraps(func)
+        def conversion(**kwargs):
+            file_name = kwargs['file_name']
+            started = time.perf_counter()
+            log.debug('Parsing %s file %s', label, file_name, extra={'file_name': file_name, 'file_type': file_type})
+
+            if required_columns:
+                with stage('check_columns'):
+                    check_required_columns(FileProbe(kwargs['input_path'], file_name), required_columns, label)
+
+            frame = func(**kwargs)
+
+            with stage('validate'):
+                frame = conform_workload_frame(frame)
+
+            with stage('summarize'):
+                # travels with the frame (attrs survive staging) so the preview and save don't re-scan rows
+                frame.attrs['summary'] = summarize_workloads(frame)
+
+            log.info('Parsed %s file %s', label, file_name, extra={
+                'file_name': file_name,
+                'file_type': file_type,
+                'rows': len(frame),
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+            return frame
+
+        if file_type in _registry and _registry[file_type].conversion.__module__ != func.__module__:
+            logger.warning('Transform %s registered twice; keeping %s', file_type, func.__module__,
+                           extra={'file_type': file_type})
+        _registry[file_type] = TransformPlugin(
+            file_type=file_type,
+            label=label,
+            conversion=conversion,
+            extensions=tuple(ext.lower() for ext in extensions),
+            sheets=tuple(sheets),
+            detect=detect or _sheets_detector(sheets, exact_sheets),
+            read_sheets=tuple(sheets if read_sheets is None else read_sheets),
+            required_columns=dict(required_columns or {}),
+        )
+        return conversion
+    return decorator
+
+
+def load_transforms():
+    """Import the built-in formats and any ``parser.transforms`` entry points once."""
+    global _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if _loaded:
+            return
+        for module in BUILTIN_TRANSFORMS:
+            importlib.import_module(module)
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                entry_point.load()
+            except Exception:
+                logger.exception('Could not load transform plugin %s', entry_point.name,
+                                 extra={'entry_point': entry_point.value})
+        _loaded = True
+
+
+def registered_transforms():
+    """All registered formats, built-ins first.
+
+    Returns:
+        list: ``TransformPlugin`` instances
+    """
+    load_transforms()
+    return list(_registry.values())
+
+
+def get_transform(file_type):
+    """Return the registered format for file_type, or None."""
+    load_transforms()
+    return _registry.get(file_type)
+
+
+def upload_extensions():
+    """File extensions accepted by at least one format, in registration order."""
+    return list(dict.fromkeys(ext for plugin in registered_transforms() for ext in plugin.extensions))
+
+
+def detect_transform(input_path, file_name):
+    """Find the format of an uploaded file.
+
+    Detectors only run for formats accepting the file's extension, and share
+    one ``FileProbe`` so a workbook is opened at most once.
+
+    Args:
+        input_path (str): Directory containing the file
+        file_name (str): File name
+
+    Returns:
+        tuple: (``TransformPlugin`` or None, ``FileProbe``)
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    probe = FileProbe(input_path, file_name)
+    if not os.path.exists(probe.path):
+        raise FileNotFoundError(probe.path)
+    for plugin in registered_transforms():
+        if probe.extension in plugin.extensions and plugin.detect(probe):
+            return plugin, probe
+    return None, probe
+
+
+def json_key_detector(*keys):
+    """Detector for JSON exports whose top-level object starts with one of keys.
+
+    Args:
+        keys (str): Top-level key names, compared case-insensitively
+
+    Returns:
+        callable: Detector taking a ``FileProbe``
+    """
+    wanted = {key.lower() for key in keys}
+
+    def detect(probe):
+        head = probe.head().lstrip('\ufeff \t\r\n')
+        if not head.startswith('{'):
+            return False
+        try:
+            # decode just the first key, e.g. {"VirtualMachines": [ ...
+            key, _ = json.JSONDecoder().raw_decode(head, head.index('"'))
+        except ValueError:
+            return False
+        return isinstance(key, str) and key.lower() in wanted
+    return detect
@@ -0,0 +1,181 @@
+from typing import NamedTuple
+
+
+class WorkloadField(NamedTuple):
+    """Definition of one column in the canonical workload frame.
+
+    Attributes:
+        dtype (str): pandas dtype every transform must emit for the column
+        nullable (bool): Whether missing values are allowed
+        unit (str): Unit of the values, or None for free text
+        model_field (str): Matching ``Workload`` column name
+        required (bool): Whether every transform must emit the column
+        model_scale (int): Multiplier applied when storing (e.g. GB -> MB)
+        model_dtype (str): dtype used when storing, or None to keep ``dtype``
+    """
+    dtype: str
+    nullable: bool
+    unit: str | None
+    model_field: str
+    required: bool = False
+    model_scale: int = 1
+    model_dtype: str | None = None
+
+
+# Canonical workload schema - every transform emits (a subset of) these columns
+# with exactly these dtypes, so downstream code never coerces row by row.
+WORKLOAD_SCHEMA = {
+    'vmId': WorkloadField('object', False, None, 'mobid', required=True),
+    'vmName': WorkloadField('object', False, None, 'vmname', required=True),
+    'os': WorkloadField('object', True, None, 'os', required=True),
+    'os_name': WorkloadField('object', True, None, 'os_name', required=True),
+    'vmState': WorkloadField('object', True, None, 'vmstate', required=True),
+    'cluster': WorkloadField('object', True, None, 'cluster', required=True),
+    'virtualDatacenter': WorkloadField('object', True, None, 'virtualdatacenter', required=True),
+    'ip_addresses': WorkloadField('object', True, None, 'ip_addresses', required=True),
+    'vCpu': WorkloadField('Int32', True, 'vCPU', 'vcpu', required=True, model_dtype='int64'),
+    'vRam': WorkloadField('float64', True, 'GB', 'vram', required=True, model_scale=1024, model_dtype='int64'),
+    'vinfo_provisioned': WorkloadField('float64', True, 'GB', 'vinfo_provisioned'),
+    'vinfo_used': WorkloadField('float64', True, 'GB', 'vinfo_used'),
+    'vmdkTotal': WorkloadField('float64', True, 'GB', 'vmdktotal', required=True),
+    'vmdkUsed': WorkloadField('float64', True, 'GB', 'vmdkused', required=True),
+    'readIOPS': WorkloadField('float64', True, 'IOPS', 'readiops'),
+    'writeIOPS': WorkloadField('float64', True, 'IOPS', 'writeiops'),
+    'peakReadIOPS': WorkloadField('float64', True, 'IOPS', 'peakreadiops'),
+    'peakWriteIOPS': WorkloadField('float64', True, 'IOPS', 'peakwriteiops'),
+    'readThroughput': WorkloadField('float64', True, 'MB/s', 'readthroughput'),
+    'writeThroughput': WorkloadField('float64', True, 'MB/s', 'writethroughput'),
+    'peakReadThroughput': WorkloadField('float64', True, 'MB/s', 'peakreadthroughput'),
+    'peakWriteThroughput': WorkloadField('float64', True, 'MB/s', 'peakwritethroughput'),
+    'avgCpuPercent': WorkloadField('float64', True, '%', 'avgcpupercent'),
+    'peakCpuPercent': WorkloadField('float64', True, '%', 'peakcpupercent'),
+    'avgMemoryPercent': WorkloadField('float64', True, '%', 'avgmemorypercent'),
+    'peakMemoryPercent': WorkloadField('float64', True, '%', 'peakmemorypercent'),
+}
+
+
+class WorkloadSchemaError(ValueError):
+    """Raised when a transform result does not satisfy the workload schema."""
+
+
+def conform_workload_frame(df):
+    """Cast a transform result to the canonical workload dtypes and validate it.
+
+    Columns keep their order; columns unknown to the schema are dropped.
+
+    Args:
+        df (pd.DataFrame): Transform result (or a frame restored from JSON)
+
+    Returns:
+        pd.DataFrame: Frame with canonical dtypes
+
+    Raises:
+        WorkloadSchemaError: If required columns are missing, a column cannot
+            be cast, or a non-nullable column contains missing values
+    """
+    import pandas as pd
+    missing = [name for name, field in WORKLOAD_SCHEMA.items()
+               if field.required and name not in df.columns]
+    if missing:
+        raise WorkloadSchemaError(f"Missing required workload columns: {', '.join(missing)}")
+
+    columns = [c for c in df.columns if c in WORKLOAD_SCHEMA]
+    conformed = {}
+    for name in columns:
+        dtype = WORKLOAD_SCHEMA[name].dtype
+        series = df[name]
+        try:
+            if dtype == 'object':
+                # text columns hold str or missing - never numbers read from Excel
+                series = series.astype(str).where(series.notna())
+            else:
+                series = series.astype(dtype)
+        except (TypeError, ValueError) as e:
+            raise WorkloadSchemaError(f"Column {name} cannot be converted to {dtype}: {e}") from e
+        conformed[name] = series
+
+    frame = pd.DataFrame(conformed, index=df.index, columns=columns)
+    validate_workload_frame(frame)
+    return frame
+
+
+def validate_workload_frame(df):
+    """Check a frame against the workload schema in one vectorized pass.
+
+    Args:
+        df (pd.DataFrame): Frame that claims to follow the schema
+
+    Raises:
+        WorkloadSchemaError: On dtype mismatches or missing non-nullable values
+    """
+    import pandas as pd
+    fields = {name: WORKLOAD_SCHEMA[name] for name in df.columns if name in WORKLOAD_SCHEMA}
+
+    expected = pd.Series({name: field.dtype for name, field in fields.items()}, dtype=object)
+    actual = df.dtypes[list(fields)].astype(str)
+    wrong_dtype = expected[actual != expected]
+    if not wrong_dtype.empty:
+        details = ', '.join(f"{name} ({actual[name]} != {dtype})" for name, dtype in wrong_dtype.items())
+        raise WorkloadSchemaError(f"Workload columns have unexpected dtypes: {details}")
+
+    not_nullable = [name for name, field in fields.items() if not field.nullable]
+    null_counts = df[not_nullable].isna().sum()
+    null_counts = null_counts[null_counts > 0]
+    if not null_counts.empty:
+        details = ', '.join(f"{name} ({count} rows)" for name, count in null_counts.items())
+        raise WorkloadSchemaError(f"Workload columns may not contain missing values: {details}")
+
+
+def to_workload_frame(df):
+    """Rename and scale a conformed workload frame to ``Workload`` columns.
+
+    Unit scaling and integer casts are applied column-wise, so the result can
+    be diffed against rows read from ``workloads_tb`` without further coercion.
+
+    Args:
+        df (pd.DataFrame): Frame returned by ``conform_workload_frame``
+
+    Returns:
+        pd.DataFrame: Frame keyed by ``Workload`` column name
+    """
+    import pandas as pd
+    columns = {}
+    for name in df.columns:
+        field = WORKLOAD_SCHEMA[name]
+        series = df[name]
+        if field.model_scale != 1:
+            series = series * field.model_scale
+        if field.model_dtype:
+            series = series.fillna(0).astype(field.model_dtype)
+        columns[field.model_field] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def frame_to_records(frame):
+    """Convert a frame into insert mappings, with missing values as ``None``.
+
+    Args:
+        frame (pd.DataFrame): Frame keyed by ``Workload`` column name
+
+    Returns:
+        list[dict]: One mapping per row
+    """
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+
+def to_workload_records(df, pid):
+    """Convert a conformed workload frame into ``Workload`` insert mappings.
+
+    Args:
+        df (pd.DataFrame): Frame returned by ``conform_workload_frame``
+        pid (int): Project the workloads belong to
+
+    Returns:
+        list[dict]: One mapping per row, keyed by ``Workload`` column name;
+            OS, cluster and datacenter are still names, which
+            ``parser.dimensions.assign_dimension_ids`` replaces by IDs
+    """
+    records = frame_to_records(to_workload_frame(df))
+    for record in records:
+        record['pid'] = pid
+    return records
@@ -0,0 +1,42 @@
+OS_MIX_LIMIT = 8
+
+
+def summarize_workloads(frame, os_limit=OS_MIX_LIMIT):
+    """Per-import totals shown next to an upload preview and stored with the import.
+
+    Every figure is a single vectorized aggregation over a column of the
+    conformed frame, so this is cheap enough to run as the last transform stage.
+
+    Args:
+        frame (DataFrame): Conformed workload frame (see ``WORKLOAD_SCHEMA``)
+        os_limit (int): Number of operating systems listed individually in
+            ``os_mix``; the remainder is folded into ``Other``
+
+    Returns:
+        dict: workloads, powered_on, powered_on_ratio, vcpu, vram_gb,
+            storage_provisioned_gb, storage_used_gb and os_mix (list of
+            ``[os, count]`` pairs, most common first)
+    """
+    workloads = int(len(frame))
+    powered_on = int((frame['vmState'] == 'poweredOn').sum()) if 'vmState' in frame else 0
+    return {
+        'workloads': workloads,
+        'powered_on': powered_on,
+        'powered_on_ratio': round(powered_on / workloads, 4) if workloads else 0.0,
+        'vcpu': int(frame['vCpu'].sum()) if 'vCpu' in frame else 0,
+        'vram_gb': round(float(frame['vRam'].sum()), 2) if 'vRam' in frame else 0.0,
+        'storage_provisioned_gb': round(float(frame['vmdkTotal'].sum()), 2) if 'vmdkTotal' in frame else 0.0,
+        'storage_used_gb': round(float(frame['vmdkUsed'].sum()), 2) if 'vmdkUsed' in frame else 0.0,
+        'os_mix': _os_mix(frame, os_limit),
+    }
+
+
+def _os_mix(frame, limit):
+    if 'os' not in frame:
+        return []
+    counts = frame['os'].fillna('Unknown').replace('', 'Unknown').value_counts()
+    mix = [[str(name), int(count)] for name, count in counts.head(limit).items()]
+    other = int(counts.iloc[limit:].sum())
+    if other:
+        mix.append(['Other', other])
+    return mix
@@ -0,0 +1,67 @@
+import json
+from parser.transform.pipeline import stage
+from parser.transform.registry import json_key_detector, register_transform
+
+BYTES_PER_GB = 1024 ** 3
+
+
+def _lower_keys(obj):
+    # govc changed the JSON key style (VirtualMachines vs. virtualMachines) between releases
+    return {key.lower(): value for key, value in obj.items()}
+
+
+def _column(frame, name, fallback=None):
+    import pandas as pd
+    if name in frame:
+        return frame[name]
+    if fallback is not None and fallback in frame:
+        return frame[fallback]
+    return pd.Series(None, index=frame.index, dtype='object')
+
+
+@register_transform('govc-json', 'vSphere govc', extensions=('json',), detect=json_key_detector('VirtualMachines'))
+def govc_conversion(**kwargs):
+    """Workloads from ``govc vm.info -json`` output.
+
+    govc does not report cluster or datacenter per VM, so those stay empty.
+    """
+    import pandas as pd
+    input_path = kwargs['input_path']
+    file_name = kwargs['file_name']
+
+    with stage('read_json'):
+        with open(f'{input_path}/{file_name}', 'rb') as fh:
+            payload = json.load(fh, object_hook=_lower_keys)
+
+    with stage('filter'):
+        vmdata_df = pd.json_normalize(payload.get('virtualmachines') or [])
+
+        vm_consolidated = pd.DataFrame({
+            'vmId': _column(vmdata_df, 'self.value', 'config.uuid'),
+            'vmName': _column(vmdata_df, 'name', 'config.name'),
+            'os': _column(vmdata_df, 'config.guestfullname', 'guest.guestfullname'),
+            'os_name': _column(vmdata_df, 'guest.hostname'),
+            'vmState': _column(vmdata_df, 'runtime.powerstate'),
+            'cluster': None,
+            'virtualDatacenter': None,
+            'ip_addresses': _column(vmdata_df, 'guest.ipaddress'),
+            'vCpu': _column(vmdata_df, 'config.hardware.numcpu'),
+            'vRam': _column(vmdata_df, 'config.hardware.memorymb'),
+            'committed': _column(vmdata_df, 'summary.storage.committed'),
+            'uncommitted': _column(vmdata_df, 'summary.storage.uncommitted'),
+        }, index=vmdata_df.index)
+
+        fillna_values = {"ip_addresses": "no ip", "os": "none specified"}
+        vm_consolidated.fillna(value=fillna_values, inplace = True)
+
+    with stage('unit_conversion'):
+        # memory is reported in MB, storage in bytes; convert both into GB
+        committed = pd.to_numeric(vm_consolidated.pop('committed'), errors='coerce').fillna(0)
+        uncommitted = pd.to_numeric(vm_consolidated.pop('uncommitted'), errors='coerce').fillna(0)
+        vm_consolidated['vRam'] = pd.to_numeric(vm_consolidated['vRam'], errors='coerce')/1024
+        vm_consolidated['vmdkTotal'] = (committed + uncommitted)/BYTES_PER_GB
+        vm_consolidated['vmdkUsed'] = committed/BYTES_PER_GB
+        vm_consolidated['vinfo_provisioned'] = vm_consolidated['vmdkTotal']
+        vm_consolidated['vinfo_used'] = vm_consolidated['vmdkUsed']
+
+    return vm_consolidated
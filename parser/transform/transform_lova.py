@@ -1,80 +1,102 @@
-import pandas as pd
 import sys
+from parser.transform.data_validation import LIVE_OPTICS_SHEETS
+from parser.transform.pipeline import stage
+from parser.transform.registry import register_transform
 
+@register_transform('live-optics', 'LiveOptics', sheets=LIVE_OPTICS_SHEETS, exact_sheets=True,
+                    read_sheets=('VMs', 'VM Performance'),
+                    required_columns={
+                        'VMs': ['MOB ID', 'VM Name', 'Cluster', 'Datacenter', 'VM OS', 'Guest Hostname', 'Power State',
+                                'Virtual CPU', 'Guest IP1', 'Guest IP2', 'Guest IP3', 'Guest IP4',
+                                ('Virtual Disk Size (MiB)', 'Virtual Disk Size (MB)'),
+                                ('Virtual Disk Used (MiB)', 'Virtual Disk Used (MB)'),
+                                ('Provisioned Memory (MiB)', 'Provisioned Memory (MB)')],
+                        'VM Performance': ['MOB ID'],
+                    })
 def lova_conversion(**kwargs):
+    import pandas as pd
     input_path = kwargs['input_path'] 
     file_name = kwargs['file_name'] 
 
-    print()
-    print("Parsing LiveOptics file(s) locally.")
+    with stage('read_sheet', 'VMs'):
+        vmdata_df = pd.read_excel(f'{input_path}/{file_name}', sheet_name="VMs")
 
-    vmdata_df = pd.read_excel(f'{input_path}/{file_name}', sheet_name="VMs")
+    with stage('filter', 'VMs'):
+        # specify columns to KEEP - all others will be dropped
+        keep_columns = ['Cluster','Datacenter','Guest IP1','Guest IP2','Guest IP3','Guest IP4','VM OS','Guest Hostname', 'Power State', 'Virtual CPU', 'VM Name', 'MOB ID']
+        if 'Virtual Disk Size (MiB)' in vmdata_df:
+            keep_columns.extend(['Virtual Disk Size (MiB)','Virtual Disk Used (MiB)', 'Provisioned Memory (MiB)'])
+        else:
+            keep_columns.extend(['Virtual Disk Size (MB)','Virtual Disk Used (MB)', 'Provisioned Memory (MB)'])
 
-    # specify columns to KEEP - all others will be dropped
-    keep_columns = ['Cluster','Datacenter','Guest IP1','Guest IP2','Guest IP3','Guest IP4','VM OS','Guest Hostname', 'Power State', 'Virtual CPU', 'VM Name', 'MOB ID']
-    if 'Virtual Disk Size (MiB)' in vmdata_df:
-        keep_columns.extend(['Virtual Disk Size (MiB)','Virtual Disk Used (MiB)', 'Provisioned Memory (MiB)'])
-    else:
-        keep_columns.extend(['Virtual Disk Size (MB)','Virtual Disk Used (MB)', 'Provisioned Memory (MB)'])
+        vmdata_df = vmdata_df.filter(items= keep_columns, axis= 1)
 
-    vmdata_df = vmdata_df.filter(items= keep_columns, axis= 1)
-
-    # rename remaining columns
-    vmdata_df.rename(columns = {
-        'MOB ID':'vmId',
-        'VM Name':'vmName',
-        'VM OS':'os',
-        'Guest Hostname':'os_name',
-        'Power State':'vmState',
-        'Virtual CPU':'vCpu',
-        'Cluster':'cluster',
-        'Datacenter':'virtualDatacenter'
-        }, inplace = True)
-
-    if 'Virtual Disk Size (MiB)' in vmdata_df:
-        vmdata_df.rename(columns = {
-            'Provisioned Memory (MiB)':'vRam',
-            'Virtual Disk Size (MiB)':'vmdkTotal',
-            'Virtual Disk Used (MiB)':'vmdkUsed',
-            }, inplace = True)
-    else:
+        # rename remaining columns
         vmdata_df.rename(columns = {
-            'Provisioned Memory (MB)':'vRam',
-            'Virtual Disk Size (MB)':'vmdkTotal',
-            'Virtual Disk Used (MB)':'vmdkUsed',
+            'MOB ID':'vmId',
+            'VM Name':'vmName',
+            'VM OS':'os',
+            'Guest Hostname':'os_name',
+            'Power State':'vmState',
+            'Virtual CPU':'vCpu',
+            'Cluster':'cluster',
+            'Datacenter':'virtualDatacenter'
             }, inplace = True)
 
-    fillna_values = {"Guest IP1": "no ip", "Guest IP2": "no ip", "Guest IP3": "no ip", "Guest IP4": "no ip", "os": "none specified"}
-    vmdata_df.fillna(value=fillna_values, inplace = True)
+        if 'Virtual Disk Size (MiB)' in vmdata_df:
+            vmdata_df.rename(columns = {
+                'Provisioned Memory (MiB)':'vRam',
+                'Virtual Disk Size (MiB)':'vmdkTotal',
+                'Virtual Disk Used (MiB)':'vmdkUsed',
+                }, inplace = True)
+        else:
+            vmdata_df.rename(columns = {
+                'Provisioned Memory (MB)':'vRam',
+                'Virtual Disk Size (MB)':'vmdkTotal',
+                'Virtual Disk Used (MB)':'vmdkUsed',
+                }, inplace = True)
 
-    # aggregate IP addresses into one column
-    vmdata_df['ip_addresses'] = vmdata_df['Guest IP1'].map(str)+ ', ' + vmdata_df['Guest IP2'].map(str)+ ', ' + vmdata_df['Guest IP3'].map(str)+ ', ' + vmdata_df['Guest IP4'].map(str)
-    vmdata_df['ip_addresses'] = vmdata_df.ip_addresses.str.replace(', no ip' , '')
-    vmdata_df.drop(['Guest IP1', 'Guest IP2', 'Guest IP3', 'Guest IP4'], axis=1, inplace=True)
+        fillna_values = {"Guest IP1": "no ip", "Guest IP2": "no ip", "Guest IP3": "no ip", "Guest IP4": "no ip", "os": "none specified"}
+        vmdata_df.fillna(value=fillna_values, inplace = True)
 
-    # convert RAM and storage numbers into GB
-    vmdata_df['vmdkUsed'] = vmdata_df['vmdkUsed']/1024
-    vmdata_df['vmdkTotal'] = vmdata_df['vmdkTotal']/1024
-    vmdata_df['vRam'] = vmdata_df['vRam']/1024
+        # aggregate IP addresses into one column
+        vmdata_df['ip_addresses'] = vmdata_df['Guest IP1'].map(str)+ ', ' + vmdata_df['Guest IP2'].map(str)+ ', ' + vmdata_df['Guest IP3'].map(str)+ ', ' + vmdata_df['Guest IP4'].map(str)
+        vmdata_df['ip_addresses'] = vmdata_df.ip_addresses.str.replace(', no ip' , '')
+        vmdata_df.drop(['Guest IP1', 'Guest IP2', 'Guest IP3', 'Guest IP4'], axis=1, inplace=True)
 
-    vm_df_export = vmdata_df.round({'vmdkUsed':0,'vmdkTotal':0,'vRam':0})
+    with stage('unit_conversion'):
+        # convert RAM and storage numbers into GB
+        vmdata_df['vmdkUsed'] = vmdata_df['vmdkUsed']/1024
+        vmdata_df['vmdkTotal'] = vmdata_df['vmdkTotal']/1024
+        vmdata_df['vRam'] = vmdata_df['vRam']/1024
+
+        vm_df_export = vmdata_df.round({'vmdkUsed':0,'vmdkTotal':0,'vRam':0})
 
     # pull in rows from VM Performance for storage performance metrics
-    diskperf_df = pd.read_excel(f'{input_path}/{file_name}', sheet_name = 'VM Performance')
+    with stage('read_sheet', 'VM Performance'):
+        diskperf_df = pd.read_excel(f'{input_path}/{file_name}', sheet_name = 'VM Performance')
+
+    with stage('filter', 'VM Performance'):
+        perf_columns = ["MOB ID","Avg Read IOPS","Avg Write IOPS","Peak Read IOPS","Peak Write IOPS","Avg Read MB/s","Avg Write MB/s","Peak Read MB/s","Peak Write MB/s",
+                        "Average vCPU %","Peak vCPU %","Avg Memory %","Peak Memory %"]
+        diskperf_df = diskperf_df.filter(items= perf_columns, axis= 1)
+        diskperf_df.rename(columns = {
+            'MOB ID':'vmId', 
+            'Avg Read IOPS':'readIOPS',
+            'Avg Write IOPS':'writeIOPS',
+            'Peak Read IOPS':'peakReadIOPS',
+            'Peak Write IOPS':'peakWriteIOPS',
+            'Avg Read MB/s':'readThroughput',
+            'Avg Write MB/s':'writeThroughput',
+            'Peak Read MB/s':'peakReadThroughput',
+            'Peak Write MB/s':'peakWriteThroughput',
+            'Average vCPU %':'avgCpuPercent',
+            'Peak vCPU %':'peakCpuPercent',
+            'Avg Memory %':'avgMemoryPercent',
+            'Peak Memory %':'peakMemoryPercent'
+            }, inplace = True)
 
-    perf_columns = ["MOB ID","Avg Read IOPS","Avg Write IOPS","Peak Read IOPS","Peak Write IOPS","Avg Read MB/s","Avg Write MB/s","Peak Read MB/s","Peak Write MB/s"]
-    diskperf_df = diskperf_df.filter(items= perf_columns, axis= 1)
-    diskperf_df.rename(columns = {
-        'MOB ID':'vmId', 
-        'Avg Read IOPS':'readIOPS',
-        'Avg Write IOPS':'writeIOPS',
-        'Peak Read IOPS':'peakReadIOPS',
-        'Peak Write IOPS':'peakWriteIOPS',
-        'Avg Read MB/s':'readThroughput',
-        'Avg Write MB/s':'writeThroughput',
-        'Peak Read MB/s':'peakReadThroughput',
-        'Peak Write MB/s':'peakWriteThroughput'
-        }, inplace = True)
+    with stage('merge'):
+        vm_consolidated = pd.merge(vmdata_df, diskperf_df, on = "vmId", how = "left")
 
-    vm_consolidated = pd.merge(vmdata_df, diskperf_df, on = "vmId", how = "left")
-    return vm_consolidated
\ No newline at end of file
+    return vm_consolidated
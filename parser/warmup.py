@@ -0,0 +1,67 @@
+"""Pre-fork warm-up of the preloaded application.
+
+With ``preload_app`` gunicorn builds the app in the master and forks the
+workers from it. Pages the master has touched by then are shared
+copy-on-write by every worker, so each worker need not load its own copy
+(and pay for it again after every ``max_requests`` recycle). ``warm_up``
+loads what the workers would otherwise load on their first requests:
+
+* pandas, numpy and openpyxl, which the upload path imports on first use;
+* the compiled Jinja templates;
+* the registered inventory formats (transform modules and entry points).
+
+It then closes every pooled database connection, because a socket inherited
+by several workers would interleave their queries. ``gc.freeze`` moves the
+master's objects out of the collector's reach, so the workers' garbage
+collections do not write to (and so un-share) their pages.
+"""
+import gc
+import importlib
+import logging
+import time
+
+from parser.app import db
+from parser.transform.registry import registered_transforms
+
+logger = logging.getLogger(__name__)
+
+WARM_MODULES = ('numpy', 'pandas', 'openpyxl')
+
+
+def warm_up(app, modules=WARM_MODULES):
+    """Load shared read-only state into the current (master) process before forking.
+
+    Args:
+        app (Flask): The preloaded application
+        modules (tuple): Modules to import
+
+    Returns:
+        dict: Counts of ``modules``, ``templates`` and ``transforms`` loaded,
+            objects ``frozen`` and ``duration_ms``
+    """
+    started = time.perf_counter()
+    for module in modules:
+        importlib.import_module(module)
+
+    # get_template compiles the template into the environment's cache
+    templates = app.jinja_env.list_templates()
+    for name in templates:
+        app.jinja_env.get_template(name)
+
+    transforms = registered_transforms()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+    gc.collect()
+    gc.freeze()
+    summary = {
+        'modules': len(modules),
+        'templates': len(templates),
+        'transforms': len(transforms),
+        'frozen': gc.get_freeze_count(),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+    }
+    logger.info('Warmed up application before forking workers', extra=summary)
+    return summary
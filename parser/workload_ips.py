@@ -0,0 +1,121 @@
+"""Normalized per-address storage of ``Workload.ip_addresses``.
+
+The transforms produce a comma-separated display string per VM. Every valid
+address in it is also stored as one ``workload_ips_tb`` row (``inet`` on
+PostgreSQL, with a btree index for exact lookups and a GiST index for
+``<<=`` subnet queries), written whenever workloads are imported, created or
+edited. Lookups then never scan the display strings.
+
+Other databases store the compressed text form; exact lookups still use the
+column, and subnet matches are filtered in Python.
+"""
+import ipaddress
+import re
+
+from sqlalchemy import cast, delete, insert, select
+from sqlalchemy.dialects.postgresql import CIDR
+
+from parser.app import db
+from parser.models import Workload, WorkloadIP
+
+# Rows per statement, to bound statement size and IN lists
+IP_BATCH_SIZE = 1000
+
+_SEPARATORS = re.compile(r'[\s,;]+')
+
+
+def _batches(items, size=IP_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def parse_ip_addresses(text):
+    """Valid, de-duplicated addresses of a display string, in order.
+
+    Placeholders such as ``no ip``, IPv6 zone suffixes (``%eth0``) and
+    invalid entries are dropped.
+
+    Args:
+        text (str): Addresses separated by commas, semicolons or whitespace
+
+    Returns:
+        list: Compressed text form of each address
+    """
+    addresses = []
+    for token in _SEPARATORS.split(text or ''):
+        try:
+            address = str(ipaddress.ip_address(token.split('%', 1)[0]))
+        except ValueError:
+            continue
+        if address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+def insert_workload_ips(pid, vmids, ip_strings):
+    """Bulk insert the addresses of freshly inserted workloads.
+
+    Args:
+        pid (int): Project of the workloads
+        vmids (Sequence[int]): Workload IDs
+        ip_strings (Sequence[str]): ``ip_addresses`` of each workload, same order
+
+    Returns:
+        int: Rows inserted
+    """
+    rows = [{'vmid': vmid, 'pid': pid, 'address': address}
+            for vmid, text in zip(vmids, ip_strings) for address in parse_ip_addresses(text)]
+    for batch in _batches(rows):
+        db.session.execute(insert(WorkloadIP), batch)
+    return len(rows)
+
+
+def delete_workload_ips(vmids):
+    """Remove the stored addresses of workloads (before deleting or rewriting them)."""
+    for batch in _batches(list(vmids)):
+        db.session.execute(delete(WorkloadIP).where(WorkloadIP.vmid.in_(batch)))
+
+
+def sync_workload_ips(pid, vmids):
+    """Rewrite the stored addresses of workloads from their current ``ip_addresses``.
+
+    The caller is responsible for committing the session.
+
+    Args:
+        pid (int): Project of the workloads
+        vmids (Iterable[int]): Workloads that were inserted or changed
+
+    Returns:
+        int: Rows inserted
+    """
+    vmids = list(vmids)
+    delete_workload_ips(vmids)
+    inserted = 0
+    for batch in _batches(vmids):
+        rows = db.session.execute(
+            select(Workload.vmid, Workload.ip_addresses).where(Workload.vmid.in_(batch))
+        ).all()
+        inserted += insert_workload_ips(pid, [row.vmid for row in rows], [row.ip_addresses for row in rows])
+    return inserted
+
+
+def address_filter(network):
+    """Condition selecting ``WorkloadIP`` rows that equal or fall inside a network.
+
+    Args:
+        network (str): An address (``10.0.0.5``) or CIDR network (``10.0.0.0/24``)
+
+    Returns:
+        ColumnElement: Condition on ``WorkloadIP``; on databases without inet
+            support a subnet becomes an IN list of matching stored addresses
+
+    Raises:
+        ValueError: If network is not a valid address or network
+    """
+    network = ipaddress.ip_network(network.strip(), strict=False)
+    if network.num_addresses == 1:
+        return WorkloadIP.address == str(network.network_address)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return WorkloadIP.address.op('<<=')(cast(str(network), CIDR))
+    stored = db.session.execute(select(WorkloadIP.address).distinct()).scalars()
+    return WorkloadIP.address.in_([address for address in stored if ipaddress.ip_address(address) in network])
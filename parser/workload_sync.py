@@ -0,0 +1,173 @@
+"""Incremental re-import of a refreshed inventory into an existing project.
+
+Incoming rows are matched to existing workloads by MOB ID and datacenter.
+The diff is computed with pandas against a single bulk read of the project's
+current rows, and only new, changed and vanished rows are written back.
+"""
+from sqlalchemy import select, insert, update, delete
+
+from parser.app import db
+from parser.models import Workload
+from parser.transform.schema import frame_to_records
+from parser.dimensions import DIMENSIONS, DIMENSION_NAMES, assign_dimension_ids, join_dimensions
+from parser.workload_ips import delete_workload_ips, insert_workload_ips, sync_workload_ips
+
+# Columns that identify the same VM across two exports of one environment
+MERGE_KEY = ['mobid', 'virtualdatacenter']
+
+# Rows are written in batches of this size to bound statement size
+MERGE_BATCH_SIZE = 1000
+
+# Numeric(12,6) columns - compared at the precision the database stores
+NUMERIC_SCALE = 6
+
+
+def diff_workloads(incoming, existing):
+    """Compute inserts, updates and deletes between two workload frames.
+
+    Existing rows without a MOB ID (e.g. created by hand) are never matched
+    and therefore never updated or deleted. Existing rows sharing a key (left
+    behind by earlier append-mode imports) are reduced to the oldest one; the
+    other copies are deleted. Incoming rows repeating a key are skipped after
+    the first and counted.
+
+    Args:
+        incoming (pd.DataFrame): New inventory keyed by ``Workload`` column name
+        existing (pd.DataFrame): Current rows of the project, including ``vmid``
+
+    Returns:
+        dict: ``inserts`` and ``updates`` frames (updates carry ``vmid``),
+            ``deletes`` list of vmids, the ``unchanged`` row count and the
+            number of incoming ``duplicates`` skipped
+    """
+    import pandas as pd
+    value_columns = [c for c in incoming.columns if c not in ('vmid', 'pid')]
+
+    duplicates = incoming.duplicated(subset=MERGE_KEY, keep='first')
+    incoming = incoming[~duplicates]
+    existing = existing[existing['mobid'].notna()].sort_values('vmid')
+    stale = existing.duplicated(subset=MERGE_KEY, keep='first')
+    stale_vmids = existing.loc[stale, 'vmid'].astype('int64').tolist()
+    existing = existing[~stale]
+
+    # NULL datacenters would never compare equal, so match on a filled key
+    left = incoming.assign(_dc=incoming['virtualdatacenter'].fillna(''))
+    right = existing[['vmid'] + value_columns].assign(_dc=existing['virtualdatacenter'].fillna(''))
+    merged = left.merge(right.drop(columns=['virtualdatacenter']), how='outer', on=['mobid', '_dc'],
+                        suffixes=('', '_old'), indicator=True)
+
+    # the outer join widens int columns to float; restore the incoming dtypes
+    dtypes = incoming[value_columns].dtypes.to_dict()
+    inserts = merged.loc[merged['_merge'] == 'left_only', value_columns].astype(dtypes)
+    deletes = merged.loc[merged['_merge'] == 'right_only', 'vmid'].astype('int64').tolist() + stale_vmids
+
+    matched = merged[merged['_merge'] == 'both']
+    changed = pd.Series(False, index=matched.index)
+    for column in value_columns:
+        if column in MERGE_KEY:
+            continue
+        new, old = matched[column], matched[f'{column}_old']
+        if pd.api.types.is_float_dtype(new) or pd.api.types.is_float_dtype(old):
+            new = pd.to_numeric(new, errors='coerce').round(NUMERIC_SCALE)
+            old = pd.to_numeric(old, errors='coerce').round(NUMERIC_SCALE)
+        same = (new == old) | (new.isna() & old.isna())
+        changed |= ~same
+
+    updates = matched.loc[changed, ['vmid'] + value_columns].astype({'vmid': 'int64', **dtypes})
+
+    return {
+        'inserts': inserts,
+        'updates': updates,
+        'deletes': deletes,
+        'unchanged': int((~changed).sum()),
+        'duplicates': int(duplicates.sum()),
+    }
+
+
+def _upsert_statement(columns):
+    """Build an ``INSERT ... ON CONFLICT DO UPDATE`` on the workload key for the bound dialect."""
+    table = Workload.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        # (vmid, pid) is unique in both the plain and the pid-partitioned layout
+        conflict = [table.c.vmid, table.c.pid]
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        conflict = [table.c.vmid]
+    else:
+        return None
+
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=conflict,
+        set_={column: stmt.excluded[column] for column in columns}
+    )
+
+
+def _batches(items, size=MERGE_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def merge_workloads(pid, incoming):
+    """Merge a refreshed inventory into a project's existing workloads.
+
+    The caller is responsible for committing the session.
+
+    Args:
+        pid (int): Project to merge into
+        incoming (pd.DataFrame): New inventory keyed by ``Workload`` column
+            name, e.g. from ``to_workload_frame``
+
+    Returns:
+        dict: Counts of ``inserted``, ``updated``, ``deleted`` and ``unchanged``
+            rows, and of incoming ``duplicates`` skipped
+    """
+    import pandas as pd
+    value_columns = [c for c in incoming.columns if c not in ('vmid', 'pid')]
+    for column in MERGE_KEY:
+        if column not in incoming.columns:
+            raise ValueError(f'Merge requires the {column} column')
+
+    table = Workload.__table__
+    # OS, cluster and datacenter are diffed by name, read through the dimension tables
+    columns = [DIMENSION_NAMES[c].label(c) if c in DIMENSION_NAMES else table.c[c] for c in value_columns]
+    rows = db.session.execute(join_dimensions(select(table.c.vmid, *columns)).where(table.c.pid == pid)).all()
+    existing = pd.DataFrame(rows, columns=['vmid'] + value_columns)
+
+    diff = diff_workloads(incoming, existing)
+
+    insert_records = frame_to_records(diff['inserts'])
+    for record in insert_records:
+        record['pid'] = pid
+    assign_dimension_ids(insert_records)
+    returning = insert(Workload).returning(Workload.vmid, sort_by_parameter_order=True)
+    for batch in _batches(insert_records):
+        vmids = db.session.execute(returning, batch).scalars().all()
+        insert_workload_ips(pid, vmids, [record.get('ip_addresses') for record in batch])
+
+    update_records = frame_to_records(diff['updates'])
+    for record in update_records:
+        record['pid'] = pid
+    assign_dimension_ids(update_records)
+    upsert = _upsert_statement([c for c in value_columns if c not in DIMENSION_NAMES] +
+                               [id_column for column, id_column, _ in DIMENSIONS if column in value_columns])
+    for batch in _batches(update_records):
+        if upsert is not None:
+            db.session.execute(upsert, batch)
+        else:
+            db.session.execute(update(Workload), batch)
+    sync_workload_ips(pid, [record['vmid'] for record in update_records])
+
+    delete_workload_ips(diff['deletes'])
+    for batch in _batches(diff['deletes']):
+        db.session.execute(delete(Workload).where(Workload.vmid.in_(batch)))
+
+    return {
+        'inserted': len(insert_records),
+        'updated': len(update_records),
+        'deleted': len(diff['deletes']),
+        'unchanged': diff['unchanged'],
+        'duplicates': diff['duplicates'],
+    }
@@ -1,7 +1,7 @@
 """
 Pytest configuration and shared fixtures for the flask_pandas project tests.
 """
-import pytest, uuid, os
+import pytest, uuid, os, shutil
 from dotenv import load_dotenv
 from pathlib import Path
 from testcontainers.postgres import PostgresContainer
@@ -27,14 +27,18 @@ def postgres_container():
 
 
 @pytest.fixture(scope='function')
-def app(postgres_container: PostgresContainer):
+def app(postgres_container: PostgresContainer, tmp_path):
     """Create Flask app configured for testing"""
     test_config = {
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': postgres_container.get_connection_url(),
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
         'WTF_CSRF_ENABLED': False,  # Disable CSRF for testing
-        'SECRET_KEY': 'test-secret-key'
+        'SECRET_KEY': 'test-secret-key',
+        'REPORT_CACHE_FOLDER': str(tmp_path / 'reports'),
+        'SHARED_CACHE_PATH': str(tmp_path / 'cache.sqlite3'),
+        'IMPORT_ADMISSION_PATH': str(tmp_path / 'imports.json'),
+        'TEMPLATE_CACHE_FOLDER': str(tmp_path / 'templates'),
     }
     
     app = create_app(config=test_config)
@@ -110,3 +114,26 @@ def test_project(db_session, test_user):
     db_session.add(project)
     db_session.commit()
     return project
+
+
+@pytest.fixture
+def process_rvtools_sample(client, test_user, test_project, tmp_path):
+    """Log in and run the RVTools sample through /process_upload; returns the response"""
+    def process():
+        client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+        shutil.copy('tests/test_files/rvtools_file_sample.xlsx', tmp_path)
+        return client.get('/process_upload', query_string={
+            'input_path': str(tmp_path),
+            'file_type': 'rv-tools',
+            'file_name': 'rvtools_file_sample.xlsx',
+            'project_id': test_project.pid,
+        })
+    return process
+
+
+@pytest.fixture
+def staging_app(app, tmp_path):
+    """App staging uploads into a temporary folder, with a two-row preview sample"""
+    app.config['STAGING_FOLDER'] = str(tmp_path / 'staging')
+    app.config['PREVIEW_SAMPLE_ROWS'] = 2
+    return app
@@ -1,6 +1,18 @@
 #!/bin/bash
 set -e
 
+# Optional: hash-partition workloads_tb on pid into this many partitions (0 = plain table).
+# A partitioned table needs pid in its primary key, so (vmid, pid) becomes the key.
+WORKLOAD_PARTITIONS="${WORKLOAD_PARTITIONS:-0}"
+if [ "$WORKLOAD_PARTITIONS" -gt 0 ]; then
+    WORKLOADS_KEY='CONSTRAINT "workloads_tb_pkey" PRIMARY KEY ("vmid", "pid")'
+    WORKLOADS_STORAGE='PARTITION BY HASH ("pid")'
+else
+    WORKLOADS_KEY='CONSTRAINT "workloads_tb_pkey" PRIMARY KEY ("vmid"),
+    CONSTRAINT "workloads_tb_vmid_pid_key" UNIQUE ("vmid", "pid")'
+    WORKLOADS_STORAGE='WITH (oids = false)'
+fi
+
 psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-EOSQL
 	CREATE USER inventorydbuser WITH ENCRYPTED PASSWORD 'password';
 	CREATE DATABASE INVENTORYDB;
@@ -13,6 +25,7 @@ CREATE TABLE "public"."projects_tb" (
     "pid" integer DEFAULT nextval('projects_tb_pid_seq') NOT NULL,
     "userid" integer,
     "projectname" character varying(20),
+    "content_version" integer DEFAULT 0 NOT NULL,
     CONSTRAINT "projects_tb_pkey" PRIMARY KEY ("pid")
 ) WITH (oids = false);
 
@@ -31,17 +44,17 @@ CREATE SEQUENCE workloads_tb_vmid_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647
 
 CREATE TABLE "public"."workloads_tb" (
     "vmid" integer DEFAULT nextval('workloads_tb_vmid_seq') NOT NULL,
-    "pid" integer,
+    "pid" integer NOT NULL,
     "mobid" character varying(20),
-    "cluster" character varying(40),
-    "virtualdatacenter" character varying(40),
-    "os" character varying(40),
+    "os_id" integer,
+    "cluster_id" integer,
+    "datacenter_id" integer,
     "os_name" character varying(40),
     "vmstate" character varying(20),
     "vcpu" integer,
     "vmname" character varying(40),
     "vram" integer,
-    "ip_addresses" character varying(60),
+    "ip_addresses" text,
     "vinfo_provisioned" numeric(12,6),
     "vinfo_used" numeric(12,6),
     "vmdktotal" numeric(12,6),
@@ -54,13 +67,111 @@ CREATE TABLE "public"."workloads_tb" (
     "writethroughput" numeric(12,6),
     "peakreadthroughput" numeric(12,6),
     "peakwritethroughput" numeric(12,6),
-    CONSTRAINT "workloads_tb_pkey" PRIMARY KEY ("vmid")
+    "avgcpupercent" numeric(12,6),
+    "peakcpupercent" numeric(12,6),
+    "avgmemorypercent" numeric(12,6),
+    "peakmemorypercent" numeric(12,6),
+    ${WORKLOADS_KEY}
+) ${WORKLOADS_STORAGE};
+
+DO \$\$
+BEGIN
+    FOR remainder IN 0..${WORKLOAD_PARTITIONS} - 1 LOOP
+        EXECUTE format('CREATE TABLE "public"."workloads_tb_p%s" PARTITION OF "public"."workloads_tb" FOR VALUES WITH (MODULUS %s, REMAINDER %s)',
+                       remainder, ${WORKLOAD_PARTITIONS}, remainder);
+    END LOOP;
+END
+\$\$;
+
+
+CREATE SEQUENCE imports_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE "public"."imports_tb" (
+    "id" integer DEFAULT nextval('imports_tb_id_seq') NOT NULL,
+    "pid" integer NOT NULL,
+    "file_name" character varying(255),
+    "file_type" character varying(20),
+    "import_mode" character varying(10),
+    "workload_count" integer,
+    "summary" json,
+    "imported_at" timestamp DEFAULT now(),
+    CONSTRAINT "imports_tb_pkey" PRIMARY KEY ("id")
+) WITH (oids = false);
+
+CREATE INDEX "imports_tb_pid_idx" ON "public"."imports_tb" USING btree ("pid");
+
+
+CREATE SEQUENCE workload_ips_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE "public"."workload_ips_tb" (
+    "id" integer DEFAULT nextval('workload_ips_tb_id_seq') NOT NULL,
+    "vmid" integer NOT NULL,
+    "pid" integer NOT NULL,
+    "address" inet NOT NULL,
+    CONSTRAINT "workload_ips_tb_pkey" PRIMARY KEY ("id")
+) WITH (oids = false);
+
+CREATE INDEX "workload_ips_tb_vmid_idx" ON "public"."workload_ips_tb" USING btree ("vmid");
+CREATE INDEX "workload_ips_tb_pid_idx" ON "public"."workload_ips_tb" USING btree ("pid");
+-- exact lookups use the btree, subnet (<<=) lookups the GiST index
+CREATE INDEX "workload_ips_tb_address_idx" ON "public"."workload_ips_tb" USING btree ("address");
+CREATE INDEX "workload_ips_tb_address_gist_idx" ON "public"."workload_ips_tb" USING gist ("address" inet_ops);
+
+CREATE SEQUENCE os_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE "public"."os_tb" (
+    "id" integer DEFAULT nextval('os_tb_id_seq') NOT NULL,
+    "name" character varying(120) NOT NULL,
+    CONSTRAINT "os_tb_pkey" PRIMARY KEY ("id"),
+    CONSTRAINT "os_tb_name_key" UNIQUE ("name")
 ) WITH (oids = false);
 
+CREATE SEQUENCE clusters_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE "public"."clusters_tb" (
+    "id" integer DEFAULT nextval('clusters_tb_id_seq') NOT NULL,
+    "name" character varying(100) NOT NULL,
+    CONSTRAINT "clusters_tb_pkey" PRIMARY KEY ("id"),
+    CONSTRAINT "clusters_tb_name_key" UNIQUE ("name")
+) WITH (oids = false);
+
+CREATE SEQUENCE datacenters_tb_id_seq INCREMENT 1 MINVALUE 1 MAXVALUE 2147483647 CACHE 1;
+
+CREATE TABLE "public"."datacenters_tb" (
+    "id" integer DEFAULT nextval('datacenters_tb_id_seq') NOT NULL,
+    "name" character varying(100) NOT NULL,
+    CONSTRAINT "datacenters_tb_pkey" PRIMARY KEY ("id"),
+    CONSTRAINT "datacenters_tb_name_key" UNIQUE ("name")
+) WITH (oids = false);
+
+CREATE INDEX "workloads_tb_os_id_idx" ON "public"."workloads_tb" USING btree ("os_id");
+CREATE INDEX "workloads_tb_cluster_id_idx" ON "public"."workloads_tb" USING btree ("cluster_id");
+CREATE INDEX "workloads_tb_datacenter_id_idx" ON "public"."workloads_tb" USING btree ("datacenter_id");
+
+-- Cross-project search: substring (ILIKE '%...%') matches served by trigram indexes
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX "workloads_tb_pid_idx" ON "public"."workloads_tb" USING btree ("pid");
+CREATE INDEX "workloads_tb_vmname_trgm_idx" ON "public"."workloads_tb" USING gin ("vmname" gin_trgm_ops);
+CREATE INDEX "workloads_tb_ip_addresses_trgm_idx" ON "public"."workloads_tb" USING gin ("ip_addresses" gin_trgm_ops);
+CREATE INDEX "os_tb_name_trgm_idx" ON "public"."os_tb" USING gin ("name" gin_trgm_ops);
+CREATE INDEX "clusters_tb_name_trgm_idx" ON "public"."clusters_tb" USING gin ("name" gin_trgm_ops);
+
 
 ALTER TABLE ONLY "public"."projects_tb" ADD CONSTRAINT "projects_tb_userid_fkey" FOREIGN KEY (userid) REFERENCES users_tb(id) NOT DEFERRABLE;
 
-ALTER TABLE ONLY "public"."workloads_tb" ADD CONSTRAINT "workloads_tb_pid_fkey" FOREIGN KEY (pid) REFERENCES projects_tb(pid) NOT DEFERRABLE;
+ALTER TABLE "public"."workloads_tb" ADD CONSTRAINT "workloads_tb_pid_fkey" FOREIGN KEY (pid) REFERENCES projects_tb(pid) NOT DEFERRABLE;
+
+ALTER TABLE ONLY "public"."imports_tb" ADD CONSTRAINT "imports_tb_pid_fkey" FOREIGN KEY (pid) REFERENCES projects_tb(pid) NOT DEFERRABLE;
+
+ALTER TABLE ONLY "public"."workload_ips_tb" ADD CONSTRAINT "workload_ips_tb_vmid_fkey" FOREIGN KEY (vmid, pid) REFERENCES workloads_tb(vmid, pid) ON DELETE CASCADE NOT DEFERRABLE;
+
+ALTER TABLE ONLY "public"."workload_ips_tb" ADD CONSTRAINT "workload_ips_tb_pid_fkey" FOREIGN KEY (pid) REFERENCES projects_tb(pid) NOT DEFERRABLE;
+
+ALTER TABLE "public"."workloads_tb" ADD CONSTRAINT "workloads_tb_os_id_fkey" FOREIGN KEY (os_id) REFERENCES os_tb(id) NOT DEFERRABLE;
+
+ALTER TABLE "public"."workloads_tb" ADD CONSTRAINT "workloads_tb_cluster_id_fkey" FOREIGN KEY (cluster_id) REFERENCES clusters_tb(id) NOT DEFERRABLE;
+
+ALTER TABLE "public"."workloads_tb" ADD CONSTRAINT "workloads_tb_datacenter_id_fkey" FOREIGN KEY (datacenter_id) REFERENCES datacenters_tb(id) NOT DEFERRABLE;
 GRANT ALL ON ALL TABLES IN SCHEMA public TO inventorydbuser;
 GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA public TO inventorydbuser;
 
@@ -171,6 +171,7 @@ def test_health_endpoint_healthy(client):
     assert 'timestamp' in json_data
     assert json_data['service'] == 'flask-workload-parser'
     assert json_data['version'] == '1.0.0'
+    assert set(json_data) == {'status', 'timestamp', 'service', 'version'}  # stats are on /metrics
 
 
 def test_cancel_upload(client, test_user):
@@ -0,0 +1,143 @@
+"""
+Tests for import admission.
+"""
+import os
+import subprocess
+import sys
+import pandas as pd
+import pytest
+from parser.admission import (ImportAdmission, ImportBusyError, estimate_import_memory, estimate_save_memory,
+                              import_semaphore, import_slot)
+from parser.models import Workload
+from parser.resources import MB
+from parser.staging import load_staged, stage_frame, staged_memory
+from parser.transform.schema import conform_workload_frame
+from parser.transform.registry import get_transform
+
+
+def test_import_slot_waits_and_rejects(app):
+    """Test that imports beyond the worker's slots are turned away after the queue timeout"""
+    app.config.update(IMPORT_CONCURRENCY=1, IMPORT_QUEUE_TIMEOUT=0)
+    with import_slot():
+        with pytest.raises(ImportBusyError) as excinfo:
+            with import_slot():
+                pass
+        assert excinfo.value.retry_after >= 1
+    # the slot is released again
+    with import_slot():
+        pass
+
+
+def test_busy_upload_is_rejected(app, client, test_user, test_project, tmp_path):
+    """Test that process_upload redirects with a message while all slots are taken"""
+    app.config.update(IMPORT_CONCURRENCY=1, IMPORT_QUEUE_TIMEOUT=0)
+    upload = tmp_path / 'inventory.xlsx'
+    upload.write_bytes(b'x')
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+
+    semaphore = import_semaphore(app)
+    semaphore.acquire()
+    try:
+        response = client.get('/process_upload', query_string={
+            'input_path': str(tmp_path), 'file_name': upload.name, 'file_type': 'rv-tools',
+            'project_id': test_project.pid}, follow_redirects=True)
+    finally:
+        semaphore.release()
+    assert 'busy processing other imports' in response.get_data(as_text=True)
+    assert not upload.exists()
+
+
+def test_busy_save_is_rejected(app, client, test_user, test_project, db_session, tmp_path):
+    """Test that save_workloads queues for a slot sized from the staged frame and keeps the upload while busy"""
+    app.config.update(IMPORT_CONCURRENCY=1, IMPORT_QUEUE_TIMEOUT=0, IMPORT_SAVE_MEMORY_FACTOR=4,
+                      STAGING_FOLDER=str(tmp_path))
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    frame = conform_workload_frame(pd.read_csv('tests/test_files/rvtools_expected_df.csv'))
+    token = stage_frame(frame)
+    with client.session_transaction() as sess:
+        sess['staged_upload'] = token
+        sess['project_id'] = test_project.pid
+        sess['file_name'] = 'rvtools_file_sample.xlsx'
+        sess['file_type'] = 'rv-tools'
+    assert estimate_save_memory(staged_memory(token)) == 4 * int(frame.memory_usage(deep=True).sum())
+
+    semaphore = import_semaphore(app)
+    semaphore.acquire()
+    try:
+        response = client.post('/save_workloads', follow_redirects=True)
+    finally:
+        semaphore.release()
+    assert 'busy processing other imports' in response.get_data(as_text=True)
+    assert Workload.query.filter_by(pid=test_project.pid).count() == 0
+    assert load_staged(token) is not None
+
+    response = client.post('/save_workloads', follow_redirects=False)
+    assert response.status_code == 302
+    assert Workload.query.filter_by(pid=test_project.pid).count() == len(frame)
+
+
+def test_admission_shares_budget_between_workers(tmp_path):
+    """Test that reservations made through one controller count for another on the same file"""
+    path = str(tmp_path / 'imports.json')
+    worker_a = ImportAdmission(path, budget=1000 * MB, limit=2000 * MB, usage=lambda: None)
+    worker_b = ImportAdmission(path, budget=1000 * MB, limit=2000 * MB, usage=lambda: None)
+
+    first = worker_a.acquire(600 * MB, timeout=0)
+    ticket, wait = worker_b.try_acquire(600 * MB)
+    assert ticket is None and wait >= 1
+    with pytest.raises(ImportBusyError) as excinfo:
+        worker_b.acquire(600 * MB, timeout=0)
+    assert excinfo.value.retry_after == wait
+    assert worker_b.try_acquire(300 * MB)[0] is not None
+
+    worker_a.release(first)
+    assert worker_b.stats()['reserved_bytes'] == 300 * MB
+
+
+def test_admission_limits(tmp_path):
+    """Test rejection of oversized imports, the memory usage check and dead workers' reservations"""
+    usage = {'bytes': 1500 * MB}
+    admission = ImportAdmission(str(tmp_path / 'imports.json'), budget=1600 * MB, limit=2000 * MB,
+                                usage=lambda: usage['bytes'])
+    with pytest.raises(ImportBusyError) as excinfo:
+        admission.acquire(3000 * MB, timeout=0)
+    assert excinfo.value.retry_after is None
+
+    # runs alone even though the usage is high; a second import must fit the usage too
+    ticket = admission.acquire(500 * MB, timeout=0)
+    assert admission.try_acquire(400 * MB)[0] is None
+    usage['bytes'] = 800 * MB
+    second, _ = admission.try_acquire(400 * MB)
+    assert second is not None
+    admission.release(ticket)
+    admission.release(second)
+
+    # a worker killed mid-import leaves its reservation behind
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    with admission._state() as state:
+        state['active']['lost'] = {'pid': dead.pid, 'bytes': 1600 * MB, 'started': 0}
+    assert admission.stats()['active'] == 0
+
+
+def test_admission_stats_are_read_only(tmp_path):
+    """Test that reading the stats neither creates nor rewrites the state file"""
+    path = tmp_path / 'imports.json'
+    admission = ImportAdmission(str(path), budget=1000 * MB, usage=lambda: None)
+    assert admission.stats()['active'] == 0
+    assert not path.exists() and not (tmp_path / 'imports.json.lock').exists()
+
+    ticket = admission.acquire(100 * MB, timeout=0)
+    written = path.stat().st_mtime_ns
+    assert admission.stats()['reserved_bytes'] == 100 * MB
+    assert path.stat().st_mtime_ns == written
+    admission.release(ticket)
+
+
+def test_estimate_import_memory(app):
+    """Test that workbooks are sized from the dimensions of the sheets the format reads"""
+    app.config.update(IMPORT_BYTES_PER_CELL=100, IMPORT_FILE_MEMORY_FACTOR=10)
+    # vInfo 6x90, vDisk 7x49, vPartition 7x31
+    assert estimate_import_memory('tests/test_files', 'rvtools_file_sample.xlsx', get_transform('rv-tools')) == 110000
+    size = os.path.getsize('tests/test_files/govc_vm_info_sample.json')
+    assert estimate_import_memory('tests/test_files', 'govc_vm_info_sample.json', get_transform('govc-json')) == size * 10
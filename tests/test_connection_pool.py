@@ -0,0 +1,75 @@
+"""
+Tests for database connection pool configuration and reuse under load.
+"""
+import threading
+import pytest
+from sqlalchemy import event
+from parser.app import db
+from parser.config import Config, DB_POOL_SETTINGS, engine_options
+
+
+def _settings(uri, **overrides):
+    settings = {key: getattr(Config, key) for key in DB_POOL_SETTINGS}
+    settings['SQLALCHEMY_DATABASE_URI'] = uri
+    settings.update(overrides)
+    return settings
+
+
+def test_engine_options_postgres():
+    """Test pool options for PostgreSQL, including the statement timeout"""
+    options = engine_options(_settings('postgresql://u:p@db/inventorydb',
+                                       DB_POOL_SIZE=3, DB_MAX_OVERFLOW=2, DB_STATEMENT_TIMEOUT_MS=5000))
+
+    assert options['pool_size'] == 3
+    assert options['max_overflow'] == 2
+    assert options['pool_pre_ping'] is Config.DB_POOL_PRE_PING
+    assert options['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+
+def test_engine_options_without_statement_timeout():
+    """Test that a zero statement timeout adds no connect arguments"""
+    options = engine_options(_settings('postgresql://u:p@db/inventorydb', DB_STATEMENT_TIMEOUT_MS=0))
+
+    assert 'connect_args' not in options
+
+
+def test_engine_options_sqlite():
+    """Test that SQLite engines get no pool sizing arguments"""
+    options = engine_options(_settings('sqlite:///:memory:'))
+
+    assert 'pool_size' not in options
+    assert 'pool_recycle' in options
+
+
+def test_app_applies_engine_options(app):
+    """Test that create_app passes the pool options to the engine"""
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS'] == engine_options(app.config)
+    assert db.engine.pool._pre_ping is app.config['DB_POOL_PRE_PING']
+
+
+@pytest.mark.slow
+def test_no_connection_churn_under_concurrent_requests(app):
+    """Test that concurrent requests reuse pooled connections instead of reconnecting"""
+    threads_count, requests_per_thread = 8, 25
+    connects, checkouts = [], []
+    event.listen(db.engine, 'connect', lambda *args: connects.append(1))
+    event.listen(db.engine, 'checkout', lambda *args: checkouts.append(1))
+    errors = []
+
+    def worker():
+        with app.test_client() as client:
+            for _ in range(requests_per_thread):
+                response = client.get('/health')
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(checkouts) >= threads_count * requests_per_thread
+    # every new connection beyond the pool capacity would indicate churn
+    assert len(connects) <= app.config['DB_POOL_SIZE'] + app.config['DB_MAX_OVERFLOW']
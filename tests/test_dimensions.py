@@ -0,0 +1,78 @@
+"""
+Tests for the interned OS, cluster and datacenter dimension tables.
+"""
+import pandas as pd
+from parser.app import db
+from parser.dimensions import dimension_distribution, intern_names
+from parser.models import Cluster, Datacenter, OperatingSystem, Workload
+from parser.workload_sync import merge_workloads
+
+
+def _dimensions(workload):
+    pairs = ((OperatingSystem, workload.os_id), (Cluster, workload.cluster_id), (Datacenter, workload.datacenter_id))
+    return tuple(db.session.get(model, key).name if key else None for model, key in pairs)
+
+
+def test_intern_names_reuses_rows(app, db_session):
+    """Test that each name gets exactly one row and empty names are skipped"""
+    first = intern_names(OperatingSystem, ['Ubuntu Linux (64-bit)', 'CentOS 7 (64-bit)', '', None])
+    second = intern_names(OperatingSystem, ['CentOS 7 (64-bit)', 'Ubuntu Linux (64-bit)', 'Photon OS (64-bit)'])
+    assert set(first) == {'Ubuntu Linux (64-bit)', 'CentOS 7 (64-bit)'}
+    assert {name: second[name] for name in first} == first
+    assert OperatingSystem.query.filter(OperatingSystem.name.in_(second)).count() == 3
+
+
+def test_orm_workloads_are_interned(test_project, db_session):
+    """Test that single inserts and name edits set the dimension IDs and no strings are stored"""
+    assert not {'os', 'cluster', 'virtualdatacenter'} & set(Workload.__table__.columns.keys())
+    workload = Workload(pid=test_project.pid, vmname='web01', os='Ubuntu Linux (64-bit)',
+                        cluster='prod', virtualdatacenter='DC1')
+    db_session.add(workload)
+    db_session.commit()
+    assert _dimensions(workload) == ('Ubuntu Linux (64-bit)', 'prod', 'DC1')
+
+    workload.cluster = 'dev'
+    workload.os = None
+    db_session.commit()
+    db_session.expire_all()
+    assert _dimensions(workload) == (None, 'dev', 'DC1')
+    assert (workload.os, workload.cluster, workload.virtualdatacenter) == (None, 'dev', 'DC1')
+
+
+def test_merge_sets_dimension_ids(test_project, db_session):
+    """Test that merged inserts and updates carry the IDs of their strings"""
+    incoming = pd.DataFrame({
+        'mobid': ['vm-1', 'vm-2'],
+        'virtualdatacenter': ['DC1', 'DC1'],
+        'vmname': ['web01', 'db01'],
+        'os': ['Ubuntu Linux (64-bit)', 'Microsoft Windows Server 2019 (64-bit)'],
+        'cluster': ['prod', 'prod'],
+    })
+    merge_workloads(test_project.pid, incoming)
+    db_session.commit()
+    merge_workloads(test_project.pid, incoming.assign(cluster=['prod', 'dev']))
+    db_session.commit()
+
+    workloads = Workload.query.filter_by(pid=test_project.pid).order_by(Workload.vmname).all()
+    assert [_dimensions(workload) for workload in workloads] == [
+        ('Microsoft Windows Server 2019 (64-bit)', 'dev', 'DC1'),
+        ('Ubuntu Linux (64-bit)', 'prod', 'DC1'),
+    ]
+    assert workloads[0].datacenter_id == workloads[1].datacenter_id
+
+
+def test_dimension_analytics(client, test_user, test_project, db_session):
+    """Test the ID-based analytics counts"""
+    db_session.add_all([
+        Workload(pid=test_project.pid, vmname=f'vm{index}', os=os, cluster='prod', virtualdatacenter='DC1')
+        for index, os in enumerate(['Ubuntu Linux (64-bit)', 'Ubuntu Linux (64-bit)', 'CentOS 7 (64-bit)'])
+    ])
+    db_session.commit()
+
+    assert dimension_distribution(Workload.os_id, OperatingSystem, test_user.id) == [
+        ('Ubuntu Linux (64-bit)', 2), ('CentOS 7 (64-bit)', 1)]
+    assert dimension_distribution(Workload.cluster_id, Cluster, test_user.id) == [('prod', 3)]
+
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    page = client.get('/analytics').get_data(as_text=True)
+    assert 'CentOS 7 (64-bit)' in page and 'prod' in page
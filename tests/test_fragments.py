@@ -0,0 +1,60 @@
+"""
+Tests for cached template fragments and the compiled-template cache.
+"""
+import os
+
+from flask import render_template_string
+
+from parser.models import Workload
+
+
+def _login(client, user):
+    client.post('/login', data={'username': user.username, 'password': 'testpassword123'})
+
+
+def test_cache_tag_keys_on_its_arguments(app):
+    """Test that a cache block is rendered once per key and escapes like the rest of the template"""
+    template = "{% cache 'greeting', version %}{{ name }}{% endcache %}"
+    with app.test_request_context():
+        assert render_template_string(template, version=1, name='<b>first</b>') == '&lt;b&gt;first&lt;/b&gt;'
+        assert render_template_string(template, version=1, name='second') == '&lt;b&gt;first&lt;/b&gt;'
+        assert render_template_string(template, version=2, name='second') == 'second'
+
+        # the block's template code is part of the key
+        assert render_template_string("{% cache 'greeting', 1 %}{{ name }}!{% endcache %}", name='third') == 'third!'
+
+        app.config['FRAGMENT_CACHE_TTL'] = 0
+        assert render_template_string(template, version=1, name='fourth') == 'fourth'
+
+
+def test_project_table_follows_content_version(app, client, test_user, test_project, db_session):
+    """Test that the workload table is reused until the project's content version changes"""
+    db_session.add(Workload(pid=test_project.pid, vmname='first-vm', vcpu=2, vram=2048))
+    test_project.bump_content_version()
+    db_session.commit()
+    _login(client, test_user)
+
+    page = client.get(f'/view_project/{test_project.pid}').get_data(as_text=True)
+    assert 'first-vm' in page
+    # the Delete buttons of the cached rows submit the one form carrying this session's CSRF token
+    assert page.count('form="delete-workload-form"') == 1
+    assert 'id="delete-workload-form"' in page
+
+    # a change that does not bump the version is not picked up...
+    db_session.add(Workload(pid=test_project.pid, vmname='second-vm', vcpu=4, vram=4096))
+    db_session.commit()
+    page = client.get(f'/view_project/{test_project.pid}').get_data(as_text=True)
+    assert 'second-vm' not in page
+
+    # ...until it does, as every route changing workloads does
+    test_project.bump_content_version()
+    db_session.commit()
+    page = client.get(f'/view_project/{test_project.pid}').get_data(as_text=True)
+    assert 'second-vm' in page
+    assert 'Workloads (2)' in page
+
+
+def test_templates_are_compiled_to_the_bytecode_cache(app, client):
+    """Test that rendering a page stores its compiled template on disk"""
+    assert client.get('/login').status_code == 200
+    assert os.listdir(app.config['TEMPLATE_CACHE_FOLDER'])
@@ -0,0 +1,114 @@
+"""
+Tests for host-count sizing (first-fit decreasing) and the /host_sizing and /reports views.
+"""
+import time
+import numpy as np
+from parser.host_sizing import HostProfile, first_fit_decreasing, size_hosts
+from parser.models import Workload
+
+
+def _arrays(vcpu, vram_gb, storage_gb, cluster=None, vmstate=None):
+    size = len(vcpu)
+    return {
+        'vmid': np.arange(size),
+        'vmname': np.array([f'vm{i}' for i in range(size)], dtype=object),
+        'cluster': np.array(cluster or ['c1'] * size, dtype=object),
+        'vmstate': np.array(vmstate or ['poweredOn'] * size, dtype=object),
+        'vcpu': np.asarray(vcpu, dtype=np.float64),
+        'vram_gb': np.asarray(vram_gb, dtype=np.float64),
+        'storage_total_gb': np.asarray(storage_gb, dtype=np.float64),
+        'storage_used_gb': np.asarray(storage_gb, dtype=np.float64) / 2,
+        **{name: np.full(size, np.nan) for name in (
+            'avg_cpu_percent', 'peak_cpu_percent', 'avg_memory_percent', 'peak_memory_percent')},
+    }
+
+
+def test_first_fit_decreasing_packing():
+    """Test that FFD fills hosts in every dimension and flags oversized VMs"""
+    capacity = np.array([10.0, 10.0, 10.0])
+    demand = np.array([[6, 1, 1], [5, 1, 1], [4, 1, 1], [5, 1, 1], [1, 9, 1], [20, 1, 1]], dtype=np.float64)
+
+    assignment, hosts, oversized = first_fit_decreasing(demand, capacity)
+
+    # by dominant share: 20 alone, then (1,9,1)+(6,1,1) exhaust RAM, 5+5 fill CPU, 4 opens a new host
+    assert oversized == 1
+    assert hosts == 4
+    assert assignment.tolist() == [1, 2, 3, 2, 1, 0]
+
+
+def test_first_fit_decreasing_is_feasible():
+    """Test that no host is overfilled on random input"""
+    rng = np.random.default_rng(1)
+    capacity = np.array([100.0, 512.0, 4000.0])
+    demand = np.column_stack([rng.integers(1, 16, 2000), rng.integers(1, 64, 2000), rng.uniform(10, 500, 2000)])
+
+    assignment, hosts, oversized = first_fit_decreasing(demand, capacity)
+
+    load = np.zeros((hosts, 3))
+    np.add.at(load, assignment, demand)
+    assert oversized == 0
+    assert (load <= capacity + 1e-9).all()
+    assert hosts >= np.ceil(demand.sum(axis=0) / capacity).max()
+
+
+def test_size_hosts_per_cluster():
+    """Test cluster grouping, HA spares and the powered-on filter"""
+    arrays = _arrays(vcpu=[16, 16, 8, 4], vram_gb=[64, 64, 32, 8], storage_gb=[100, 100, 100, 100],
+                     cluster=['prod', 'prod', 'dev', None],
+                     vmstate=['poweredOn', 'poweredOn', 'poweredOn', 'poweredOff'])
+    profile = HostProfile(cores=16, ram_gb=128, storage_gb=1000, cpu_overcommit=1,
+                          max_utilization=1, ha_hosts=1)
+
+    sizing = size_hosts(arrays, profile)
+    clusters = {cluster['name']: cluster for cluster in sizing['clusters']}
+    assert sizing['clusters'][0]['name'] == 'prod'
+    assert clusters['prod']['hosts'] == 2
+    assert clusters['prod']['total_hosts'] == 3
+    assert clusters['prod']['binding'] == 'vcpu'
+    assert clusters['Unassigned']['vms'] == 1
+    assert sizing['totals']['total_hosts'] == 7
+
+    powered_on = size_hosts(arrays, profile, powered_on_only=True)
+    assert 'Unassigned' not in {cluster['name'] for cluster in powered_on['clusters']}
+
+    pooled = size_hosts(arrays, profile, per_cluster=False)
+    assert [cluster['name'] for cluster in pooled['clusters']] == ['All workloads']
+    assert pooled['totals']['hosts'] == 3
+
+
+def test_size_hosts_50k_vms_under_a_second():
+    """Test that packing a large project stays interactive"""
+    rng = np.random.default_rng(0)
+    size = 50_000
+    arrays = _arrays(vcpu=rng.integers(1, 16, size).tolist(), vram_gb=rng.integers(1, 128, size).tolist(),
+                     storage_gb=rng.uniform(10, 2000, size).tolist(),
+                     cluster=[f'cluster-{i % 8}' for i in range(size)])
+
+    started = time.perf_counter()
+    sizing = size_hosts(arrays)
+    assert time.perf_counter() - started < 1
+    assert sizing['totals']['vms'] == size
+
+
+def test_host_sizing_endpoint_and_report(client, test_user, test_project, db_session):
+    """Test the JSON endpoint and the sizing section of the reports page"""
+    db_session.add_all([
+        Workload(pid=test_project.pid, vmname=f'web-{i}', cluster='prod', vmstate='poweredOn',
+                 vcpu=8, vram=32768, vmdktotal=200, vmdkused=50)
+        for i in range(10)
+    ])
+    db_session.commit()
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+
+    data = client.get(f'/host_sizing/{test_project.pid}?cores=32&cpu_overcommit=1&max_utilization=1').get_json()
+    assert data['capacity']['vcpu'] == 32
+    assert data['clusters'][0]['name'] == 'prod'
+    assert data['clusters'][0]['hosts'] == 3
+    assert data['totals']['total_hosts'] == 4
+
+    assert client.get(f'/host_sizing/{test_project.pid}?storage_basis=thin').status_code == 400
+    assert client.get(f'/host_sizing/{test_project.pid}?cores=0').status_code == 400
+
+    page = client.get(f'/reports?project_id={test_project.pid}').get_data(as_text=True)
+    assert 'host-sizing-table' in page
+    assert 'rightsizing-summary' in page
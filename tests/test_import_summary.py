@@ -0,0 +1,90 @@
+"""
+Tests for the per-import summary computed by the transforms and stored on save.
+"""
+import shutil
+import pandas as pd
+from parser.models import WorkloadImport
+from parser.staging import load_staged, stage_frame
+from parser.transform.summary import summarize_workloads
+from parser.transform.transform_lova import lova_conversion
+from parser.transform.transform_rvtools import rvtools_conversion
+
+
+def test_summarize_workloads():
+    """Test the totals, powered-on ratio and OS mix"""
+    frame = pd.DataFrame({
+        'vmState': ['poweredOn', 'poweredOn', 'poweredOff', 'poweredOn'],
+        'os': ['Linux', 'Windows', 'Linux', None],
+        'vCpu': [2, 4, 1, 1],
+        'vRam': [4.0, 8.0, 2.0, 0.5],
+        'vmdkTotal': [100.0, 200.0, 50.0, 10.0],
+        'vmdkUsed': [10.0, 20.0, 5.0, 1.0],
+    })
+
+    summary = summarize_workloads(frame, os_limit=1)
+
+    assert summary['workloads'] == 4
+    assert summary['powered_on'] == 3
+    assert summary['powered_on_ratio'] == 0.75
+    assert summary['vcpu'] == 8
+    assert summary['vram_gb'] == 14.5
+    assert summary['storage_provisioned_gb'] == 360.0
+    assert summary['storage_used_gb'] == 36.0
+    assert summary['os_mix'] == [['Linux', 2], ['Other', 2]]
+
+
+def test_summarize_empty_frame():
+    """Test that an empty frame doesn't divide by zero"""
+    summary = summarize_workloads(pd.DataFrame())
+    assert summary['workloads'] == 0
+    assert summary['powered_on_ratio'] == 0.0
+    assert summary['os_mix'] == []
+
+
+def test_transforms_attach_summary():
+    """Test that both transforms return their summary in the frame attrs"""
+    rvtools_df = rvtools_conversion(input_path='tests/test_files/', file_name='rvtools_file_sample.xlsx')
+    lova_df = lova_conversion(input_path='tests/test_files/', file_name='liveoptics_file_sample.xlsx')
+
+    for frame in (rvtools_df, lova_df):
+        summary = frame.attrs['summary']
+        assert summary == summarize_workloads(frame)
+        assert sum(count for _, count in summary['os_mix']) == len(frame)
+
+
+def test_summary_survives_staging(staging_app):
+    """Test that the summary is staged along with the frame"""
+    rvtools_df = rvtools_conversion(input_path='tests/test_files/', file_name='rvtools_file_sample.xlsx')
+    token = stage_frame(rvtools_df)
+
+    assert load_staged(token).attrs['summary'] == rvtools_df.attrs['summary']
+
+
+def test_save_records_import(staging_app, client, test_user, test_project, tmp_path, db_session):
+    """Test that saving an upload stores its summary and the pages show it"""
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    shutil.copy('tests/test_files/rvtools_file_sample.xlsx', tmp_path)
+    response = client.get('/process_upload', query_string={
+        'input_path': str(tmp_path),
+        'file_type': 'rv-tools',
+        'file_name': 'rvtools_file_sample.xlsx',
+        'project_id': test_project.pid,
+    })
+    assert 'preview-os-mix' in response.get_data(as_text=True)
+
+    response = client.post('/save_workloads', data={'import_mode': 'append'})
+    assert response.status_code == 302
+
+    imports = db_session.query(WorkloadImport).filter_by(pid=test_project.pid).all()
+    assert len(imports) == 1
+    record = imports[0]
+    assert record.file_name == 'rvtools_file_sample.xlsx'
+    assert record.file_type == 'rv-tools'
+    assert record.import_mode == 'append'
+    assert record.workload_count == record.summary['workloads'] > 0
+
+    html = client.get(f'/view_project/{test_project.pid}').get_data(as_text=True)
+    assert 'recent-imports' in html
+    html = client.get('/analytics').get_data(as_text=True)
+    assert 'recent-imports-table' in html
+    assert 'rvtools_file_sample.xlsx' in html
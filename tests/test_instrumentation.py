@@ -0,0 +1,109 @@
+"""
+Tests for the opt-in request instrumentation and /metrics endpoint.
+"""
+import json
+import logging
+import pytest
+from parser.app import create_app
+from parser.instrumentation import MetricsRegistry, span
+from parser.log import JsonFormatter
+
+
+@pytest.fixture
+def instrumented_app(postgres_container):
+    """Flask app with instrumentation enabled"""
+    app = create_app(config={
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': postgres_container.get_connection_url(),
+        'WTF_CSRF_ENABLED': False,
+        'SECRET_KEY': 'test-secret-key',
+        'INSTRUMENTATION_ENABLED': True,
+    })
+    with app.app_context():
+        yield app
+
+
+def test_metrics_disabled_by_default(client):
+    """Test that /metrics only exists when instrumentation is enabled"""
+    assert client.get('/metrics').status_code == 404
+
+
+def test_span_outside_request_is_noop():
+    """Test that spans can be used outside a request"""
+    with span('read_sheet'):
+        value = 1
+    assert value == 1
+
+
+def test_metrics_registry_render():
+    """Test the Prometheus text rendering"""
+    registry = MetricsRegistry()
+    registry.describe('parser_db_queries_total', 'Database queries executed')
+    registry.inc('parser_db_queries_total', 3, endpoint='pages.home')
+    registry.observe('parser_span_duration_seconds', 0.5, span='read "sheet"')
+    registry.observe('parser_span_duration_seconds', 0.25, span='read "sheet"')
+
+    text = registry.render({'parser_user_cache_hits': 4})
+
+    assert '# HELP parser_db_queries_total Database queries executed' in text
+    assert 'parser_db_queries_total{endpoint="pages.home"} 3' in text
+    assert 'parser_span_duration_seconds_count{span="read \\"sheet\\""} 2' in text
+    assert 'parser_span_duration_seconds_sum{span="read \\"sheet\\""} 0.750000' in text
+    assert 'parser_user_cache_hits 4' in text
+
+
+def test_request_metrics_exported(instrumented_app):
+    """Test that requests are timed and exported on /metrics"""
+    client = instrumented_app.test_client()
+    assert client.get('/health').status_code == 200
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    text = response.get_data(as_text=True)
+    assert 'parser_http_request_duration_seconds_count{endpoint="pages.health",method="GET",status="200"} 1' in text
+    assert 'parser_db_queries_total{endpoint="pages.health"} 1' in text
+    assert 'parser_user_cache_hits' in text
+    assert 'parser_import_admission_reserved_bytes 0' in text
+
+
+def test_metrics_survive_failing_stats(instrumented_app, monkeypatch):
+    """Test that a stats source that fails is reported as down without failing the scrape"""
+    from parser.shared_cache import SharedCache, shared_cache
+
+    def locked(self):
+        raise OSError('database is locked')
+
+    shared_cache()
+    monkeypatch.setattr(SharedCache, 'stats', locked)
+    response = instrumented_app.test_client().get('/metrics')
+
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert 'parser_shared_cache_stats_up 0' in text
+    assert 'parser_user_cache_stats_up 1' in text
+    assert instrumented_app.test_client().get('/health').status_code == 200
+
+
+def test_spans_and_request_log(instrumented_app, caplog):
+    """Test that spans are attributed to the request and logged as structured fields"""
+    @instrumented_app.route('/_span_test')
+    def span_test():
+        with span('read_sheet'):
+            pass
+        with span('read_sheet'):
+            pass
+        return 'ok'
+
+    with caplog.at_level(logging.INFO, logger='parser.instrumentation'):
+        instrumented_app.test_client().get('/_span_test')
+
+    record = caplog.records[-1]
+    assert record.getMessage() == 'GET /_span_test 200'
+    assert record.event == 'request'
+    assert record.path == '/_span_test'
+    assert record.status == 200
+    assert set(record.spans_ms) == {'read_sheet'}
+    assert json.loads(JsonFormatter().format(record))['db_queries'] == 0
+    assert 'parser_span_duration_seconds_count{endpoint="span_test",span="read_sheet"} 1' in \
+        instrumented_app.extensions['metrics'].render()
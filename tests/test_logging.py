@@ -0,0 +1,105 @@
+"""
+Tests for structured logging of the transforms.
+"""
+import json
+import logging
+from parser.log import JsonFormatter, TextFormatter, configure_logging, flush_logging
+from parser.transform.data_validation import filetype_validation
+from parser.transform.pipeline import stage
+from parser.transform.transform_rvtools import rvtools_conversion
+
+
+def _record(msg, args=(), level=logging.INFO, **extra):
+    record = logging.LogRecord('parser.test', level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_fields():
+    """Test that extra fields become top-level JSON keys"""
+    line = JsonFormatter().format(_record('Parsed %s', ('inventory.xlsx',), rows=3, duration_ms=1.5))
+    entry = json.loads(line)
+
+    assert entry['message'] == 'Parsed inventory.xlsx'
+    assert entry['level'] == 'INFO'
+    assert entry['logger'] == 'parser.test'
+    assert entry['rows'] == 3
+    assert entry['duration_ms'] == 1.5
+    assert {'ts', 'pid'} <= set(entry)
+
+
+def test_text_formatter_fields():
+    """Test that extra fields are appended as key=value"""
+    line = TextFormatter().format(_record('Parsed %s', ('inventory.xlsx',), rows=3))
+    assert line.endswith('parser.test: Parsed inventory.xlsx rows=3')
+
+
+def test_configure_logging_writes_json_to_stderr(app, capsys):
+    """Test that parser logs are written by the background writer as JSON lines"""
+    logging.getLogger('parser.test').info('hello %s', 'world', extra={'rows': 2})
+    flush_logging()
+
+    captured = capsys.readouterr()
+    entry = json.loads(captured.err.strip().splitlines()[-1])
+    assert entry['message'] == 'hello world'
+    assert entry['rows'] == 2
+    assert captured.out == ''
+
+
+def test_log_level_gates_debug(app, capsys):
+    """Test that records below LOG_LEVEL are dropped"""
+    configure_logging('WARNING', 'json')
+    try:
+        logging.getLogger('parser.test').info('not written')
+        flush_logging()
+        assert 'not written' not in capsys.readouterr().err
+    finally:
+        configure_logging(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'])
+
+
+def test_unknown_log_format_falls_back_to_json(app, capsys):
+    """Test that a format other than json/text (e.g. an old %-style string) is reported and logs JSON"""
+    configure_logging('INFO', '%(asctime)s %(levelname)s %(name)s %(message)s')
+    try:
+        logging.getLogger('parser.test').info('after fallback')
+        flush_logging()
+        warning, entry = [json.loads(line) for line in capsys.readouterr().err.strip().splitlines()[-2:]]
+        assert warning['level'] == 'WARNING'
+        assert warning['log_format'].startswith('%(asctime)s')
+        assert entry['message'] == 'after fallback'
+    finally:
+        configure_logging(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'])
+
+
+def test_stage_logs_duration_at_debug(caplog):
+    """Test that stages log their duration only when DEBUG is enabled"""
+    with caplog.at_level(logging.INFO, logger='parser.transform.pipeline'):
+        with stage('merge'):
+            pass
+    assert caplog.records == []
+
+    with caplog.at_level(logging.DEBUG, logger='parser.transform.pipeline'):
+        with stage('read_sheet', 'vInfo'):
+            pass
+    record = caplog.records[-1]
+    assert record.getMessage() == 'Stage read_sheet (vInfo) finished'
+    assert record.stage == 'read_sheet'
+    assert record.detail == 'vInfo'
+    assert record.duration_ms >= 0
+
+
+def test_detection_and_transform_log_records(caplog, capsys):
+    """Test that detection and transforms log structured records instead of printing"""
+    with caplog.at_level(logging.INFO, logger='parser.transform'):
+        file_type = filetype_validation('tests/test_files/', 'rvtools_file_sample.xlsx')
+        df = rvtools_conversion(input_path='tests/test_files/', file_name='rvtools_file_sample.xlsx')
+
+    detected = next(r for r in caplog.records if r.name == 'parser.transform.data_validation')
+    assert detected.file_type == file_type == 'rv-tools'
+    assert detected.sheet_count == 27
+    assert detected.duration_ms >= 0
+
+    parsed = next(r for r in caplog.records if r.name == 'parser.transform.transform_rvtools')
+    assert parsed.rows == len(df)
+    assert parsed.duration_ms > 0
+    assert capsys.readouterr().out == ''
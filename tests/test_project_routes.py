@@ -3,8 +3,10 @@ Tests for project-related routes: create, view, edit, delete, export
 """
 import pytest
 import os
+import uuid
 from flask import url_for
-from parser.models import Project, Workload
+from parser.models import Project, Workload, WorkloadImport, WorkloadIP
+from parser.workload_ips import insert_workload_ips
 
 
 def test_create_project_get(client, test_user):
@@ -168,6 +170,32 @@ def test_delete_project(client, test_user, test_project):
     assert deleted_project is None
 
 
+def test_delete_project_with_children(client, test_user, test_project, db_session):
+    """Test that deletion removes workloads, addresses and imports of that project only"""
+    other_project = Project(userid=test_user.id, projectname=f"Keep_{uuid.uuid4().hex[:8]}")
+    db_session.add(other_project)
+    db_session.flush()
+    for project in (test_project, other_project):
+        workloads = [Workload(pid=project.pid, vmname=f'vm{index}', ip_addresses=f'10.0.0.{index}')
+                     for index in range(3)]
+        db_session.add_all(workloads)
+        db_session.add(WorkloadImport(pid=project.pid, file_name='inventory.xlsx', workload_count=3))
+        db_session.flush()
+        insert_workload_ips(project.pid, [w.vmid for w in workloads], [w.ip_addresses for w in workloads])
+    db_session.commit()
+    project_id, other_id = test_project.pid, other_project.pid
+
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    response = client.post(f'/delete_project/{project_id}', follow_redirects=False)
+    assert response.status_code == 302
+
+    db_session.expire_all()
+    for model, kept in ((Workload, 3), (WorkloadIP, 3), (WorkloadImport, 1)):
+        assert model.query.filter_by(pid=project_id).count() == 0
+        assert model.query.filter_by(pid=other_id).count() == kept
+    assert db_session.get(Project, project_id) is None
+
+
 def test_export_project_empty(client, test_user, test_project):
     """Test exporting project with no workloads"""
     # Login first
@@ -0,0 +1,79 @@
+"""
+Tests for the report cache and the project content version that keys it.
+"""
+import os
+import pytest
+from parser.models import Workload
+from parser.report_cache import ReportCache
+
+WORKLOAD_FORM = {
+    'vmname': 'cache-vm', 'vmstate': 'poweredOn', 'vcpu': 4, 'vram': 8192,
+    'vinfo_provisioned': 50.0, 'vinfo_used': 25.0, 'vmdktotal': 100.0, 'vmdkused': 50.0,
+    'readiops': 0, 'writeiops': 0, 'peakreadiops': 0, 'peakwriteiops': 0,
+    'readthroughput': 0, 'writethroughput': 0, 'peakreadthroughput': 0, 'peakwritethroughput': 0,
+}
+
+
+def test_report_cache_persists_across_instances(tmp_path):
+    """Test that a new process (fresh instance) finds reports written by another"""
+    key = ReportCache.key(1, 0, 'host_sizing', {'cores': 64})
+    ReportCache(str(tmp_path)).set(key, {'hosts': 3})
+
+    recycled = ReportCache(str(tmp_path))
+    assert recycled.get(key) == {'hosts': 3}
+    assert recycled.get(key) == {'hosts': 3}
+    assert recycled.stats()['disk_hits'] == 1
+    assert recycled.stats()['memory']['hits'] == 1
+    assert recycled.get(ReportCache.key(1, 0, 'host_sizing', {'cores': 32})) is None
+
+
+def test_report_cache_eviction(tmp_path):
+    """Test LRU eviction on disk and removal of older project versions"""
+    cache = ReportCache(str(tmp_path), maxsize=2, memory_size=0)
+    first, second, third = (ReportCache.key(pid, 0, 'report') for pid in (1, 2, 3))
+    cache.set(first, 'a')
+    cache.set(second, 'b')
+    os.utime(tmp_path / second, (0, 0))  # least recently used
+    cache.set(third, 'c')
+    assert sorted(os.listdir(tmp_path)) == sorted([first, third])
+
+    cache.set(ReportCache.key(1, 1, 'report'), 'a2')
+    assert first not in os.listdir(tmp_path)
+
+    cache.discard_project(1)
+    assert os.listdir(tmp_path) == [third]
+    with pytest.raises(ValueError):
+        ReportCache.key(1, 0, '../report')
+
+
+def test_report_cache_disabled(tmp_path):
+    """Test that a TTL of 0 stores nothing"""
+    cache = ReportCache(str(tmp_path / 'reports'), ttl=0)
+    key = ReportCache.key(1, 0, 'report')
+    cache.set(key, 'a')
+    assert cache.get(key) is None
+    assert not (tmp_path / 'reports').exists()
+
+
+def test_workload_changes_bump_content_version(client, test_user, test_project, db_session):
+    """Test that creating, editing and deleting workloads invalidate cached reports"""
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    url = f'/host_sizing/{test_project.pid}?cores=8&cpu_overcommit=1&max_utilization=1&ha_hosts=0'
+    assert client.get(url).get_json()['totals']['vms'] == 0
+    assert test_project.content_version == 0
+
+    client.post(f'/create_workload/{test_project.pid}', data=WORKLOAD_FORM)
+    db_session.refresh(test_project)
+    assert test_project.content_version == 1
+    assert client.get(url).get_json()['totals']['hosts'] == 1
+
+    workload = Workload.query.filter_by(pid=test_project.pid).one()
+    client.post(f'/edit_workload/{workload.vmid}', data={**WORKLOAD_FORM, 'vcpu': 16})
+    db_session.refresh(test_project)
+    assert test_project.content_version == 2
+    assert client.get(url).get_json()['totals']['oversized_vms'] == 1
+
+    client.post(f'/delete_workload/{workload.vmid}')
+    db_session.refresh(test_project)
+    assert test_project.content_version == 3
+    assert client.get(url).get_json()['totals']['vms'] == 0
@@ -0,0 +1,62 @@
+"""
+Tests for container limit detection and gunicorn worker planning.
+"""
+from parser.resources import (MB, container_cpus, container_memory, container_memory_usage, host_cpus, plan_workers,
+                              process_memory)
+
+
+def _cgroup(tmp_path, files):
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content + '\n')
+    return str(tmp_path)
+
+
+def test_cgroup_v2_limits(tmp_path):
+    """Test reading the CPU quota and memory limit of a cgroup v2 container"""
+    root = _cgroup(tmp_path, {'cpu.max': '50000 100000', 'memory.max': str(512 * MB),
+                              'memory.current': str(100 * MB)})
+    assert container_cpus(root) == min(0.5, host_cpus())
+    assert container_memory(root) == 512 * MB
+    assert container_memory_usage(root) == 100 * MB
+
+
+def test_cgroup_v1_and_unlimited(tmp_path):
+    """Test cgroup v1 files and falling back to the host without limits"""
+    root = _cgroup(tmp_path / 'v1', {'cpu/cpu.cfs_quota_us': '200000', 'cpu/cpu.cfs_period_us': '100000',
+                                     'memory/memory.limit_in_bytes': str(2048 * MB)})
+    assert container_cpus(root) == min(2.0, host_cpus())
+    assert container_memory(root) == 2048 * MB
+
+    root = _cgroup(tmp_path / 'unlimited', {'cpu.max': 'max 100000', 'memory.max': 'max'})
+    assert container_cpus(root) == host_cpus()
+    assert container_memory(root) == container_memory(str(tmp_path / 'missing'))
+    assert container_memory_usage(str(tmp_path / 'missing')) is None
+
+
+def test_plan_workers():
+    """Test that the memory limit caps the CPU-derived worker count"""
+    # 1 CPU, 2 GB: every worker must fit its baseline plus one 1 GB import
+    plan = plan_workers(1, 2048 * MB, worker_memory=200 * MB, import_memory=1024 * MB)
+    assert (plan.workers, plan.import_slots) == (1, 1)
+
+    # memory to spare: CPU bound, threads may import in parallel
+    plan = plan_workers(2, 64 * 1024 * MB, worker_memory=200 * MB, import_memory=1024 * MB, threads=4)
+    assert (plan.workers, plan.import_slots) == (5, 4)
+
+    # fractional quotas round up; unknown memory keeps the CPU bound
+    assert plan_workers(0.5, None, worker_memory=200 * MB, import_memory=1024 * MB).workers == 3
+
+
+def test_process_memory(tmp_path):
+    """Test reading RSS, PSS and private memory from smaps_rollup, and RSS alone from status"""
+    root = _cgroup(tmp_path, {
+        '10/smaps_rollup': 'Rss:  4096 kB\nPss:  1024 kB\nShared_Clean:  3072 kB\n'
+                           'Private_Clean:  512 kB\nPrivate_Dirty:  512 kB',
+        '20/status': 'Name:\tpython\nVmRSS:\t  2048 kB\nThreads:\t1',
+    })
+    assert process_memory(10, root) == (4096 * 1024, 1024 * 1024, 1024 * 1024)
+    assert process_memory(20, root) == (2048 * 1024, None, None)
+    assert process_memory(30, root) is None
+    assert process_memory().rss > 0
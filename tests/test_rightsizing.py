@@ -0,0 +1,95 @@
+"""
+Tests for the vectorized right-sizing engine and its endpoint.
+"""
+import time
+import numpy as np
+import pytest
+from parser.models import Workload
+from parser.rightsizing import RightSizingPolicy, load_sizing_arrays, rightsize, summarize_rightsizing
+
+
+def _arrays(**columns):
+    size = len(next(iter(columns.values())))
+    arrays = {name: np.full(size, np.nan) for name in (
+        'vcpu', 'vram_gb', 'storage_total_gb', 'storage_used_gb', 'avg_cpu_percent',
+        'peak_cpu_percent', 'avg_memory_percent', 'peak_memory_percent')}
+    arrays['vmid'] = np.arange(size)
+    arrays['vmname'] = np.array([f'vm{i}' for i in range(size)], dtype=object)
+    arrays.update({name: np.asarray(values, dtype=np.float64) for name, values in columns.items()})
+    return arrays
+
+
+def test_rightsize_recommendations():
+    """Test recommendations from peak utilization with 20% headroom"""
+    arrays = _arrays(vcpu=[8, 4, 2], vram_gb=[32, 16, 4],
+                     storage_total_gb=[100, 200, 50], storage_used_gb=[40, 0, 50],
+                     peak_cpu_percent=[25, 100, np.nan], peak_memory_percent=[50, 100, np.nan])
+
+    result = rightsize(arrays, RightSizingPolicy())
+
+    assert result['recommended_vcpu'].tolist() == [3, 5, 2]  # 8*0.25*1.2=2.4 -> 3; 4*1.2=4.8 -> 5; no data
+    assert result['recommended_vram_gb'].tolist() == [20, 20, 4]  # 19.2 -> 20; 19.2 -> 20; no data
+    assert result['recommended_storage_gb'].tolist() == [48, 200, 60]  # no used capacity keeps the total
+    assert result['has_utilization'].tolist() == [True, True, False]
+
+    totals = summarize_rightsizing(arrays, result)
+    assert totals['workloads'] == 3
+    assert totals['with_utilization'] == 2
+    assert totals['oversized'] == 1
+    assert totals['undersized'] == 1
+    assert totals['vcpu_savings'] == 4
+    assert totals['vram_gb_savings'] == 8
+
+
+def test_rightsize_average_basis_and_minimums():
+    """Test the average basis and the minimum vCPU/vRAM"""
+    arrays = _arrays(vcpu=[4], vram_gb=[8], storage_total_gb=[10], storage_used_gb=[5],
+                     avg_cpu_percent=[1], avg_memory_percent=[1], peak_cpu_percent=[90], peak_memory_percent=[90])
+
+    result = rightsize(arrays, RightSizingPolicy(basis='average', vram_step_gb=2, min_vram_gb=2))
+
+    assert result['recommended_vcpu'].tolist() == [1]
+    assert result['recommended_vram_gb'].tolist() == [2]
+    with pytest.raises(ValueError):
+        rightsize(arrays, RightSizingPolicy(basis='p95'))
+
+
+def test_rightsize_100k_vms_under_a_second():
+    """Test that sizing stays vectorized for large projects"""
+    rng = np.random.default_rng(0)
+    size = 100_000
+    arrays = _arrays(vcpu=rng.integers(1, 32, size), vram_gb=rng.integers(1, 256, size),
+                     storage_total_gb=rng.uniform(10, 2000, size), storage_used_gb=rng.uniform(0, 1000, size),
+                     peak_cpu_percent=rng.uniform(0, 100, size), peak_memory_percent=rng.uniform(0, 100, size))
+
+    started = time.perf_counter()
+    summarize_rightsizing(arrays, rightsize(arrays))
+    assert time.perf_counter() - started < 1
+
+
+def test_rightsizing_endpoint(client, test_user, test_project, db_session):
+    """Test the JSON endpoint against workloads read from the database"""
+    db_session.add_all([
+        Workload(pid=test_project.pid, vmname='busy', vcpu=4, vram=8192, vmdktotal=100, vmdkused=90,
+                 peakcpupercent=100, peakmemorypercent=100),
+        Workload(pid=test_project.pid, vmname='idle', vcpu=8, vram=16384, vmdktotal=100, vmdkused=10,
+                 peakcpupercent=10, peakmemorypercent=10),
+        Workload(pid=test_project.pid, vmname='rvtools', vcpu=2, vram=4096, vmdktotal=50, vmdkused=20),
+    ])
+    db_session.commit()
+
+    arrays = load_sizing_arrays(test_project.pid)
+    assert arrays['vmname'].tolist() == ['busy', 'idle', 'rvtools']
+    assert arrays['vram_gb'].tolist() == [8, 16, 4]
+
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    data = client.get(f'/rightsizing/{test_project.pid}?cpu_headroom=0').get_json()
+
+    assert data['policy']['cpu_headroom'] == 0
+    assert data['totals']['with_utilization'] == 2
+    assert data['workloads']['recommended_vcpu'] == [4, 1, 2]
+    assert data['workloads']['recommended_vram_gb'] == [10, 2, 4]
+    assert data['workloads']['recommended_storage_gb'] == [108, 12, 24]
+
+    assert 'workloads' not in client.get(f'/rightsizing/{test_project.pid}?details=0').get_json()
+    assert client.get(f'/rightsizing/{test_project.pid}?basis=p95').status_code == 400
@@ -5,6 +5,7 @@ import pandas as pd
 import pytest
 from pandas import testing as pdtest
 from parser.transform.transform_rvtools import rvtools_conversion
+from parser.transform.schema import conform_workload_frame
 
 
 def test_rvtools_transformation():
@@ -15,6 +16,7 @@ def test_rvtools_transformation():
     target_df = pd.read_csv('tests/test_files/rvtools_expected_df.csv')
     target_df['vRam'] = target_df['vRam'].astype(float)
     target_df['vmdkTotal'] = target_df['vmdkTotal'].astype(float)
+    target_df = conform_workload_frame(target_df)
     
     file_name = 'rvtools_file_sample.xlsx'
     input_path = 'tests/test_files/'
@@ -0,0 +1,77 @@
+"""
+Tests for cross-project workload search.
+"""
+import uuid
+import pytest
+from parser.models import Project, User, Workload
+from parser.search import search_workloads
+
+
+@pytest.fixture
+def search_data(db_session, test_user, test_project):
+    """Two projects of the test user and one of another user"""
+    other_user = User(username=f"other_{uuid.uuid4().hex[:8]}", password='x')
+    db_session.add(other_user)
+    db_session.flush()
+    other_project = Project(userid=test_user.id, projectname=f"Other_{uuid.uuid4().hex[:8]}")
+    foreign_project = Project(userid=other_user.id, projectname=f"Foreign_{uuid.uuid4().hex[:8]}")
+    db_session.add_all([other_project, foreign_project])
+    db_session.flush()
+    db_session.add_all([
+        Workload(pid=test_project.pid, vmname='web-01', ip_addresses='10.0.0.5, 10.0.0.6',
+                 os='Ubuntu Linux (64-bit)', cluster='prod', vmstate='poweredOn'),
+        Workload(pid=test_project.pid, vmname='db-01', ip_addresses='10.0.1.9',
+                 os='Microsoft Windows Server 2019 (64-bit)', cluster='prod', vmstate='poweredOff'),
+        Workload(pid=other_project.pid, vmname='WEB-02', ip_addresses='192.168.1.5',
+                 os='Ubuntu Linux (64-bit)', cluster='dev', vmstate='poweredOn'),
+        Workload(pid=other_project.pid, vmname='build_100%', cluster='dev'),
+        Workload(pid=foreign_project.pid, vmname='web-99', cluster='prod'),
+    ])
+    db_session.commit()
+    return other_project
+
+
+def test_search_across_projects(test_user, search_data):
+    """Test case-insensitive matching over the user's projects only"""
+    page = search_workloads(test_user.id, 'web')
+    assert [row['vmname'] for row in page.results] == ['web-01', 'WEB-02']
+    assert page.results[1]['projectname'] == search_data.projectname
+    assert page.next_cursor is None
+
+    assert [row['vmname'] for row in search_workloads(test_user.id, '10.0.1').results] == ['db-01']
+    assert len(search_workloads(test_user.id, 'ubuntu', fields=['os']).results) == 2
+    assert search_workloads(test_user.id, 'ubuntu', fields=['vmname']).results == []
+    # LIKE wildcards in the text match literally
+    assert [row['vmname'] for row in search_workloads(test_user.id, '00%').results] == ['build_100%']
+
+
+def test_search_filters_and_pages(test_user, test_project, search_data):
+    """Test exact filters and keyset pagination"""
+    page = search_workloads(test_user.id, filters={'cluster': 'prod', 'vmstate': 'poweredOn'})
+    assert [row['vmname'] for row in page.results] == ['web-01']
+
+    first = search_workloads(test_user.id, filters={'cluster': 'dev'}, limit=1)
+    assert len(first.results) == 1 and first.next_cursor == first.results[0]['vmid']
+    second = search_workloads(test_user.id, filters={'cluster': 'dev'}, after=first.next_cursor, limit=1)
+    assert second.next_cursor is None
+    assert {first.results[0]['vmname'], second.results[0]['vmname']} == {'WEB-02', 'build_100%'}
+
+    assert len(search_workloads(test_user.id, project_id=test_project.pid).results) == 2
+    for kwargs in ({'text': 'we'}, {}, {'text': 'web', 'fields': ['mobid']}, {'filters': {'vcpu': 2}}):
+        with pytest.raises(ValueError):
+            search_workloads(test_user.id, **kwargs)
+
+
+def test_search_endpoints(client, test_user, search_data):
+    """Test the JSON endpoint and the search page"""
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+
+    data = client.get('/search/workloads?q=web&limit=1').get_json()
+    assert [row['vmname'] for row in data['results']] == ['web-01']
+    data = client.get(f"/search/workloads?q=web&limit=1&after={data['next_cursor']}").get_json()
+    assert [row['vmname'] for row in data['results']] == ['WEB-02']
+    assert data['next_cursor'] is None
+    assert client.get('/search/workloads?q=we').status_code == 400
+
+    page = client.get('/search?q=10.0.0').get_data(as_text=True)
+    assert 'web-01' in page and 'db-01' not in page
@@ -0,0 +1,114 @@
+"""
+Tests for the SQLite-backed cache shared by all workers.
+"""
+import multiprocessing
+import sqlite3
+import time
+from parser.models import Workload
+from parser.shared_cache import SharedCache, user_content_key
+
+
+def _store(path):
+    cache = SharedCache(path)
+    cache.get('from-child')
+    cache.set('from-child', {'workloads': 42})
+
+
+def test_shared_cache_across_processes(tmp_path):
+    """Test that entries and counters written by another process are visible"""
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = SharedCache(path)
+    assert cache.get('from-child') is None  # opened before the fork, like a preloaded app
+
+    child = multiprocessing.get_context('fork').Process(target=_store, args=(path,))
+    child.start()
+    child.join()
+
+    assert cache.get('from-child') == {'workloads': 42}
+    # the child's miss was written by its set; ours are still counted in this process
+    assert SharedCache(path).stats()['misses'] == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 2, 1)
+    assert stats['hit_ratio'] == 0.3333
+
+
+def test_shared_cache_ttl_and_size_eviction(tmp_path):
+    """Test expiry and eviction of the least recently read entries"""
+    cache = SharedCache(str(tmp_path / 'cache.sqlite3'), max_bytes=2500, access_resolution=0)
+    cache.set('short', 'x', ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get('short') is None
+
+    for key in ('a', 'b', 'c'):
+        cache.set(key, b'0' * 1000)
+    # a+b+c exceed the budget: a, the oldest, goes
+    assert cache.get('a') is None
+    assert cache.get('b') is not None  # b is now more recent than c
+    cache.set('d', b'0' * 1000)
+    assert cache.get('c') is None
+    assert cache.get('b') is not None
+    assert cache.stats()['evictions'] == 3  # short (expired), a and c
+    cache.set('huge', b'0' * 5000)
+    assert cache.get('huge') is None
+
+
+def test_shared_cache_reads_do_not_wait_for_writers(tmp_path):
+    """Test that a locked or unusable cache file degrades to misses and skipped writes"""
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = SharedCache(path, timeout=0.05)
+    cache.set('key', 'value')
+
+    writer = sqlite3.connect(path)
+    writer.execute('BEGIN IMMEDIATE')  # another worker holding the write lock
+    try:
+        assert cache.get('key') == 'value'
+        cache.set('other', 'value')
+        assert cache.get_or_set('built', lambda: 'fresh') == 'fresh'
+    finally:
+        writer.rollback()
+        writer.close()
+    assert cache.get('other') is None
+
+    broken = SharedCache(str(tmp_path))  # a directory, not a database file
+    assert broken.get_or_set('key', lambda: 'fresh') == 'fresh'
+
+
+def test_shared_cache_disabled(tmp_path):
+    """Test that a TTL of 0 bypasses the cache"""
+    cache = SharedCache(str(tmp_path / 'cache.sqlite3'), ttl=0)
+    cache.set('key', 'value')
+    assert cache.get_or_set('key', lambda: 'built') == 'built'
+    assert cache.stats()['size'] == 0
+
+
+def test_user_content_key():
+    """Test that any project change yields a new key"""
+    key = user_content_key('analytics', 1, [(2, 0), (1, 3)])
+    assert key == user_content_key('analytics', 1, [(1, 3), (2, 0)])
+    assert key != user_content_key('analytics', 1, [(1, 4), (2, 0)])
+    assert key != user_content_key('analytics', 1, [(1, 3)])
+    assert key != user_content_key('dashboard', 1, [(1, 3), (2, 0)])
+
+
+def test_cached_views_follow_workload_changes(app, client, test_user, test_project, db_session):
+    """Test that analytics, dashboard and export are served from the cache until workloads change"""
+    db_session.add(Workload(pid=test_project.pid, vmname='first', vcpu=2, vram=2048))
+    test_project.bump_content_version()
+    db_session.commit()
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+
+    for _ in range(2):
+        assert 'Avg: 2.0 per VM' in client.get('/analytics').get_data(as_text=True)
+        assert '1 workloads' in client.get('/dashboard').get_data(as_text=True)
+        assert 'first' in client.get(f'/export_project/{test_project.pid}').get_data(as_text=True)
+    # analytics also reuses its rendered distribution tables (see parser/fragments.py)
+    assert app.extensions['shared_cache'].stats()['hits'] == 4
+
+    client.post(f'/create_workload/{test_project.pid}', data={
+        'vmname': 'second', 'vmstate': 'poweredOn', 'vcpu': 4, 'vram': 4096,
+        **{field: 0 for field in ('vinfo_provisioned', 'vinfo_used', 'vmdktotal', 'vmdkused', 'readiops',
+                                  'writeiops', 'peakreadiops', 'peakwriteiops', 'readthroughput',
+                                  'writethroughput', 'peakreadthroughput', 'peakwritethroughput')},
+    })
+    assert '2 workloads' in client.get('/dashboard').get_data(as_text=True)
+    assert 'second' in client.get(f'/export_project/{test_project.pid}').get_data(as_text=True)
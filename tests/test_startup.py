@@ -0,0 +1,33 @@
+"""
+Tests for the cold start of the application (see benchmarks/startup.py).
+"""
+import os
+
+from benchmarks.startup import LAZY_MODULES, measure_startup, parse_importtime
+
+# Generous for slow CI machines; pandas alone used to add about 300 ms
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 1500))
+
+
+def test_parse_importtime():
+    """Test reading module, timings and nesting from -X importtime output"""
+    imports = parse_importtime(
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       120 |        120 |     numpy.core\n'
+        'import time:       300 |        420 |   numpy\n'
+        'import time:       500 |        920 | parser.routes\n'
+        'some other stderr line\n'
+    )
+    assert [(entry.module, entry.depth) for entry in imports] == [('numpy.core', 2), ('numpy', 1), ('parser.routes', 0)]
+    assert imports[-1].self_us == 500
+    assert imports[-1].cumulative_us == 920
+
+
+def test_app_boot_skips_import_only_modules():
+    """Test that building the app loads neither pandas nor openpyxl, within the budget"""
+    total_ms, imports = measure_startup()
+    loaded = {entry.module for entry in imports}
+    assert 'parser.routes' in loaded
+    assert loaded.isdisjoint(LAZY_MODULES)
+    assert total_ms < STARTUP_BUDGET_MS
+
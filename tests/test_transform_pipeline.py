@@ -0,0 +1,110 @@
+"""
+Tests for stage-level timing and memory tracing of the transforms.
+"""
+import tracemalloc
+import pandas as pd
+from parser.transform.pipeline import StageProfile, profiled_stage, run_profiled, stage
+from parser.transform.transform_lova import lova_conversion
+from parser.transform.transform_rvtools import rvtools_conversion
+
+
+def test_stage_outside_profile_is_noop():
+    """Test that stages can run without an active profile"""
+    with stage('read_sheet', 'vInfo'):
+        value = 1
+    assert value == 1
+
+
+def test_profiled_stage_decorator():
+    """Test that decorated functions are recorded as one stage"""
+    @profiled_stage('double')
+    def double(x):
+        return x * 2
+
+    result, profile = run_profiled(double, x=21)
+
+    assert result == 42
+    assert [s['stage'] for s in profile.as_list()] == ['double']
+    assert profile.as_list()[0]['peak_mb'] is None
+
+
+def test_stage_profile_totals():
+    """Test that totals sum the recorded stages"""
+    profile = StageProfile()
+    with profile.record('read_sheet', 'vInfo'):
+        pass
+    with profile.record('merge'):
+        pass
+
+    stages = profile.as_list()
+    assert [s['stage'] for s in stages] == ['read_sheet (vInfo)', 'merge']
+    assert profile.total_wall_ms == round(sum(s['wall_ms'] for s in stages), 3)
+    assert profile.total_cpu_ms >= 0
+
+
+def test_rvtools_stages_recorded():
+    """Test the stage breakdown of the RVTools transform"""
+    describe_params = {"file_name": 'rvtools_file_sample.xlsx', "input_path": 'tests/test_files/'}
+    result, profile = run_profiled(rvtools_conversion, **describe_params)
+
+    stages = [s['stage'] for s in profile.as_list()]
+    assert not pd.DataFrame(result).empty
+    assert stages[:2] == ['check_columns', 'read_sheet (vInfo)']
+    assert 'aggregate (vDisk)' in stages
+    assert 'merge' in stages
+    assert stages[-2:] == ['validate', 'summarize']
+    assert all(s['wall_ms'] >= 0 for s in profile.as_list())
+
+
+def test_lova_memory_tracing():
+    """Test that memory tracing records a peak per stage and stops tracemalloc"""
+    describe_params = {"file_name": 'liveoptics_file_sample.xlsx', "input_path": 'tests/test_files/'}
+    _, profile = run_profiled(lova_conversion, trace_memory=True, **describe_params)
+
+    assert profile.as_list()
+    assert all(s['peak_mb'] is not None and s['peak_mb'] > 0 for s in profile.as_list())
+    assert not tracemalloc.is_tracing()
+
+
+@profiled_stage('allocate')
+def _allocate(n):
+    return [0] * n
+
+
+def test_memory_tracing_leaves_a_running_trace_alone():
+    """Test that a run inside another run's (or anyone's) trace skips memory tracing"""
+    @profiled_stage('outer')
+    def outer():
+        _, profile = run_profiled(_allocate, trace_memory=True, n=1000)
+        return profile
+
+    inner, outer_profile = run_profiled(outer, trace_memory=True)
+    assert inner.as_list()[0]['peak_mb'] is None
+    assert outer_profile.as_list()[0]['peak_mb'] > 0
+    assert not tracemalloc.is_tracing()
+
+    tracemalloc.start()
+    try:
+        _, profile = run_profiled(_allocate, trace_memory=True, n=1000)
+        assert profile.as_list()[0]['peak_mb'] is None
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_upload_preview_shows_stages(process_rvtools_sample):
+    """Test that the upload preview renders the stage table"""
+    response = process_rvtools_sample()
+
+    assert response.status_code == 200
+    assert b'stage-profile-table' in response.data
+    assert b'read_sheet (vInfo)' in response.data
+
+
+def test_upload_preview_profiling_disabled(app, process_rvtools_sample):
+    """Test that the stage table is omitted when profiling is off"""
+    app.config['TRANSFORM_PROFILING'] = False
+    response = process_rvtools_sample()
+
+    assert response.status_code == 200
+    assert b'stage-profile-table' not in response.data
@@ -0,0 +1,132 @@
+"""
+Tests for the transform registry and the govc JSON format.
+"""
+import json
+import shutil
+import openpyxl
+import pandas as pd
+import pytest
+from parser.models import Workload
+from parser.transform import registry
+from parser.transform.data_validation import filetype_validation
+from parser.transform.registry import (detect_transform, get_transform, register_transform,
+                                       registered_transforms, upload_extensions)
+from parser.transform.schema import WorkloadSchemaError
+
+
+@pytest.fixture
+def custom_format():
+    """Register a throwaway CSV format for the duration of a test"""
+    @register_transform('test-csv', 'Test CSV', extensions=('csv',),
+                        detect=lambda probe: probe.head().startswith('vm,'))
+    def csv_conversion(**kwargs):
+        frame = pd.read_csv(f"{kwargs['input_path']}/{kwargs['file_name']}")
+        return frame.rename(columns={'vm': 'vmName'})
+
+    yield csv_conversion
+    registry._registry.pop('test-csv')
+
+
+def test_builtin_formats_registered():
+    """Test that the shipped formats are available through the registry"""
+    file_types = [plugin.file_type for plugin in registered_transforms()]
+    assert file_types[:3] == ['live-optics', 'rv-tools', 'govc-json']
+    assert get_transform('rv-tools').label == 'RVTools'
+    assert get_transform('invalid') is None
+    assert upload_extensions() == ['xlsx', 'xls', 'json']
+
+
+def test_detect_govc_json(tmp_path):
+    """Test detection of govc exports in both key styles"""
+    assert filetype_validation('tests/test_files/', 'govc_vm_info_sample.json') == 'govc-json'
+
+    with open('tests/test_files/govc_vm_info_sample.json') as fh:
+        payload = json.load(fh)
+    (tmp_path / 'lower.json').write_text(json.dumps({'virtualMachines': payload['VirtualMachines']}))
+    (tmp_path / 'other.json').write_text(json.dumps({'hosts': []}))
+
+    assert filetype_validation(str(tmp_path), 'lower.json') == 'govc-json'
+    assert filetype_validation(str(tmp_path), 'other.json') == 'invalid'
+    with pytest.raises(FileNotFoundError):
+        detect_transform(str(tmp_path), 'missing.json')
+
+
+def test_govc_conversion():
+    """Test the govc transform output and the shared validate/summarize tail"""
+    df = get_transform('govc-json').conversion(input_path='tests/test_files', file_name='govc_vm_info_sample.json')
+
+    assert list(df['vmId']) == ['vm-101', 'vm-102', 'vm-103']
+    assert df['vCpu'].dtype == 'Int32'
+    assert df.loc[1, 'vRam'] == 32.0
+    assert df.loc[0, 'vmdkTotal'] == 50.0
+    assert df.loc[0, 'vmdkUsed'] == 20.0
+    assert df.loc[2, 'ip_addresses'] == 'no ip'
+    assert df.attrs['summary']['powered_on'] == 2
+
+
+def test_custom_format(tmp_path, custom_format):
+    """Test that a registered format is detected and gets schema validation"""
+    (tmp_path / 'vms.csv').write_text('vm,cpu\nweb-01,2\n')
+
+    plugin, _ = detect_transform(str(tmp_path), 'vms.csv')
+    assert plugin.file_type == 'test-csv'
+    assert 'csv' in upload_extensions()
+    with pytest.raises(WorkloadSchemaError):
+        plugin.conversion(input_path=str(tmp_path), file_name='vms.csv')
+
+
+def test_process_upload_govc(app, client, test_user, test_project, tmp_path, db_session):
+    """Test a govc export through process_upload and save_workloads"""
+    app.config['STAGING_FOLDER'] = str(tmp_path / 'staging')
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    shutil.copy('tests/test_files/govc_vm_info_sample.json', tmp_path)
+
+    response = client.get('/process_upload', query_string={
+        'input_path': str(tmp_path),
+        'file_type': 'govc-json',
+        'file_name': 'govc_vm_info_sample.json',
+        'project_id': test_project.pid,
+    })
+    assert response.status_code == 200
+    assert 'vSphere govc' in response.get_data(as_text=True)
+
+    client.post('/save_workloads', data={'import_mode': 'append'})
+    names = {w.vmname for w in db_session.query(Workload).filter_by(pid=test_project.pid)}
+    assert names == {'web-01', 'db-01', 'build-01'}
+
+
+def test_process_upload_unknown_type(client, test_user, test_project, tmp_path):
+    """Test that file types without a registered format are rejected"""
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    (tmp_path / 'inventory.json').write_text('{}')
+
+    response = client.get('/process_upload', query_string={
+        'input_path': str(tmp_path),
+        'file_type': 'invalid',
+        'file_name': 'inventory.json',
+        'project_id': test_project.pid,
+    })
+    assert response.status_code == 302
+    assert not (tmp_path / 'inventory.json').exists()
+
+
+def test_required_columns_checked_before_transform(client, test_user, test_project, tmp_path):
+    """Test that a workbook missing a required column is rejected with the column's name, not a KeyError"""
+    workbook = openpyxl.load_workbook('tests/test_files/rvtools_file_sample.xlsx')
+    sheet = workbook['vInfo']
+    header = [cell.value for cell in sheet[1]]
+    sheet.delete_cols(header.index('Memory') + 1)
+    workbook.save(tmp_path / 'rvtools_no_memory.xlsx')
+
+    plugin = get_transform('rv-tools')
+    with pytest.raises(WorkloadSchemaError, match='sheet vInfo is missing columns: Memory'):
+        plugin.conversion(input_path=str(tmp_path), file_name='rvtools_no_memory.xlsx')
+
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    response = client.get('/process_upload', query_string={
+        'input_path': str(tmp_path),
+        'file_type': 'rv-tools',
+        'file_name': 'rvtools_no_memory.xlsx',
+        'project_id': test_project.pid,
+    }, follow_redirects=True)
+    assert 'Not a complete RVTools export: sheet vInfo is missing columns: Memory' in response.get_data(as_text=True)
@@ -0,0 +1,134 @@
+"""
+Tests for server-side staging of processed uploads and the paginated preview.
+"""
+import os
+import pickle
+import time
+import pytest
+from parser.models import Workload
+from parser.staging import discard_staged, load_staged, load_staged_rows, purge_expired, stage_frame, staged_memory
+from parser.transform.transform_rvtools import rvtools_conversion
+
+
+@pytest.fixture
+def rvtools_df():
+    return rvtools_conversion(input_path='tests/test_files/', file_name='rvtools_file_sample.xlsx')
+
+
+def test_stage_and_load_round_trip(staging_app, rvtools_df):
+    """Test that staged frames come back with their dtypes"""
+    token = stage_frame(rvtools_df)
+
+    staged = load_staged(token)
+    assert staged.equals(rvtools_df)
+    assert list(staged.dtypes) == list(rvtools_df.dtypes)
+
+    discard_staged(token)
+    assert load_staged(token) is None
+
+
+def test_load_staged_rows_reads_only_the_page(staging_app, rvtools_df, monkeypatch):
+    """Test that a page is served from the chunks covering it"""
+    token = stage_frame(rvtools_df, chunk_rows=2)
+    loaded = []
+    real_load = pickle.load
+    monkeypatch.setattr('parser.staging.pickle.load', lambda fh: loaded.append(fh.tell()) or real_load(fh))
+
+    rows, total = load_staged_rows(token, 3, 2)
+    assert total == len(rvtools_df)
+    assert rows.equals(rvtools_df.iloc[3:5])
+    assert len(loaded) == 3  # the index and the two chunks holding rows 3 and 4
+
+    rows, _ = load_staged_rows(token, len(rvtools_df) + 10, 2)
+    assert rows.empty and list(rows.columns) == list(rvtools_df.columns)
+    assert staged_memory(token) == rvtools_df.memory_usage(deep=True).sum()
+
+
+def test_load_ignores_old_staged_files(staging_app, rvtools_df):
+    """Test that an upload staged as one plain pickle (before chunking) counts as expired"""
+    token = stage_frame(rvtools_df)
+    rvtools_df.to_pickle(os.path.join(staging_app.config['STAGING_FOLDER'], token + '.pkl'))
+
+    assert load_staged(token) is None
+    assert load_staged_rows(token, 0, 2) is None
+
+
+def test_load_rejects_bad_tokens(staging_app):
+    """Test that tokens can't be used to read arbitrary files"""
+    assert load_staged(None) is None
+    assert load_staged('../../etc/passwd') is None
+    discard_staged('../secrets')
+
+
+def test_purge_expired(staging_app, rvtools_df):
+    """Test that abandoned staged uploads are removed"""
+    token = stage_frame(rvtools_df)
+    path = os.path.join(staging_app.config['STAGING_FOLDER'], token + '.pkl')
+    old = time.time() - staging_app.config['STAGING_TTL'] - 10
+    os.utime(path, (old, old))
+
+    assert purge_expired() == 1
+    assert not os.path.exists(path)
+
+
+def test_preview_renders_sample_only(staging_app, client, process_rvtools_sample, rvtools_df):
+    """Test that the preview page only renders the first rows plus totals"""
+    response = process_rvtools_sample()
+    html = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert f'Showing 2 of {len(rvtools_df)} workloads' in html
+    start = html.index('id="workload-preview-table"')
+    table = html[start:html.index('</table>', start)]
+    assert table.count('<tr') == 3  # header + sample rows
+    assert 'preview-summary' in html
+    with client.session_transaction() as sess:
+        assert 'processed_data' not in sess
+        assert load_staged(sess['staged_upload']) is not None
+
+
+def test_preview_data_pagination(staging_app, client, process_rvtools_sample, rvtools_df):
+    """Test the JSON endpoint the preview table pages through"""
+    process_rvtools_sample()
+
+    first = client.get('/upload_preview/data').get_json()
+    assert first['page'] == 1
+    assert first['per_page'] == 2
+    assert first['total'] == len(rvtools_df)
+    assert first['columns'] == list(rvtools_df.columns)
+    assert first['index'] == [0, 1]
+
+    last = client.get('/upload_preview/data', query_string={'page': first['pages'], 'per_page': 2}).get_json()
+    assert len(last['rows']) == len(rvtools_df) - 2 * (first['pages'] - 1)
+    assert last['rows'][-1][list(rvtools_df.columns).index('vmName')] == rvtools_df['vmName'].iloc[-1]
+
+    capped = client.get('/upload_preview/data', query_string={'per_page': 10 ** 6}).get_json()
+    assert capped['per_page'] == staging_app.config['PREVIEW_MAX_PAGE_SIZE']
+
+
+def test_preview_data_without_upload(staging_app, client, test_user):
+    """Test that the endpoint 404s when nothing is staged"""
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    response = client.get('/upload_preview/data')
+    assert response.status_code == 404
+
+
+def test_save_discards_staged_upload(staging_app, client, test_project, process_rvtools_sample, rvtools_df):
+    """Test that saving imports every staged row and removes the staged file"""
+    process_rvtools_sample()
+    with client.session_transaction() as sess:
+        token = sess['staged_upload']
+
+    response = client.post('/save_workloads', follow_redirects=False)
+
+    assert response.status_code == 302
+    assert Workload.query.filter_by(pid=test_project.pid).count() == len(rvtools_df)
+    assert load_staged(token) is None
+    assert os.listdir(staging_app.config['STAGING_FOLDER']) == []
+
+
+def test_cancel_discards_staged_upload(staging_app, client, process_rvtools_sample):
+    """Test that cancelling removes the staged file"""
+    process_rvtools_sample()
+    client.post('/cancel_upload')
+    assert os.listdir(staging_app.config['STAGING_FOLDER']) == []
@@ -0,0 +1,108 @@
+"""
+Tests for the TTL/LRU cache and the cached login user_loader.
+"""
+import pytest
+from flask import g
+from sqlalchemy import event
+from parser.app import db
+from parser.cache import TTLCache
+
+
+def test_ttl_cache_hit_and_miss():
+    """Test hit/miss accounting"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    assert cache.get('a') is None
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_ratio'] == 0.5
+
+
+def test_ttl_cache_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_expiry(monkeypatch):
+    """Test that entries expire after the TTL"""
+    now = [1000.0]
+    monkeypatch.setattr('parser.cache.time.monotonic', lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+
+    now[0] += 9
+    assert cache.get('a') == 1
+    now[0] += 2
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_ttl_cache_disabled():
+    """Test that a zero TTL disables caching"""
+    cache = TTLCache(maxsize=2, ttl=0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+
+
+def _count_user_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'users_tb' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def _get(client, path):
+    """Issue a request that rebuilds current_user through the user_loader.
+
+    The app fixture keeps one app context (and so one ``g``) open for the whole
+    test, so drop the user flask-login remembered from the previous request.
+    """
+    g.pop('_login_user', None)
+    return client.get(path)
+
+
+def test_user_loader_uses_cache(app, client, test_user):
+    """Test that authenticated requests after the first don't query the user table"""
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    _get(client, '/dashboard')
+
+    user_queries = _count_user_queries()
+    for _ in range(3):
+        response = _get(client, '/dashboard')
+        assert response.status_code == 200
+        assert test_user.username.encode() in response.data
+
+    assert user_queries == []
+    assert app.extensions['user_cache'].stats()['hits'] >= 3
+
+
+def test_user_cache_invalidated_on_update(app, client, test_user, db_session):
+    """Test that changing a user drops it from the cache"""
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    _get(client, '/dashboard')
+    assert app.extensions['user_cache'].stats()['size'] == 1
+
+    test_user.username = test_user.username[:15] + '_new'
+    db_session.commit()
+
+    assert app.extensions['user_cache'].stats()['size'] == 0
+    response = _get(client, '/profile')
+    assert response.status_code == 200
+    assert test_user.username.encode() in response.data
+
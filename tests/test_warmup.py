@@ -0,0 +1,38 @@
+"""
+Tests for the pre-fork warm-up of the preloaded application.
+"""
+import gc
+import sys
+
+from sqlalchemy import text
+
+from parser.app import db
+from parser.warmup import WARM_MODULES, warm_up
+
+
+def test_warm_up_loads_shared_state(app):
+    """Test that the warm-up imports pandas, compiles every template and freezes the heap"""
+    try:
+        summary = warm_up(app)
+    finally:
+        gc.unfreeze()
+
+    assert all(module in sys.modules for module in WARM_MODULES)
+    assert summary['templates'] == len(app.jinja_env.list_templates()) > 0
+    assert len(app.jinja_env.cache) >= summary['templates']
+    assert summary['transforms'] >= 3
+    assert summary['frozen'] > 0
+
+
+def test_warm_up_closes_pooled_connections(app):
+    """Test that no pooled database connection is left for the forked workers to share"""
+    with db.engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+    pool = db.engine.pool
+    assert pool.checkedin() == 1
+
+    try:
+        warm_up(app, modules=())
+    finally:
+        gc.unfreeze()
+    assert pool.checkedin() == 0
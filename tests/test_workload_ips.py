@@ -0,0 +1,86 @@
+"""
+Tests for the normalized workload IP addresses and IP/subnet search.
+"""
+import pandas as pd
+import pytest
+from parser.models import Workload, WorkloadIP
+from parser.search import search_workloads
+from parser.workload_ips import parse_ip_addresses
+from parser.workload_sync import merge_workloads
+
+
+def _addresses(pid):
+    rows = WorkloadIP.query.filter_by(pid=pid).all()
+    return sorted((row.workload.vmname, str(row.address)) for row in rows)
+
+
+def test_parse_ip_addresses():
+    """Test splitting, normalization and dropping of placeholders"""
+    text = '10.0.0.5, fe80:0:0:0::1%eth0, no ip; 10.0.0.5 2001:DB8::10,300.1.1.1'
+    assert parse_ip_addresses(text) == ['10.0.0.5', 'fe80::1', '2001:db8::10']
+    assert parse_ip_addresses('no ip') == []
+    assert parse_ip_addresses(None) == []
+
+
+def test_merge_keeps_addresses_in_sync(test_project, db_session):
+    """Test that merged inserts, updates and deletes rewrite the address rows"""
+    incoming = pd.DataFrame({
+        'mobid': ['vm-1', 'vm-2'],
+        'virtualdatacenter': ['DC1', 'DC1'],
+        'vmname': ['web01', 'db01'],
+        'ip_addresses': ['10.0.0.5, 10.0.0.6', '10.0.1.9'],
+    })
+    merge_workloads(test_project.pid, incoming)
+    db_session.commit()
+    assert _addresses(test_project.pid) == [('db01', '10.0.1.9'), ('web01', '10.0.0.5'), ('web01', '10.0.0.6')]
+
+    merge_workloads(test_project.pid, incoming.iloc[[0]].assign(ip_addresses='192.168.0.1'))
+    db_session.commit()
+    assert _addresses(test_project.pid) == [('web01', '192.168.0.1')]
+
+
+def test_workload_routes_keep_addresses_in_sync(client, test_user, test_project, db_session):
+    """Test create, edit and delete of single workloads"""
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    form = {'vmname': 'app01', 'vmstate': 'poweredOn', 'vcpu': 2, 'vram': 2048,
+            'ip_addresses': '10.1.0.1, 10.1.0.2',
+            **{field: 0 for field in ('vinfo_provisioned', 'vinfo_used', 'vmdktotal', 'vmdkused', 'readiops',
+                                      'writeiops', 'peakreadiops', 'peakwriteiops', 'readthroughput',
+                                      'writethroughput', 'peakreadthroughput', 'peakwritethroughput')}}
+
+    client.post(f'/create_workload/{test_project.pid}', data=form)
+    assert _addresses(test_project.pid) == [('app01', '10.1.0.1'), ('app01', '10.1.0.2')]
+
+    workload = Workload.query.filter_by(pid=test_project.pid).one()
+    client.post(f'/edit_workload/{workload.vmid}', data={**form, 'ip_addresses': '2001:db8::1'})
+    assert _addresses(test_project.pid) == [('app01', '2001:db8::1')]
+
+    client.post(f'/delete_workload/{workload.vmid}')
+    assert WorkloadIP.query.filter_by(pid=test_project.pid).count() == 0
+
+
+def test_search_by_address_and_network(client, test_user, test_project, db_session):
+    """Test exact IP and CIDR lookups through search"""
+    merge_workloads(test_project.pid, pd.DataFrame({
+        'mobid': ['vm-1', 'vm-2', 'vm-3'],
+        'virtualdatacenter': ['DC1', 'DC1', 'DC1'],
+        'vmname': ['web01', 'web02', 'db01'],
+        'ip_addresses': ['10.0.0.5, 2001:db8::5', '10.0.0.200', '10.0.1.9'],
+    }))
+    db_session.commit()
+
+    def names(network):
+        return [row['vmname'] for row in search_workloads(test_user.id, network=network).results]
+
+    assert names('10.0.0.5') == ['web01']
+    assert names('10.0.0.0/24') == ['web01', 'web02']
+    assert names('10.0.0.0/16') == ['web01', 'web02', 'db01']
+    assert names('2001:db8::/32') == ['web01']
+    assert names('10.0.0.1') == []
+    with pytest.raises(ValueError):
+        names('10.0.0.0/33')
+
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    data = client.get('/search/workloads?network=10.0.0.0/24&q=web02').get_json()
+    assert [row['vmname'] for row in data['results']] == ['web02']
+    assert client.get('/search/workloads?network=not-an-ip').status_code == 400
@@ -0,0 +1,131 @@
+"""
+Unit tests for the canonical workload schema shared by the transforms.
+"""
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from parser.models import Workload
+from parser.staging import stage_frame
+from parser.transform.schema import (WORKLOAD_SCHEMA, WorkloadSchemaError, conform_workload_frame,
+                                     to_workload_records)
+from parser.transform.transform_lova import lova_conversion
+from parser.transform.transform_rvtools import rvtools_conversion
+
+
+def _minimal_frame():
+    """Build a small frame containing every required column"""
+    return pd.DataFrame({
+        'vmId': ['vm-1', 'vm-2'],
+        'vmName': ['web01', 'db01'],
+        'os': ['Linux', None],
+        'os_name': [np.nan, np.nan],
+        'vmState': ['poweredOn', 'poweredOff'],
+        'cluster': ['Cluster 01', 'Cluster 01'],
+        'virtualDatacenter': ['DC1', 'DC1'],
+        'ip_addresses': ['10.0.0.1', 'no ip'],
+        'vCpu': [2.0, np.nan],
+        'vRam': [4.0, 1.5],
+        'vmdkTotal': [100, 40],
+        'vmdkUsed': [50, 20],
+    })
+
+
+@pytest.mark.parametrize('conversion, file_name', [
+    (lova_conversion, 'liveoptics_file_sample.xlsx'),
+    (rvtools_conversion, 'rvtools_file_sample.xlsx'),
+])
+def test_transforms_emit_schema_dtypes(conversion, file_name):
+    """Test that both transforms emit the canonical dtypes"""
+    result = conversion(input_path='tests/test_files/', file_name=file_name)
+
+    for column in result.columns:
+        assert column in WORKLOAD_SCHEMA
+        assert str(result[column].dtype) == WORKLOAD_SCHEMA[column].dtype, column
+
+
+def test_conform_casts_to_schema_dtypes():
+    """Test that conforming a loosely typed frame produces the schema dtypes"""
+    conformed = conform_workload_frame(_minimal_frame())
+
+    assert str(conformed['vCpu'].dtype) == 'Int32'
+    assert str(conformed['vmdkTotal'].dtype) == 'float64'
+    assert conformed['os_name'].dtype == object
+    assert conformed['vCpu'].isna().tolist() == [False, True]
+
+
+def test_conform_round_trips_through_json():
+    """Test that a frame stored as JSON records conforms back to the same dtypes"""
+    conformed = conform_workload_frame(_minimal_frame())
+    restored = conform_workload_frame(pd.DataFrame(json.loads(conformed.to_json(orient='records'))))
+
+    assert (restored.dtypes == conformed.dtypes).all()
+
+
+def test_conform_drops_unknown_columns():
+    """Test that columns outside the schema are dropped"""
+    df = _minimal_frame()
+    df['Folder'] = ['a', 'b']
+
+    assert 'Folder' not in conform_workload_frame(df).columns
+
+
+def test_conform_missing_required_column():
+    """Test that a missing required column is rejected"""
+    df = _minimal_frame().drop(columns=['vmName'])
+
+    with pytest.raises(WorkloadSchemaError, match='vmName'):
+        conform_workload_frame(df)
+
+
+def test_conform_null_in_non_nullable_column():
+    """Test that missing identifiers are rejected"""
+    df = _minimal_frame()
+    df.loc[1, 'vmId'] = None
+
+    with pytest.raises(WorkloadSchemaError, match='vmId'):
+        conform_workload_frame(df)
+
+
+def test_conform_uncastable_column():
+    """Test that non-numeric values in numeric columns are rejected"""
+    df = _minimal_frame()
+    df['vRam'] = ['four', 'two']
+
+    with pytest.raises(WorkloadSchemaError, match='vRam'):
+        conform_workload_frame(df)
+
+
+def test_to_workload_records():
+    """Test conversion of a conformed frame into Workload mappings"""
+    records = to_workload_records(conform_workload_frame(_minimal_frame()), pid=7)
+
+    assert len(records) == 2
+    assert records[0]['pid'] == 7
+    assert records[0]['mobid'] == 'vm-1'
+    assert records[0]['vram'] == 4096  # GB -> MB
+    assert records[1]['vram'] == 1536
+    assert records[1]['vcpu'] == 0  # missing vCPU stored as 0
+    assert records[1]['os'] is None
+    assert records[0]['os_name'] is None
+    assert set(records[0]) - {'pid', 'os', 'cluster', 'virtualdatacenter'} <= set(Workload.__table__.columns.keys())
+
+
+def test_save_workloads_bulk_insert(client, test_user, test_project, db_session):
+    """Test that staged workloads are saved to the project"""
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+
+    with client.session_transaction() as sess:
+        sess['staged_upload'] = stage_frame(conform_workload_frame(_minimal_frame()))
+        sess['project_id'] = test_project.pid
+        sess['file_name'] = 'inventory.xlsx'
+        sess['file_type'] = 'rv-tools'
+
+    response = client.post('/save_workloads', follow_redirects=False)
+    assert response.status_code == 302
+    assert f'/view_project/{test_project.pid}' in response.headers['Location']
+
+    workloads = Workload.query.filter_by(pid=test_project.pid).order_by(Workload.mobid).all()
+    assert [w.mobid for w in workloads] == ['vm-1', 'vm-2']
+    assert workloads[0].vram == 4096
+    assert workloads[1].vcpu == 0
@@ -0,0 +1,123 @@
+"""
+Tests for merging a refreshed inventory into an existing project.
+"""
+import decimal
+import pandas as pd
+import pytest
+from parser.models import Workload
+from parser.staging import stage_frame
+from parser.transform.schema import conform_workload_frame
+from parser.workload_sync import diff_workloads, merge_workloads
+
+
+def _incoming():
+    """Refreshed inventory keyed by Workload column name"""
+    return pd.DataFrame({
+        'mobid': ['vm-1', 'vm-2', 'vm-4'],
+        'virtualdatacenter': ['DC1', None, 'DC1'],
+        'vmname': ['web01', 'db01', 'new01'],
+        'vcpu': [2, 4, 1],
+        'vmdktotal': [104.5517578125, 3.0, 1.0],
+    })
+
+
+def test_diff_workloads():
+    """Test classification of incoming rows into inserts, updates and deletes"""
+    existing = pd.DataFrame({
+        'vmid': [10, 11, 12, 13],
+        'mobid': ['vm-1', 'vm-2', 'vm-3', None],
+        'virtualdatacenter': ['DC1', None, 'DC1', None],
+        'vmname': ['web01', 'db01', 'old01', 'manual'],
+        'vcpu': [2, 2, 1, 1],
+        'vmdktotal': [decimal.Decimal('104.551758'), decimal.Decimal('3'), None, None],
+    })
+
+    diff = diff_workloads(_incoming(), existing)
+
+    assert diff['inserts']['mobid'].tolist() == ['vm-4']
+    assert diff['updates']['vmid'].tolist() == [11]  # vCPU changed, NULL datacenter still matches
+    assert diff['updates']['vcpu'].tolist() == [4]
+    assert diff['deletes'] == [12]  # the manual workload without a MOB ID is kept
+    assert diff['unchanged'] == 1  # storage equal at the stored precision
+    assert diff['inserts']['vcpu'].dtype == 'int64'
+
+
+def test_diff_workloads_same_mobid_other_datacenter():
+    """Test that the same MOB ID in another datacenter is a different VM"""
+    existing = pd.DataFrame({
+        'vmid': [10],
+        'mobid': ['vm-1'],
+        'virtualdatacenter': ['DC2'],
+        'vmname': ['web01'],
+        'vcpu': [2],
+        'vmdktotal': [104.551758],
+    })
+
+    diff = diff_workloads(_incoming().head(1), existing)
+
+    assert diff['inserts']['mobid'].tolist() == ['vm-1']
+    assert diff['deletes'] == [10]
+
+
+def test_diff_workloads_duplicates():
+    """Test that extra existing copies of a VM are deleted and repeated incoming rows counted"""
+    existing = pd.DataFrame({
+        'vmid': [12, 10, 11],
+        'mobid': ['vm-1', 'vm-1', 'vm-1'],
+        'virtualdatacenter': ['DC1', 'DC1', 'DC1'],
+        'vmname': ['web01', 'web01', 'web01'],
+        'vcpu': [2, 2, 2],
+        'vmdktotal': [104.551758, 104.551758, 104.551758],
+    })
+    incoming = pd.concat([_incoming().head(1), _incoming().head(1).assign(vcpu=8)], ignore_index=True)
+
+    diff = diff_workloads(incoming, existing)
+
+    assert diff['unchanged'] == 1  # the oldest copy is kept and matched by the first incoming row
+    assert sorted(diff['deletes']) == [11, 12]
+    assert diff['updates'].empty and diff['inserts'].empty
+    assert diff['duplicates'] == 1
+
+
+def test_merge_workloads(test_project, db_session):
+    """Test applying a merge to the database"""
+    db_session.add_all([
+        Workload(pid=test_project.pid, mobid='vm-1', virtualdatacenter='DC1', vmname='web01', vcpu=2, vmdktotal=104.551758),
+        Workload(pid=test_project.pid, mobid='vm-2', vmname='db01', vcpu=2, vmdktotal=3),
+        Workload(pid=test_project.pid, mobid='vm-3', virtualdatacenter='DC1', vmname='old01', vcpu=1),
+        Workload(pid=test_project.pid, vmname='manual', vcpu=1),
+    ])
+    db_session.commit()
+    unchanged_vmid = Workload.query.filter_by(pid=test_project.pid, mobid='vm-1').one().vmid
+
+    result = merge_workloads(test_project.pid, _incoming())
+    db_session.commit()
+
+    assert result == {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1, 'duplicates': 0}
+    workloads = {w.vmname: w for w in Workload.query.filter_by(pid=test_project.pid).all()}
+    assert set(workloads) == {'web01', 'db01', 'new01', 'manual'}
+    assert workloads['db01'].vcpu == 4
+    assert workloads['web01'].vmid == unchanged_vmid
+
+
+def test_save_workloads_merge_mode(client, test_user, test_project, db_session):
+    """Test that the merge import mode refreshes the project in place"""
+    db_session.add(Workload(pid=test_project.pid, mobid='vm-01', virtualdatacenter='BRB', vmname='vm1', vcpu=1))
+    db_session.add(Workload(pid=test_project.pid, mobid='vm-99', virtualdatacenter='BRB', vmname='gone', vcpu=1))
+    db_session.commit()
+
+    client.post('/login', data={'username': test_user.username, 'password': 'testpassword123'})
+    target_df = pd.read_csv('tests/test_files/rvtools_expected_df.csv')
+    with client.session_transaction() as sess:
+        sess['staged_upload'] = stage_frame(conform_workload_frame(target_df))
+        sess['project_id'] = test_project.pid
+        sess['file_name'] = 'rvtools_file_sample.xlsx'
+        sess['file_type'] = 'rv-tools'
+
+    response = client.post('/save_workloads', data={'import_mode': 'merge'}, follow_redirects=False)
+    assert response.status_code == 302
+
+    workloads = Workload.query.filter_by(pid=test_project.pid).all()
+    assert len(workloads) == len(target_df)
+    assert 'gone' not in {w.vmname for w in workloads}
+    assert next(w for w in workloads if w.mobid == 'vm-01').vcpu == 2